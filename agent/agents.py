@@ -1,239 +1,513 @@
-from groq_model import GroqJsonModel,GroqModel
+from groq_model import GroqJsonModel,GroqModel,parsed_json
 from state import AgentGraph
 from utils import get_current_time_and_date
 from prompts import planner_prompt_template, selector_prompt_template,reporter_prompt_template
+from prompts import reviewer_prompt_template, router_prompt_template
 from typing import Any, List
-from tools import serpapi_search
+from tools import serpapi_organic_results, serpapi_fused_search, aserpapi_fused_search
+from output import debug, emit
+from langchain_core.runnables import RunnableConfig
+from content_reducer import PAGE_SEPARATOR, reduce_research
+from local_index import get_local_index
+from history import append_bounded, max_reports, max_selections, render_reports, render_selections, report_token_cap
+from typing import Dict, Any, Optional, Tuple
+from payloads import LocalPage, Plan, Report, Review, Route, ScrapeResult, Selection
+from budget import Budget, add_llm_call, start_usage
+from speculation import JsonStringField, await_discarded, get_speculative_searches, speculative_search_enabled
+from speculation import wait_discarded
+from tools import format_results, format_scraped_content, scrape_url, ascrape_url, scrape_urls, ascrape_urls
+import asyncio
 import json
-from termcolor import colored
-from typing import Dict, Any
-from tools import scrape_url
-
-
-def parse_agent_response(agent_name: str, output: Any) -> dict:
-    """Parse the response content based on agent type"""
-    try:
-        # First try to parse the content if it's a string or has content attribute
-        if isinstance(output, str):
-            try:
-                content = json.loads(output)
-            except json.JSONDecodeError:
-                content = output
-        elif hasattr(output, 'content'):
-            try:
-                content = json.loads(output.content)
-            except json.JSONDecodeError:
-                content = output.content
-        else:
-            content = output
-            
-        if agent_name == "PLANNER":
-            return {
-                "search_term": content.get("search_term", "N/A"),
-                "overall_strategy": content.get("overall_strategy", "N/A"),
-                "additional_information": content.get("additional_information", "N/A")
-            }
-        elif agent_name == "SELECTOR":
-            return {
-                "selected_page_url": content.get("selected_page_url", "N/A"),
-                "description": content.get("description", "N/A"),
-                "reason_for_selection": content.get("reason_for_selection", "N/A")
-            }
-        elif agent_name == "SCRAPER":
-            # Handle dictionary with URL, title, and content
-            if isinstance(content, dict):
-                if "error" in content:
-                    return content
-                
-                url = content.get("url", content.get("URL", "N/A"))
-                title = content.get("title", content.get("Title", "N/A"))
-                raw_content = content.get("content", content.get("Content", ""))
-                
-                # Only return if we have actual content
-                if url != "N/A" or title != "N/A" or raw_content:
-                    return {
-                        "url": url,
-                        "title": title,
-                        "content_preview": f"{raw_content[:200]}..." if raw_content else "N/A"
-                    }
-            
-            # If we get here, treat the content as raw text
-            if content and str(content).strip():
-                return {"raw_content": str(content)}
-            
-            return {"error": "No valid content found"}
-        elif agent_name == "REPORTER":
-            # For reporter, just return the raw content without parsing
-            if hasattr(content, 'content'):
-                return {"report": content.content}
-            return {"report": str(content)}
-        else:
-            return content
-    except Exception as e:
-        return {"error": f"Error parsing content: {str(e)}", "raw_content": str(output)}
-
-def format_parsed_content(content: dict) -> str:
-    """Format the parsed content for display"""
-    output_lines = []
-    
-    # Handle error messages first
-    if "error" in content:
-        return colored(f"ERROR: {content['error']}", "red")
-    
-    # Handle reporter content
-    if "report" in content:
-        return str(content["report"])
-    
-    # Handle raw content
-    if "raw_content" in content:
-        output_lines.append("Raw Content:")
-        output_lines.append("-" * 40)
-        output_lines.append(str(content["raw_content"]))
-        output_lines.append("-" * 40)
-        return "\n".join(output_lines)
-    
-    # Handle structured content
-    for key, value in content.items():
-        if value and value != "N/A":  # Only show non-empty and non-N/A values
-            key_formatted = key.replace('_', ' ').title()
-            output_lines.append(f"{key_formatted}:")
-            output_lines.append(f"  {value}")
-            output_lines.append("")
-    
-    return "\n".join(output_lines) if output_lines else colored("No valid content found", "red")
+import os
+from concurrent.futures import Future
+from dataclasses import replace
+
 
 def print_agent_output(agent_name: str, output: Any):
-    """Print agent output with specific colors and formatted content"""
-    colors = {
-        "PLANNER": "blue",
-        "SERPER": "green",
-        "SELECTOR": "magenta",
-        "SCRAPER": "cyan",
-        "REPORTER": "yellow"  # Added unique color for reporter
-    }
-    
-    print("\n" + "="*50)
-    print(colored(f"[{agent_name} AGENT]", colors[agent_name], attrs=['bold']))
-    print(colored("-"*50, colors[agent_name]))
-    
-    if agent_name in ["PLANNER", "SELECTOR", "SCRAPER", "REPORTER"]:
-        parsed_content = parse_agent_response(agent_name, output)
-        formatted_output = format_parsed_content(parsed_content)
-    else:
-        formatted_output = json.dumps(output, indent=2) if isinstance(output, dict) else str(output)
-        
-    print(colored(formatted_output, colors[agent_name]))
-    print(colored("="*50 + "\n", colors[agent_name]))
+    """Hand agent output to the run's output sink; nothing is formatted unless the sink is enabled."""
+    emit(agent_name, output)
 
-def update_state(state: AgentGraph, key: str, value: Any) -> AgentGraph:
-    return {**state, key: value}
+def _feedback(state: AgentGraph) -> str:
+    """The reviewer's latest feedback, or "" before the first review."""
+    review: Optional[Review] = state.get("review")
+    return review.feedback if review else ""
 
-def planner_agent(state: AgentGraph) -> AgentGraph:
+def _planner_messages(state: AgentGraph) -> List[Dict[str, str]]:
     user_query = state.get("research_question")
-    reviewer_responses: List[str] = state.get("reviewer_response", [])
-    feedback = reviewer_responses[-1] if reviewer_responses else ""
+    feedback = _feedback(state)
     
     prompt = planner_prompt_template.format(
         datetime=get_current_time_and_date(),
-        feedback=feedback
+        feedback=feedback,
+        num_queries=search_fanout()
     )
     
-    messages = [
+    return [
         {"role": "system", "content": f"{prompt}"},
         {"role": "user", "content": f"question {user_query}"}
     ]
-    
-    groq = GroqJsonModel()
-    response = groq.invoke(messages)
+
+def planner_agent(state: AgentGraph, config: RunnableConfig = None) -> AgentGraph:
+    groq = GroqJsonModel(name="PLANNER")
+    messages = _planner_messages(state)
+    owner = _search_owner(config)
+    if owner is not None:
+        field = JsonStringField("search_term")
+        response = groq.invoke_streaming(messages, _search_early(owner, field))
+    else:
+        field = None
+        response = groq.invoke(messages)
     print_agent_output("PLANNER", response)
-    return update_state(state, "planner_response", response)
+    state = _record_plan(state, messages, response)
+    wait_discarded(_settle_search(owner, field, state))
+    return state
 
-def serper_tool(state: AgentGraph) -> AgentGraph:
-    planner_response = state.get("planner_response")[-1].content
-    planner_response = json.loads(planner_response)
-    query = planner_response['search_term']
-    serper_response = serpapi_search(query)
-    
+async def aplanner_agent(state: AgentGraph, config: RunnableConfig = None) -> AgentGraph:
+    groq = GroqJsonModel(name="PLANNER")
+    messages = _planner_messages(state)
+    owner = _search_owner(config)
+    if owner is not None:
+        field = JsonStringField("search_term")
+        response = await groq.ainvoke_streaming(messages, _search_early(owner, field))
+    else:
+        field = None
+        response = await groq.ainvoke(messages)
+    print_agent_output("PLANNER", response)
+    state = _record_plan(state, messages, response)
+    await await_discarded(_settle_search(owner, field, state))
+    return state
+
+def _search_owner(config: Optional[RunnableConfig]) -> Optional[str]:
+    """
+    The run the planner's early searches belong to: its checkpoint thread_id.
+
+    None, which turns speculation off, when SPECULATIVE_SEARCH is off or the
+    run has no thread_id to keep its searches apart from other runs'.
+    """
+    if not speculative_search_enabled() or not config:
+        return None
+    return (config.get("configurable") or {}).get("thread_id")
+
+def _search_early(owner: str, field: JsonStringField):
+    """Token callback that starts the search as soon as the streamed plan's `search_term` is complete."""
+    searches = get_speculative_searches()
+
+    def on_token(token: str) -> None:
+        term = field.feed(token)
+        if term:
+            searches.start(owner, term, serpapi_organic_results)
+
+    return on_token
+
+def _settle_search(owner: Optional[str], field: Optional[JsonStringField], state: AgentGraph) -> Optional[Future]:
+    """Throw the early search away if the finished plan searches for something else; returns it if still running."""
+    if field is not None and field.value:
+        return get_speculative_searches().settle(owner, field.value, _search_term(state))
+    return None
+
+def _record_plan(state: AgentGraph, messages, response) -> AgentGraph:
+    """Keep the planner message for context and its decoded fields as a `Plan`."""
+    return {
+        **state,
+        "planner_response": response,
+        "plan": Plan.from_json(parsed_json(response)),
+        "usage": add_llm_call(start_usage(state.get("usage")), messages, response)
+    }
+
+def search_fanout() -> int:
+    """Number of search terms the planner proposes and the search node runs concurrently (SEARCH_FANOUT)."""
+    return max(1, int(os.getenv("SEARCH_FANOUT", "1")))
+
+def _search_term(state: AgentGraph) -> str:
+    # Fall back to the question itself if the planner failed to produce a term.
+    plan: Optional[Plan] = state.get("plan")
+    return (plan and plan.search_term) or state.get("research_question", "")
+
+def _search_terms(state: AgentGraph) -> List[str]:
+    """The primary term followed by up to SEARCH_FANOUT - 1 alternatives from the plan."""
+    plan: Optional[Plan] = state.get("plan")
+    terms = plan.terms(search_fanout()) if plan else []
+    return terms or [_search_term(state)]
+
+def _claim_search(owner: Optional[str], term: str) -> Dict[str, Any]:
+    """The search this run's planner already started for `term`, keyed by term, if any."""
+    future = get_speculative_searches().claim(owner, term) if owner is not None else None
+    return {term: future} if future else {}
+
+def _discard_search(owner: Optional[str], term: str) -> Optional[Future]:
+    """Drop the search this run's planner started for `term`; returns it if it is still running."""
+    return get_speculative_searches().discard(owner, term) if owner is not None else None
+
+def _recall_local(state: AgentGraph, term: str) -> Optional[List[LocalPage]]:
+    """Pages from the local index that answer the question well enough to skip the web search."""
+    index = get_local_index()
+    if index is None:
+        return None
+    pages = index.recall(f"{state.get('research_question', '')} {term}")
+    return pages or None
+
+def _record_search(state: AgentGraph, serper_response: str, local_pages: Optional[List[LocalPage]]) -> AgentGraph:
     print_agent_output("SERPER", serper_response)
-    return update_state(state, "serper_response", serper_response)
+    return {**state, "serper_response": serper_response, "local_pages": local_pages}
 
-def selector_agent(state: AgentGraph) -> AgentGraph:
-    reviewer_responses: List[str] = state.get("reviewer_response", [])
-    feedback = reviewer_responses[-1] if reviewer_responses else ""
+def _local_results(pages: List[LocalPage]) -> str:
+    """Render recalled pages like web results, so the selector picks among them the same way."""
+    return format_results([
+        {"title": page.title, "link": page.url, "snippet": page.chunks[0][:300]}
+        for page in pages
+    ])
+
+def serper_tool(state: AgentGraph, config: RunnableConfig = None) -> AgentGraph:
+    owner = _search_owner(config)
+    terms = _search_terms(state)
+    local_pages = _recall_local(state, terms[0])
+    if local_pages:
+        wait_discarded(_discard_search(owner, terms[0]))
+        return _record_search(state, _local_results(local_pages), local_pages)
+    serper_response = serpapi_fused_search(terms, prefetched=_claim_search(owner, terms[0]))
+    return _record_search(state, serper_response, None)
+
+async def aserper_tool(state: AgentGraph, config: RunnableConfig = None) -> AgentGraph:
+    owner = _search_owner(config)
+    terms = _search_terms(state)
+    # Embedding the query, the index search and its SQLite reads all block; keep them off the loop.
+    local_pages = await asyncio.to_thread(_recall_local, state, terms[0])
+    if local_pages:
+        await await_discarded(_discard_search(owner, terms[0]))
+        return _record_search(state, _local_results(local_pages), local_pages)
+    serper_response = await aserpapi_fused_search(terms, prefetched=_claim_search(owner, terms[0]))
+    return _record_search(state, serper_response, None)
+
+def _selector_messages(state: AgentGraph) -> List[Dict[str, str]]:
+    feedback = _feedback(state)
     research_question = state.get("research_question")
-    serp = state.get("serper_response")[-1]
-    previous_selections = state.get("selector_response", [])
+    serp = state.get("serper_response")[-1].content
+    previous_selections = render_selections(state.get("selection_history", []))
     
     prompt = selector_prompt_template.format(
         serp=serp,
         feedback=feedback,
         previous_selections=previous_selections,
+        num_pages=scraper_fanout(),
         datetime=get_current_time_and_date()
     )
     
-    messages = [
+    return [
         {"role": "system", "content": prompt},
         {"role": "user", "content": f"question {research_question}"}
     ]
-    
-    groq = GroqJsonModel()
+
+def _record_selection(state: AgentGraph, messages, response) -> AgentGraph:
+    """Store the selector response and fold its URLs into the bounded selection history."""
+    selection = Selection.from_json(parsed_json(response))
+    urls = selection.urls(scraper_fanout())
+    return {
+        **state,
+        "selector_response": response,
+        "selection": selection,
+        "usage": add_llm_call(state.get("usage"), messages, response),
+        "selection_history": append_bounded(state.get("selection_history", []), urls, max_selections())
+    }
+
+def selector_agent(state: AgentGraph) -> AgentGraph:
+    groq = GroqJsonModel(name="SELECTOR")
+    messages = _selector_messages(state)
     response = groq.invoke(messages)
     print_agent_output("SELECTOR", response)
-    return update_state(state, "selector_response", response)
+    return _record_selection(state, messages, response)
+
+async def aselector_agent(state: AgentGraph) -> AgentGraph:
+    groq = GroqJsonModel(name="SELECTOR")
+    messages = _selector_messages(state)
+    response = await groq.ainvoke(messages)
+    print_agent_output("SELECTOR", response)
+    return _record_selection(state, messages, response)
+
+
+
+def scraper_fanout() -> int:
+    """Number of ranked pages the selector proposes and the scraper fetches (SCRAPER_FANOUT)."""
+    return max(1, int(os.getenv("SCRAPER_FANOUT", "1")))
 
+def _urls_to_scrape(state: AgentGraph) -> Tuple[List[str], Optional[str]]:
+    """Return the ranked URLs picked by the selector, or an error if there are none."""
+    selection: Optional[Selection] = state.get('selection')
+    if selection is None:
+        return [], 'No selector response found'
 
+    urls = selection.urls(scraper_fanout())
+    if not urls:
+        return [], selection.error or 'No URL found in the last selector response'
+    return urls, None
+
+def _record_scrape(state: AgentGraph, urls: List[str], scraped_content: Any, error: str = None) -> AgentGraph:
+    """Store the scraped text; a single failed `scrape_url` (an error dict) is rendered like a page."""
+    if isinstance(scraped_content, dict):
+        error = scraped_content.get('content')
+        scraped_content = format_scraped_content([scraped_content])
+    return {
+        **state,
+        "scraper_response": scraped_content,
+        "scrape": ScrapeResult(urls=urls, text=scraped_content, error=error)
+    }
+
+def _split_local(state: AgentGraph, urls: List[str]) -> Tuple[List[str], List[str]]:
+    """Pages for `urls` recalled from the local index, and the URLs that still have to be fetched."""
+    local = {page.url: page for page in state.get("local_pages") or []}
+    pages = [
+        format_scraped_content([{
+            'url': url,
+            'title': local[url].title,
+            'content': "\n".join(local[url].chunks),
+            'status': 'success'
+        }])
+        for url in urls if url in local
+    ]
+    return pages, [url for url in urls if url not in local]
+
+def _with_local(local_pages: List[str], scraped_content: Any) -> Any:
+    # A failed live fetch (an error dict) is dropped when recalled pages can stand in for it.
+    if not local_pages:
+        return scraped_content
+    if isinstance(scraped_content, str):
+        local_pages = [*local_pages, scraped_content]
+    return PAGE_SEPARATOR.join(local_pages)
 
 def scraper_agent(state: AgentGraph) -> AgentGraph:
 
-    selector_responses = state.get('selector_response', [])
-    if not selector_responses:
-        error_response = {'error': 'No selector response found'}
-        print_agent_output("SCRAPER", error_response)
-        return {**state, 'scraper_response': [error_response]}
+    urls_to_scrape, error = _urls_to_scrape(state)
+    if error:
+        print_agent_output("SCRAPER", {'error': error})
+        return _record_scrape(state, [], f"Failed to scrape: {error}", error)
 
-    last_selector_response = selector_responses[-1].content
-    last_selector_response = json.loads(last_selector_response)
-    url_to_scrape = last_selector_response.get('selected_page_url')
-    
-    
-    if not url_to_scrape:
-        error_response = {'error': 'No URL found in the last selector response'}
-        print_agent_output("SCRAPER", error_response)
-        return {**state, 'scraper_response': [error_response]}
-        
-    # Scrape the URL
-    scraped_content = scrape_url(url_to_scrape)
-    # print("Scraper agent :",scraped_content,sep="\n")
+    local_pages, urls_to_fetch = _split_local(state, urls_to_scrape)
+    scraped_content = None
+    # Scrape the URL, or fan out over the ranked URLs
+    if len(urls_to_fetch) == 1:
+        scraped_content = scrape_url(urls_to_fetch[0])
+    elif urls_to_fetch:
+        scraped_content = scrape_urls(urls_to_fetch)
+    index = get_local_index()
+    if index is not None and isinstance(scraped_content, str):
+        index.add_scraped(scraped_content)
+    scraped_content = _with_local(local_pages, scraped_content)
     print_agent_output("SCRAPER", scraped_content)
     
-    return update_state(state, "scraper_response", scraped_content)
+    return _record_scrape(state, urls_to_scrape, scraped_content)
+
+async def ascraper_agent(state: AgentGraph) -> AgentGraph:
+
+    urls_to_scrape, error = _urls_to_scrape(state)
+    if error:
+        print_agent_output("SCRAPER", {'error': error})
+        return _record_scrape(state, [], f"Failed to scrape: {error}", error)
+
+    local_pages, urls_to_fetch = _split_local(state, urls_to_scrape)
+    scraped_content = None
+    if len(urls_to_fetch) == 1:
+        scraped_content = await ascrape_url(urls_to_fetch[0])
+    elif urls_to_fetch:
+        scraped_content = await ascrape_urls(urls_to_fetch)
+    index = get_local_index()
+    if index is not None and isinstance(scraped_content, str):
+        await asyncio.to_thread(index.add_scraped, scraped_content)
+    scraped_content = _with_local(local_pages, scraped_content)
+    print_agent_output("SCRAPER", scraped_content)
+
+    return _record_scrape(state, urls_to_scrape, scraped_content)
 
 
-def reporter_agent(state: AgentGraph) -> AgentGraph:
-    scraper_responses = state.get('scraper_response', [])
-    if not scraper_responses:
+def reporter_token_budget() -> int:
+    """Token budget for the research placed in the reporter prompt (REPORTER_RESEARCH_TOKENS)."""
+    return int(os.getenv("REPORTER_RESEARCH_TOKENS", "6000"))
+
+def content_reducer(state: AgentGraph) -> AgentGraph:
+    """Rank the scraped content against the question and keep the best chunks within budget."""
+    scrape: Optional[ScrapeResult] = state.get('scrape')
+    if scrape is None:
         raise ValueError("Scraper response is empty. Cannot proceed with Reporter agent.")
-    else:
-        research = scraper_responses[-1].content
-    reviewer_responses: List[str] = state.get("reviewer_response", [])
-    feedback = reviewer_responses[-1] if reviewer_responses else ""
+    reduction = reduce_research(
+        state.get("research_question", ""),
+        scrape.text,
+        reporter_token_budget()
+    )
+    print_agent_output("REDUCER", {
+        "original_tokens": reduction.original_tokens,
+        "reduced_tokens": reduction.reduced_tokens,
+        "tokens_saved": reduction.tokens_saved
+    })
+    return {
+        **state,
+        "research_context": reduction.text,
+        "research_tokens_saved": reduction.tokens_saved
+    }
+
+def _reporter_messages(state: AgentGraph) -> List[Dict[str, str]]:
+    research = state.get("research_context")
+    if not research:
+        scrape: Optional[ScrapeResult] = state.get('scrape')
+        if scrape is None:
+            raise ValueError("Scraper response is empty. Cannot proceed with Reporter agent.")
+        research = scrape.text
+    feedback = _feedback(state)
     research_question = state.get("research_question")
-    reporter_responses = state.get("reporter_response", [])
-    previous_reports = "".join([json.loads(report.content) for report in reporter_responses]) if reporter_responses else ""
+    previous_reports = render_reports(state.get("report_history", []), report_token_cap())
     prompt = reporter_prompt_template.format(
         research=research,
         feedback=feedback,
         previous_reports=previous_reports,
         datetime=get_current_time_and_date()
     )
-    print("Reporter prompt : ",prompt,sep="\n")
-    messages = [
-        {"role": "system", "content": f"""{prompt}"""},
+    debug("REPORTER", "prompt", lambda: prompt)
+    return [
+        {"role": "system", "content": prompt},
         {"role": "user", "content": f"question {research_question}"}
     ]
-    print("Reporter messages : ",messages,sep="\n")
-    groq = GroqModel()
-    response = groq.invoke(messages)
+
+def reporter_streaming() -> bool:
+    """Whether the reporter streams tokens (REPORTER_STREAMING, on by default)."""
+    return os.getenv("REPORTER_STREAMING", "1") != "0"
+
+def _record_report(state: AgentGraph, messages, response) -> AgentGraph:
+    """Store the report and keep the last few as plain text for the next reporter prompt."""
+    error = response.additional_kwargs.get("parsed", {}).get("error")
+    report = Report(text=str(response.content), error=error)
+    return {
+        **state,
+        "reporter_response": response,
+        "report": report,
+        "usage": add_llm_call(state.get("usage"), messages, response),
+        "report_history": append_bounded(
+            state.get("report_history", []), [] if error else [report.text], max_reports()
+        )
+    }
+
+def reporter_agent(state: AgentGraph, config: RunnableConfig = None) -> AgentGraph:
+    groq = GroqModel(streaming=reporter_streaming(), name="REPORTER")
+    messages = _reporter_messages(state)
+    response = groq.invoke(messages, config=config)
     print_agent_output("REPORTER", response)
-    return update_state(state, "reporter_response", response)
+    return _record_report(state, messages, response)
+
+async def areporter_agent(state: AgentGraph, config: RunnableConfig = None) -> AgentGraph:
+    groq = GroqModel(streaming=reporter_streaming(), name="REPORTER")
+    messages = _reporter_messages(state)
+    response = await groq.ainvoke(messages, config=config)
+    print_agent_output("REPORTER", response)
+    return _record_report(state, messages, response)
+
+
+def _state_digest(state: AgentGraph) -> str:
+    """A few lines on what the earlier agents did, instead of the whole state, for the reviewer prompt."""
+    plan: Optional[Plan] = state.get("plan")
+    selection: Optional[Selection] = state.get("selection")
+    scrape: Optional[ScrapeResult] = state.get("scrape")
+    lines = [
+        f"planner search term: {plan.search_term if plan else 'N/A'}",
+        f"planner strategy: {plan.overall_strategy if plan else 'N/A'}",
+        f"selected pages: {', '.join(selection.urls(scraper_fanout())) if selection else 'N/A'}",
+        f"scraper: {scrape.error or 'ok'}" if scrape else "scraper: N/A",
+        f"pages reviewed so far: {len(state.get('selection_history', []))}",
+    ]
+    return "\n".join(lines)
+
+def _reviewer_messages(state: AgentGraph) -> List[Dict[str, str]]:
+    report: Optional[Report] = state.get("report")
+    prompt = reviewer_prompt_template.format(
+        reporter=report.text if report else "",
+        feedback=_feedback(state),
+        datetime=get_current_time_and_date(),
+        state=_state_digest(state)
+    )
+    return [
+        {"role": "system", "content": prompt},
+        {"role": "user", "content": f"question {state.get('research_question')}"}
+    ]
+
+def _record_review(state: AgentGraph, messages, response) -> AgentGraph:
+    """One review closes one research iteration."""
+    usage = add_llm_call(state.get("usage"), messages, response)
+    return {
+        **state,
+        "reviewer_response": response,
+        "review": Review.from_json(parsed_json(response)),
+        "usage": replace(usage, iterations=usage.iterations + 1)
+    }
+
+def reviewer_agent(state: AgentGraph) -> AgentGraph:
+    groq = GroqJsonModel(name="REVIEWER")
+    messages = _reviewer_messages(state)
+    response = groq.invoke(messages)
+    print_agent_output("REVIEWER", response)
+    return _record_review(state, messages, response)
+
+async def areviewer_agent(state: AgentGraph) -> AgentGraph:
+    groq = GroqJsonModel(name="REVIEWER")
+    messages = _reviewer_messages(state)
+    response = await groq.ainvoke(messages)
+    print_agent_output("REVIEWER", response)
+    return _record_review(state, messages, response)
+
+
+def _forced_route(state: AgentGraph) -> Optional[Route]:
+    """Finish without asking the router when the review passed or the run budget is spent."""
+    review: Optional[Review] = state.get("review")
+    if review is not None and review.pass_review:
+        return Route("final_report", reason="pass_review")
+    exhausted = Budget.from_env().exhausted(state.get("usage"))
+    if exhausted:
+        return Route("final_report", reason=f"budget: {exhausted}")
+    return None
+
+def _router_messages(state: AgentGraph) -> List[Dict[str, str]]:
+    review: Optional[Review] = state.get("review")
+    feedback = json.dumps({
+        "feedback": review.feedback,
+        "pass_review": review.pass_review,
+        "comprehensive": review.comprehensive,
+        "citations_provided": review.citations_provided,
+        "relevant_to_research_question": review.relevant_to_research_question
+    }) if review else ""
+    return [
+        {"role": "system", "content": router_prompt_template.format(feedback=feedback)},
+        {"role": "user", "content": f"question {state.get('research_question')}"}
+    ]
+
+def _record_route(state: AgentGraph, route: Route, messages=None, response=None) -> AgentGraph:
+    updates = {"route": route}
+    if response is not None:
+        updates["router_response"] = response
+        updates["usage"] = add_llm_call(state.get("usage"), messages, response)
+    return {**state, **updates}
+
+def router_agent(state: AgentGraph) -> AgentGraph:
+    route = _forced_route(state)
+    if route:
+        print_agent_output("ROUTER", {"next_agent": route.next_agent, "reason": route.reason})
+        return _record_route(state, route)
+    groq = GroqJsonModel(name="ROUTER")
+    messages = _router_messages(state)
+    response = groq.invoke(messages)
+    print_agent_output("ROUTER", response)
+    return _record_route(state, Route.from_json(parsed_json(response)), messages, response)
+
+async def arouter_agent(state: AgentGraph) -> AgentGraph:
+    route = _forced_route(state)
+    if route:
+        print_agent_output("ROUTER", {"next_agent": route.next_agent, "reason": route.reason})
+        return _record_route(state, route)
+    groq = GroqJsonModel(name="ROUTER")
+    messages = _router_messages(state)
+    response = await groq.ainvoke(messages)
+    print_agent_output("ROUTER", response)
+    return _record_route(state, Route.from_json(parsed_json(response)), messages, response)
+
+def next_agent(state: AgentGraph) -> str:
+    """Conditional-edge function: the route the router picked."""
+    route: Optional[Route] = state.get("route")
+    return route.next_agent if route else "final_report"
 
+def final_report(state: AgentGraph) -> AgentGraph:
+    """Publish the last report; the run ends here."""
+    reports = state.get("reporter_response", [])
+    return {**state, "final_reports": reports[-1:]}
@@ -0,0 +1,222 @@
+"""
+Batch research mode: run many questions through the compiled graph concurrently.
+
+    python batch.py --input questions.jsonl --output reports.jsonl --concurrency 8
+    cat questions.jsonl | python batch.py --output reports.jsonl --executor process
+
+Each input line is either a JSON object with a "question" (and optional "id")
+or a bare question string. With CHECKPOINT_PATH set, an object may also carry
+the "thread_id" of an earlier result to resume that run; every other question
+starts on a new thread. One JSON line per question is appended to the
+output as soon as its run finishes, and a throughput/latency summary is
+printed to stderr at the end.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import instrumentation
+import output
+from completion_cache import get_completion_cache
+from config import load_env
+from rate_limit import SERVICE_LIMITS
+from speculation import get_speculative_searches, speculative_search_enabled
+
+
+def read_questions(stream) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one question item per non-blank line of `stream`.
+
+    Raises:
+        ValueError: If a line is JSON but neither an object nor a string, or an
+            object without a "question".
+    """
+    for index, line in enumerate(stream):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            item = line
+        if isinstance(item, str):
+            item = {"question": item}
+        if not isinstance(item, dict) or "question" not in item:
+            raise ValueError(
+                f"line {index + 1}: expected a question string or an object with a \"question\", "
+                f"got {line[:80]!r}"
+            )
+        item.setdefault("id", index)
+        yield item
+
+
+def run_question(
+    item: Dict[str, Any],
+    recursion_limit: int = 50,
+    sink: str = "null",
+    on_update: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Run one research question through `graph.get_graph()` and time each node.
+
+    Agent output goes to the `output` sink named by `sink` (null by default).
+    `on_update(node, values)` is called after every node, e.g. to report progress.
+
+    The run gets a new checkpoint thread unless `item` names one in "thread_id",
+    which resumes that thread.
+
+    Returns:
+        Dict[str, Any]: id, thread_id, question, report, latency, per-stage seconds, the run's
+            usage (iterations, tokens, cost), the instrumentation summary and any error.
+    """
+    from graph import get_graph, new_thread_id, research_input
+
+    question = item.get("question") or item.get("research_question")
+    thread_id = item.get("thread_id") or new_thread_id("batch")
+    stage_times: Dict[str, float] = defaultdict(float)
+    report = None
+    usage = None
+    error = None
+    start = last = time.perf_counter()
+    with instrumentation.run_context(str(item["id"])) as run, output.use_sink(sink):
+        try:
+            graph = get_graph()
+            config = {"recursion_limit": recursion_limit, "configurable": {"thread_id": thread_id}}
+            for update in graph.stream(
+                research_input(graph, question, config),
+                config,
+                stream_mode="updates",
+            ):
+                now = time.perf_counter()
+                for node, values in update.items():
+                    stage_times[node] += now - last
+                    if node == "reporter_agent" and values and values.get("report"):
+                        report = values["report"].text
+                    if values and values.get("usage"):
+                        usage = values["usage"]
+                    if on_update is not None:
+                        on_update(node, values or {})
+                last = now
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            if speculative_search_enabled():
+                # Settle any early search the planner started that the run never claimed.
+                get_speculative_searches().release(thread_id)
+
+    return {
+        "id": item["id"],
+        "thread_id": thread_id,
+        "question": question,
+        "report": report,
+        "error": error,
+        "latency": time.perf_counter() - start,
+        "stage_times": dict(stage_times),
+        "usage": usage.as_dict() if usage else None,
+        "instrumentation": run.summary(),
+    }
+
+
+def _init_process_worker(concurrency: int, trace: str = None) -> None:
+    if trace:
+        instrumentation.add_sink(instrumentation.JsonlSink(trace))
+    # Each process has its own limiter, so split the global budget between them.
+    for budgets in SERVICE_LIMITS.values():
+        for env, default in budgets.values():
+            os.environ[env] = str(float(os.getenv(env, default)) / concurrency)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float) -> str:
+    if not results:
+        return "no questions processed"
+    latencies = [result["latency"] for result in results]
+    failures = sum(1 for result in results if result["error"])
+    stages: Dict[str, List[float]] = defaultdict(list)
+    for result in results:
+        for stage, seconds in result["stage_times"].items():
+            stages[stage].append(seconds)
+
+    lines = [
+        f"questions: {len(results)} ({failures} failed) in {elapsed:.1f}s",
+        f"throughput: {len(results) / elapsed * 60:.1f} questions/min",
+        f"latency: p50={percentile(latencies, 50):.2f}s p95={percentile(latencies, 95):.2f}s",
+    ]
+    usages = [result["usage"] for result in results if result.get("usage")]
+    if usages:
+        lines.append(
+            f"usage: iterations mean={statistics.mean(u['iterations'] for u in usages):.1f} "
+            f"tokens={sum(u['prompt_tokens'] + u['completion_tokens'] for u in usages)} "
+            f"cost=${sum(u['cost'] for u in usages):.4f}"
+        )
+    lines.append("per-stage time (mean / total):")
+    for stage, samples in stages.items():
+        lines.append(f"  {stage:<16} {statistics.mean(samples):7.2f}s / {sum(samples):8.1f}s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run research questions through the graph in batch.")
+    parser.add_argument("--input", help="JSONL file of questions (defaults to stdin)")
+    parser.add_argument("--output", required=True, help="JSONL file to append results to")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    parser.add_argument("--recursion-limit", type=int, default=50)
+    parser.add_argument("--sink", choices=sorted(output.SINKS), default="null", help="where agent output goes")
+    parser.add_argument("--trace", help="JSONL file to append instrumentation events to")
+    args = parser.parse_args(argv)
+    load_env()
+
+    source = open(args.input, encoding="utf-8") if args.input else sys.stdin
+    with source:
+        try:
+            items = list(read_questions(source))
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.executor == "process":
+        executor = ProcessPoolExecutor(
+            max_workers=args.concurrency,
+            initializer=_init_process_worker,
+            initargs=(args.concurrency, args.trace),
+        )
+    else:
+        if args.trace:
+            instrumentation.add_sink(instrumentation.JsonlSink(args.trace))
+        executor = ThreadPoolExecutor(max_workers=args.concurrency)
+
+    results = []
+    start = time.perf_counter()
+    with executor, open(args.output, "a", encoding="utf-8") as out:
+        futures = [executor.submit(run_question, item, args.recursion_limit, args.sink) for item in items]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+
+    print(summarize(results, time.perf_counter() - start), file=sys.stderr)
+    cache = get_completion_cache()
+    # Process workers keep their own counters, so only thread mode can report them here.
+    if cache is not None and args.executor == "thread":
+        for agent, stats in sorted(cache.stats().items()):
+            print(
+                f"completion cache {agent:<9} hit_rate={stats['hit_rate']:.1%} "
+                f"saved={stats['saved_ms'] / 1000:.1f}s",
+                file=sys.stderr,
+            )
+
+
+if __name__ == "__main__":
+    main()
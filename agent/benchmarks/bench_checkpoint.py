@@ -0,0 +1,87 @@
+"""
+Per-node overhead and storage cost of the SQLite checkpointer.
+
+Runs the full graph `--runs` times against local stubs (Groq, SerpAPI and
+HTML pages), first without a checkpointer and then with
+`SqliteCheckpointSaver`, and reports the added time per node, the bytes
+stored per run and how that compares with storing every snapshot whole.
+
+    python benchmarks/bench_checkpoint.py --runs 20 --paragraphs 400
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The stubs have no quota; do not throttle against them.
+os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("SERPAPI_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("SERPAPI_API_KEY", "benchmark")
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("AGENT_OUTPUT", "null")
+os.environ["REPORTER_STREAMING"] = "0"
+os.environ["SCRAPE_CACHE_PATH"] = ""
+
+from stubs import FakeGoogleSearch, GroqPipelineStubHandler, HtmlFixtureHandler, serve  # noqa: E402
+
+# planner .. reporter, reviewer, router, final_report: the stub review passes first time.
+NODES = 9
+
+
+def run_graph(compiled, runs: int, prefix: str):
+    latencies = []
+    for i in range(runs):
+        config = {"recursion_limit": 50, "configurable": {"thread_id": f"{prefix}-{i}"}}
+        start = time.perf_counter()
+        final = compiled.invoke({"research_question": f"what is a large language model {i}"}, config)
+        latencies.append(time.perf_counter() - start)
+        assert final["report"] and not final["report"].error, final.get("report")
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--paragraphs", type=int, default=400, help="size of each scraped fixture page")
+    args = parser.parse_args()
+
+    HtmlFixtureHandler.paragraphs = args.paragraphs
+    FakeGoogleSearch.latency = 0.0
+    with serve(HtmlFixtureHandler) as pages, serve(GroqPipelineStubHandler) as groq:
+        GroqPipelineStubHandler.page_url = f"{pages.url}/page/1"
+        os.environ["GROQ_CHAT_URL"] = f"{groq.url}/openai/v1/chat/completions"
+
+        import tools
+        from checkpointer import SqliteCheckpointSaver
+        from graph import build_workflow
+
+        tools.GoogleSearch = FakeGoogleSearch
+        workflow = build_workflow()
+
+        plain = run_graph(workflow.compile(), args.runs, "plain")
+        with tempfile.TemporaryDirectory() as tmp:
+            saver = SqliteCheckpointSaver(os.path.join(tmp, "checkpoints.sqlite3"))
+            checkpointed = run_graph(workflow.compile(checkpointer=saver), args.runs, "ckpt")
+
+            stats = saver.stats()
+            whole = sum(
+                len(saver.serde.dumps_typed(item.checkpoint["channel_values"])[1])
+                for item in saver.list(None)
+            )
+
+    overhead = statistics.mean(checkpointed) - statistics.mean(plain)
+    print(f"no checkpointer   mean={statistics.mean(plain) * 1000:8.2f}ms/run")
+    print(f"sqlite checkpoint mean={statistics.mean(checkpointed) * 1000:8.2f}ms/run")
+    print(f"overhead          {overhead * 1000 / NODES:8.2f}ms/node")
+    print(
+        f"storage           {stats['stored_bytes'] / args.runs / 1024:8.1f}KB/run stored "
+        f"vs {whole / args.runs / 1024:8.1f}KB/run as whole snapshots "
+        f"({stats['checkpoints']} checkpoints, {stats['blobs']} blobs)"
+    )
+
+
+if __name__ == "__main__":
+    main()
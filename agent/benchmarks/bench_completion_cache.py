@@ -0,0 +1,104 @@
+"""
+Hit rate and latency saved by the completion cache, per agent.
+
+Runs the full graph over a question workload against local stubs, first with
+no cache and then with each store (in-memory LRU, SQLite). The workload asks
+`--unique` questions `--repeats` times each; every repeat after the first is
+either the same text or a reworded near-duplicate (case, punctuation, extra
+words), so exact keys and `--similarity` lookups both get exercised.
+
+    python benchmarks/bench_completion_cache.py --unique 5 --repeats 3 --similarity 0.8
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The stubs have no quota; do not throttle against them.
+os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("SERPAPI_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("SERPAPI_API_KEY", "benchmark")
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("AGENT_OUTPUT", "null")
+os.environ["REPORTER_STREAMING"] = "0"
+os.environ["SCRAPE_CACHE_PATH"] = ""
+
+from stubs import FakeGoogleSearch, GroqPipelineStubHandler, HtmlFixtureHandler, serve  # noqa: E402
+
+TOPICS = [
+    "large language models", "retrieval augmented generation", "vector databases",
+    "speculative decoding", "mixture of experts", "quantization of neural networks",
+    "transformer attention", "reinforcement learning from human feedback",
+]
+
+
+def workload(unique: int, repeats: int):
+    questions = []
+    for topic in TOPICS[:unique]:
+        base = f"What are {topic} and how are they used"
+        variants = [base, base, f"{base.lower()}?", f"What are {topic} and how are they used today"]
+        questions.extend(variants[i % len(variants)] for i in range(repeats))
+    return questions
+
+
+def run_graph(compiled, questions):
+    latencies = []
+    for question in questions:
+        start = time.perf_counter()
+        final = compiled.invoke({"research_question": question}, {"recursion_limit": 50})
+        latencies.append(time.perf_counter() - start)
+        assert final["report"] and not final["report"].error, final.get("report")
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--unique", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub seconds per completion")
+    parser.add_argument("--similarity", type=float, default=0.8, help="0 for exact matches only")
+    args = parser.parse_args()
+
+    questions = workload(args.unique, args.repeats)
+    GroqPipelineStubHandler.latency = args.latency
+    FakeGoogleSearch.latency = 0.0
+    with serve(HtmlFixtureHandler) as pages, serve(GroqPipelineStubHandler) as groq:
+        GroqPipelineStubHandler.page_url = f"{pages.url}/page/1"
+        os.environ["GROQ_CHAT_URL"] = f"{groq.url}/openai/v1/chat/completions"
+
+        import completion_cache
+        import tools
+        from completion_cache import CompletionCache, MemoryCompletionStore, SqliteCompletionStore
+        from graph import build_workflow
+
+        tools.GoogleSearch = FakeGoogleSearch
+        compiled = build_workflow().compile()
+
+        completion_cache._cache = None
+        baseline = run_graph(compiled, questions)
+        print(f"{'no cache':<8} mean={statistics.mean(baseline) * 1000:8.1f}ms/run  ({len(questions)} runs)")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            stores = {
+                "memory": MemoryCompletionStore(),
+                "sqlite": SqliteCompletionStore(os.path.join(tmp, "completions.sqlite3")),
+            }
+            for name, store in stores.items():
+                cache = completion_cache._cache = CompletionCache(store, similarity=args.similarity)
+                cached = run_graph(compiled, questions)
+                saved = statistics.mean(baseline) - statistics.mean(cached)
+                print(f"{name:<8} mean={statistics.mean(cached) * 1000:8.1f}ms/run  saved {saved * 1000:.1f}ms/run")
+                for agent, stats in sorted(cache.stats().items()):
+                    print(
+                        f"  {agent:<9} hit_rate={stats['hit_rate']:5.1%} "
+                        f"(exact {stats['hits']}, near {stats['near_hits']}, miss {stats['misses']}) "
+                        f"saved {stats['saved_ms']:8.1f}ms"
+                    )
+        completion_cache._cache = None
+
+
+if __name__ == "__main__":
+    main()
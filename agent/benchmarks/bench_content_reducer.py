@@ -0,0 +1,87 @@
+"""
+Reporter prompt size and latency with and without the content reducer.
+
+The corpus pages are inflated with `--scale` to the size of long real pages,
+formatted like scraper output, reduced to `--budget` tokens, and sent to a
+local Groq stub whose latency grows with the request size.
+
+    python benchmarks/bench_content_reducer.py --scale 20 --budget 6000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The stub has no quota; do not throttle against it.
+os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "0")
+
+from bench_extractors import load_corpus  # noqa: E402
+from content_reducer import reduce_research  # noqa: E402
+from extractors import get_extractor  # noqa: E402
+from groq_model import GroqModel  # noqa: E402
+from llm_backend import OpenAICompatibleBackend  # noqa: E402
+from prompts import reporter_prompt_template  # noqa: E402
+from stubs import GroqStubHandler, serve  # noqa: E402
+from tools import format_scraped_content  # noqa: E402
+from utils import estimate_tokens  # noqa: E402
+
+
+QUESTION = "how are large language models trained and what are their limitations"
+
+
+def reporter_messages(research: str):
+    prompt = reporter_prompt_template.format(
+        research=research, feedback="", previous_reports="", datetime="2024-10-22 12:00:00"
+    )
+    return [
+        {"role": "system", "content": prompt},
+        {"role": "user", "content": f"question {QUESTION}"},
+    ]
+
+
+def timed_invoke(model: GroqModel, research: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model.invoke(reporter_messages(research))
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=6000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seconds-per-kb", type=float, default=0.002)
+    args = parser.parse_args()
+
+    extractor = get_extractor()
+    entries = []
+    for i, html in enumerate(load_corpus(args.scale)):
+        title, content = extractor.extract(html)
+        entries.append({"url": f"https://example.com/{i}", "title": title, "content": content, "status": "success"})
+    research = format_scraped_content(entries)
+
+    start = time.perf_counter()
+    reduction = reduce_research(QUESTION, research, args.budget)
+    reduce_seconds = time.perf_counter() - start
+
+    full_prompt = estimate_tokens(reporter_messages(research)[0]["content"])
+    reduced_prompt = estimate_tokens(reporter_messages(reduction.text)[0]["content"])
+    print(f"research tokens: {reduction.original_tokens} -> {reduction.reduced_tokens} "
+          f"(saved {reduction.tokens_saved}, reduce took {reduce_seconds * 1000:.1f}ms)")
+    print(f"prompt tokens:   {full_prompt} -> {reduced_prompt}")
+
+    GroqStubHandler.seconds_per_kb = args.seconds_per_kb
+    with serve(GroqStubHandler) as server:
+        model = GroqModel(backend=OpenAICompatibleBackend(f"{server.url}/openai/v1/chat/completions"))
+        full = timed_invoke(model, research, args.runs)
+        reduced = timed_invoke(model, reduction.text, args.runs)
+    print(f"reporter call:   {full * 1000:.1f}ms -> {(reduced + reduce_seconds) * 1000:.1f}ms (including reduction)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Pages/sec and peak RSS for each HTML extractor over the saved corpus.
+
+Each extractor runs in its own subprocess so that peak RSS is not shared
+between them. `--scale` repeats each page body to emulate very large pages.
+
+    python benchmarks/bench_extractors.py --seconds 3 --scale 20
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import extractors  # noqa: E402
+
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def load_corpus(scale: int):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(CORPUS, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        if scale > 1:
+            start = html.index(">", html.index("<body")) + 1
+            end = html.rindex("</body>")
+            html = html[:start] + html[start:end] * scale + html[end:]
+        pages.append(html)
+    return pages
+
+
+def worker(name: str, seconds: float, scale: int):
+    extractor = extractors.get_extractor(name)
+    pages = load_corpus(scale)
+    total_bytes = sum(len(page) for page in pages)
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for page in pages:
+            extractor.extract(page)
+        count += len(pages)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "extractor": name,
+        "pages_per_sec": count / elapsed,
+        "mb_per_sec": count / len(pages) * total_bytes / elapsed / 1e6,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--extractors", nargs="+", default=list(extractors.EXTRACTORS))
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.seconds, args.scale)
+        return
+
+    pages = load_corpus(args.scale)
+    print(f"corpus: {len(pages)} pages, {sum(map(len, pages)) / 1024:.0f} KiB (scale={args.scale})")
+    for name in args.extractors:
+        result = subprocess.run(
+            [sys.executable, __file__, "--worker", name,
+             "--seconds", str(args.seconds), "--scale", str(args.scale)],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            print(f"{name:<8} failed: {result.stderr.strip().splitlines()[-1]}")
+            continue
+        row = json.loads(result.stdout)
+        print(
+            f"{name:<8} {row['pages_per_sec']:10.1f} pages/s "
+            f"{row['mb_per_sec']:8.2f} MB/s  peak_rss={row['peak_rss_mb']:7.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Offline load test of the whole graph on the fake LLM backend.
+
+Every agent runs on `llm_backend.FakeBackend`, searches go to the fake
+SerpAPI and pages come from a local fixture server, so nothing leaves the
+host. `--questions` questions run at each of `--concurrency` levels through
+`batch.run_question`, once with every agent on the `--large` profile and once
+routed the way the per-agent settings allow: planner, selector, reviewer and
+router on `--small`, the reporter on `--large`. Profiles are FAKE_PROFILES
+names or "first_token=0.2,tokens_per_second=100".
+
+    python benchmarks/bench_fake_backend.py --questions 32 --concurrency 1,8,32 --large large --small small
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The fakes have no quota; do not throttle against them.
+os.environ.setdefault("SERPAPI_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("SERPAPI_API_KEY", "benchmark")
+os.environ.setdefault("AGENT_OUTPUT", "null")
+os.environ["SCRAPE_CACHE_PATH"] = ""
+
+from stubs import FakeGoogleSearch, HtmlFixtureHandler, serve  # noqa: E402
+
+AGENTS = ("PLANNER", "SELECTOR", "REPORTER", "REVIEWER", "ROUTER")
+
+
+def route(large: str, small: str) -> None:
+    for agent in AGENTS:
+        profile = large if agent == "REPORTER" else small
+        os.environ[f"LLM_BACKEND_{agent}"] = f"fake:{profile}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=32)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--large", default="large", help="profile of the large model")
+    parser.add_argument("--small", default="small", help="profile of the small model")
+    parser.add_argument("--search-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    FakeGoogleSearch.latency = args.search_latency
+    with serve(HtmlFixtureHandler) as pages:
+        FakeGoogleSearch.base_url = f"{pages.url}/page"
+
+        import batch
+        import tools
+
+        tools.GoogleSearch = FakeGoogleSearch
+        configurations = {
+            f"all {args.large}": (args.large, args.large),
+            f"{args.small} + {args.large} reporter": (args.large, args.small),
+        }
+        for label, (large, small) in configurations.items():
+            route(large, small)
+            for concurrency in (int(value) for value in args.concurrency.split(",")):
+                items = [{"id": f"{label}-{concurrency}-{i}", "question": f"what is a large language model {i}"}
+                         for i in range(args.questions)]
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    results = list(executor.map(batch.run_question, items))
+                elapsed = time.perf_counter() - start
+                failures = [result for result in results if result["error"] or not result["report"]]
+                latencies = [result["latency"] for result in results]
+                print(
+                    f"{label:<26} concurrency={concurrency:<3} "
+                    f"throughput={len(results) / elapsed * 60:7.1f} questions/min  "
+                    f"p50={batch.percentile(latencies, 50):6.2f}s p95={batch.percentile(latencies, 95):6.2f}s  "
+                    f"failed={len(failures)}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+End-to-end benchmark of the compiled graph, replayed offline from recorded fixtures.
+
+Replays a fixture set (see `replay.py`) through `graph.get_graph()` with no network
+access and reports, per node, mean latency, peak allocation (tracemalloc,
+measured on a separate single-threaded pass) and prompt tokens, then
+end-to-end throughput and p50/p95 latency at each of `--concurrency` levels.
+The results are compared with the fixture set's baseline.json; a node or a
+throughput figure that is more than `--tolerance` worse is flagged and the
+exit status is 1. `--save-baseline` replaces the baseline with this run.
+
+`--speed` replays each recorded call with its recorded latency times the
+factor (0, the default, replays instantly and measures only our own code).
+
+Record a new fixture set from a live run (needs GROQ_API_KEY and
+SERPAPI_API_KEY) or, with `--source stubs`, from the fake LLM backend, the
+fake SerpAPI and the local fixture pages:
+
+    python benchmarks/bench_graph_replay.py --record --questions "what is an LLM" "what is RAG"
+    python benchmarks/bench_graph_replay.py --concurrency 1,4,16 --repeat 8
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("AGENT_OUTPUT", "null")
+# Replays must see every call: no caches, no checkpoints, no early searches.
+for name in ("SCRAPE_CACHE_PATH", "LOCAL_INDEX_PATH", "COMPLETION_CACHE", "CHECKPOINT_PATH"):
+    os.environ[name] = ""
+os.environ["SERPAPI_CACHE_TTL"] = "0"
+os.environ["SPECULATIVE_SEARCH"] = "0"
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "default")
+DEFAULT_QUESTIONS = [
+    "What is a large language model?",
+    "How does retrieval augmented generation work?",
+    "What is speculative decoding?",
+    "How are mixture of experts models trained?",
+]
+
+
+def run_one(compiled, question: str, run_id: str, trace_allocations: bool = False):
+    """Run one question; returns (seconds, per-node samples) with each sample {"ms", "prompt_tokens", "alloc_kib"}."""
+    from graph import research_input
+
+    config = {"recursion_limit": 50, "configurable": {"thread_id": run_id}}
+    nodes = []
+    prompt_tokens = 0
+    start = last = time.perf_counter()
+    if trace_allocations:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    for update in compiled.stream(research_input(compiled, question, config), config, stream_mode="updates"):
+        now = time.perf_counter()
+        for node, values in update.items():
+            sample = {"node": node, "ms": (now - last) * 1000, "prompt_tokens": 0}
+            usage = (values or {}).get("usage")
+            if usage is not None and usage.prompt_tokens != prompt_tokens:
+                sample["prompt_tokens"] = usage.prompt_tokens - prompt_tokens
+                prompt_tokens = usage.prompt_tokens
+            if trace_allocations:
+                sample["alloc_kib"] = max(0, tracemalloc.get_traced_memory()[1] - baseline) / 1024
+            nodes.append(sample)
+        if trace_allocations:
+            # Measure the next node from here, not from the start of the run.
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        last = time.perf_counter()
+    return time.perf_counter() - start, nodes
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def profile_nodes(compiled, questions, repeat: int):
+    """Per-node means over `repeat` single-threaded passes with tracemalloc on, after one warm-up run."""
+    run_one(compiled, questions[0], "warm-up")
+    samples = defaultdict(lambda: defaultdict(list))
+    tracemalloc.start()
+    try:
+        for i, question in enumerate(questions * repeat):
+            _, nodes = run_one(compiled, question, f"profile-{i}", trace_allocations=True)
+            for sample in nodes:
+                for metric in ("ms", "prompt_tokens", "alloc_kib"):
+                    samples[sample["node"]][metric].append(sample[metric])
+    finally:
+        tracemalloc.stop()
+    return {
+        node: {
+            "latency_ms": statistics.mean(metrics["ms"]),
+            "alloc_kib": statistics.mean(metrics["alloc_kib"]),
+            "prompt_tokens": statistics.mean(metrics["prompt_tokens"]),
+        }
+        for node, metrics in samples.items()
+    }
+
+
+def measure_throughput(compiled, questions, concurrency: int, repeat: int):
+    items = [(question, f"load-{concurrency}-{r}-{i}") for r in range(repeat) for i, question in enumerate(questions)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = [seconds for seconds, _ in executor.map(lambda item: run_one(compiled, *item), items)]
+    elapsed = time.perf_counter() - start
+    return {
+        "runs_per_min": len(items) / elapsed * 60,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+    }
+
+
+# Metric -> True when a higher value is better.
+HIGHER_IS_BETTER = {"runs_per_min": True}
+
+
+def compare(results, baseline, tolerance: float):
+    """Print results next to the baseline; returns the regressions beyond `tolerance`."""
+    regressions = []
+
+    def cell(section, key, metric, value):
+        old = baseline.get(section, {}).get(key, {}).get(metric) if baseline else None
+        if not old:
+            return f"{value:10.1f}"
+        change = (value - old) / old
+        worse = -change if HIGHER_IS_BETTER.get(metric) else change
+        flag = ""
+        if worse > tolerance:
+            flag = " !"
+            regressions.append(f"{section} {key} {metric}: {old:.1f} -> {value:.1f} ({change:+.0%})")
+        return f"{value:10.1f} ({change:+5.0%}){flag}"
+
+    print(f"{'node':<16} {'latency ms':>18} {'alloc KiB':>18} {'prompt tokens':>18}")
+    for node, metrics in results["nodes"].items():
+        print(f"{node:<16} " + " ".join(
+            f"{cell('nodes', node, metric, metrics[metric]):>18}"
+            for metric in ("latency_ms", "alloc_kib", "prompt_tokens")
+        ))
+    print(f"{'concurrency':<16} {'runs/min':>18} {'p50 ms':>18} {'p95 ms':>18}")
+    for concurrency, metrics in results["throughput"].items():
+        print(f"{concurrency:<16} " + " ".join(
+            f"{cell('throughput', concurrency, metric, metrics[metric]):>18}"
+            for metric in ("runs_per_min", "p50_ms", "p95_ms")
+        ))
+    return regressions
+
+
+def record(path: str, questions, source: str) -> None:
+    from replay import Fixtures, Recorder
+
+    fixtures = Fixtures(path)
+    if len(fixtures):
+        sys.exit(f"{path} already holds recordings; record into a new directory")
+
+    def run_all():
+        from graph import get_graph
+
+        graph = get_graph()
+        with Recorder(fixtures):
+            for i, question in enumerate(questions):
+                seconds, _ = run_one(graph, question, f"record-{i}")
+                fixtures.add_question(question)
+                print(f"recorded {question!r} in {seconds:.1f}s")
+
+    if source == "live":
+        run_all()
+        return
+    # Stand-ins for the live services, for a fixture set that can be regenerated anywhere.
+    from stubs import FakeGoogleSearch, HtmlFixtureHandler, serve
+    import tools
+
+    os.environ["SERPAPI_API_KEY"] = os.getenv("SERPAPI_API_KEY") or "benchmark"
+    os.environ["LLM_BACKEND"] = "fake:small"
+    FakeGoogleSearch.latency = 0.2
+    with serve(HtmlFixtureHandler) as pages:
+        FakeGoogleSearch.base_url = f"{pages.url}/page"
+        tools.GoogleSearch = FakeGoogleSearch
+        run_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", default=FIXTURES, help="fixture directory")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--repeat", type=int, default=4, help="replays of each question per pass")
+    parser.add_argument("--speed", type=float, default=0.0, help="multiplier on recorded latencies")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="relative change flagged as a regression")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--record", action="store_true", help="record a new fixture set instead of replaying")
+    parser.add_argument("--source", choices=("live", "stubs"), default="live", help="what --record runs against")
+    parser.add_argument("--questions", nargs="+", default=DEFAULT_QUESTIONS, help="questions to --record")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.fixtures, args.questions, args.source)
+        return
+
+    # Replayed searches cost nothing and need no key; do not throttle them.
+    os.environ["SERPAPI_REQUESTS_PER_MINUTE"] = "0"
+    os.environ["SERPAPI_API_KEY"] = os.getenv("SERPAPI_API_KEY") or "replay"
+    from graph import get_graph
+    from replay import Fixtures, Replayer
+
+    fixtures = Fixtures(args.fixtures)
+    if not fixtures.questions:
+        sys.exit(f"no fixtures in {args.fixtures}; record some with --record")
+    graph = get_graph()
+    with Replayer(fixtures, speed=args.speed) as replayer:
+        results = {
+            "speed": args.speed,
+            "nodes": profile_nodes(graph, fixtures.questions, args.repeat),
+            "throughput": {
+                str(concurrency): measure_throughput(graph, fixtures.questions, concurrency, args.repeat)
+                for concurrency in (int(value) for value in args.concurrency.split(","))
+            },
+        }
+    if replayer.misses:
+        print(f"fixture misses (requests answered approximately): {dict(replayer.misses)}")
+
+    baseline_path = os.path.join(args.fixtures, "baseline.json")
+    baseline = None
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("speed") != args.speed:
+            print(f"baseline was replayed at --speed {baseline.get('speed')}; not comparing")
+            baseline = None
+    regressions = compare(results, baseline, args.tolerance)
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+        print(f"baseline saved to {baseline_path}")
+    elif regressions:
+        print("regressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
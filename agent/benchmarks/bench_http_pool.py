@@ -0,0 +1,76 @@
+"""
+Per-call latency of GroqJsonModel with and without the pooled session.
+
+Runs against a local stub that sleeps `--handshake-delay` seconds for every
+new TCP connection, so the unpooled path pays that cost on every call while
+the pooled path pays it once.
+
+    python benchmarks/bench_http_pool.py --calls 50 --handshake-delay 0.05
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The stub has no quota; do not throttle against it.
+os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "0")
+
+import http_client  # noqa: E402
+from groq_model import GroqJsonModel  # noqa: E402
+from llm_backend import OpenAICompatibleBackend  # noqa: E402
+from stubs import GroqStubHandler, serve  # noqa: E402
+
+
+MESSAGES = [
+    {"role": "system", "content": "You are a planner."},
+    {"role": "user", "content": "question what is LLM?"},
+]
+
+
+def run(endpoint: str, calls: int, pooled: bool):
+    if pooled:
+        http_client.close_session()
+    else:
+        os.environ["HTTP_KEEP_ALIVE"] = "0"
+        http_client.close_session()
+
+    latencies = []
+    for _ in range(calls):
+        model = GroqJsonModel(backend=OpenAICompatibleBackend(endpoint))
+        start = time.perf_counter()
+        model.invoke(MESSAGES)
+        latencies.append(time.perf_counter() - start)
+
+    os.environ.pop("HTTP_KEEP_ALIVE", None)
+    http_client.close_session()
+    return latencies
+
+
+def report(label: str, latencies, connections: int):
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(
+        f"{label:<10} calls={len(latencies):<4} connections={connections:<4} "
+        f"mean={statistics.mean(latencies) * 1000:8.2f}ms "
+        f"p50={statistics.median(latencies) * 1000:8.2f}ms "
+        f"p95={p95 * 1000:8.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--handshake-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    for label, pooled in (("unpooled", False), ("pooled", True)):
+        with serve(GroqStubHandler, handshake_delay=args.handshake_delay) as server:
+            endpoint = f"{server.url}/openai/v1/chat/completions"
+            latencies = run(endpoint, args.calls, pooled)
+            report(label, latencies, server.connections)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Startup cost of the agent modules, measured with `python -X importtime`.
+
+Each target statement runs in a fresh interpreter `--repeat` times. The best
+run's import time is reported (the cumulative time of every top-level import
+the statement triggers, minus what a bare interpreter imports anyway), with
+the packages that cost the most self time. Importing a module must not pull
+in the dependencies listed in DEFERRED (LangGraph, serpapi, bs4, ...): those
+are loaded when a graph is built or a feature is used, and any that show up
+fail the run. Times are compared with `--baseline`; a target more than
+`--tolerance` (and `--slack-ms`) slower is a regression and the exit status
+is 1, so CI can track the cold start of the CLI and of serverless handlers.
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --repeat 10 --save-baseline
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "import_time.json")
+
+# Target -> statement run with `python -X importtime -c`.
+TARGETS = {
+    "graph": "import graph",
+    "batch": "import batch",
+    "tools": "import tools",
+    "groq_model": "import groq_model",
+    "agents": "import agents",
+    "get_graph": "import graph; graph.get_graph()",
+}
+
+# Target -> top-level packages its statement must not import.
+_OPTIONAL = ("bs4", "lxml", "serpapi", "numpy", "termcolor", "dotenv")
+DEFERRED = {
+    "graph": ("langgraph", "langchain_core", "langsmith", "requests", "httpx") + _OPTIONAL,
+    "batch": ("langgraph", "langchain_core", "langsmith") + _OPTIONAL,
+    "tools": ("langgraph", "langchain_core") + _OPTIONAL,
+    "groq_model": ("langgraph",) + _OPTIONAL,
+    # content_reducer ranks chunks with numpy on every run, so the agents need it.
+    "agents": ("bs4", "lxml", "serpapi", "termcolor", "dotenv"),
+    "get_graph": ("bs4", "lxml", "serpapi", "termcolor"),
+}
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def import_times(statement: str):
+    """(self µs per module, cumulative µs per top-level module) for one fresh interpreter."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1", "CHECKPOINT_PATH": ""}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=AGENT_DIR, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode:
+        sys.exit(f"{statement!r} failed:\n{completed.stderr[-2000:]}")
+    own, top = {}, {}
+    for line in completed.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        own[name] = int(self_us)
+        if not indent:
+            top[name] = int(cumulative_us)
+    return own, top
+
+
+def measure(statement: str, startup: set, repeat: int):
+    """Best of `repeat` runs: {"import_ms", "packages" (self ms per top-level package), "modules"}."""
+    best = None
+    for _ in range(repeat):
+        own, top = import_times(statement)
+        total = sum(us for name, us in top.items() if name not in startup) / 1000
+        if best is None or total < best[0]:
+            best = (total, own)
+    total, own = best
+    packages = defaultdict(float)
+    for name, us in own.items():
+        if name not in startup:
+            packages[name.partition(".")[0]] += us / 1000
+    return {"import_ms": total, "packages": dict(packages), "modules": set(own) - startup}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--targets", default=",".join(TARGETS), help="comma-separated names from TARGETS")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per target; the best one counts")
+    parser.add_argument("--top", type=int, default=5, help="most expensive packages shown per target")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.3, help="relative slowdown flagged as a regression")
+    parser.add_argument("--slack-ms", type=float, default=20.0, help="absolute slowdown always tolerated")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    # Whatever a bare interpreter imports (site, encodings, ...) is not ours to count.
+    startup = set(import_times("pass")[0])
+    results, failures = {}, []
+    print(f"{'target':<12} {'import ms':>10} {'baseline':>10}  top packages (self ms)")
+    for target in args.targets.split(","):
+        measured = measure(TARGETS[target], startup, args.repeat)
+        results[target] = round(measured["import_ms"], 1)
+        old = baseline.get(target)
+        flag = ""
+        if old is not None and measured["import_ms"] > max(old * (1 + args.tolerance), old + args.slack_ms):
+            flag = " !"
+            failures.append(f"{target}: {old:.1f}ms -> {measured['import_ms']:.1f}ms")
+        top = sorted(measured["packages"].items(), key=lambda item: -item[1])[:args.top]
+        print(
+            f"{target:<12} {measured['import_ms']:10.1f} {old if old is not None else '-':>10}{flag:<2} "
+            + " ".join(f"{name}={ms:.0f}" for name, ms in top)
+        )
+        eager = sorted({name.partition(".")[0] for name in measured["modules"]} & set(DEFERRED.get(target, ())))
+        if eager:
+            failures.append(f"{target}: imports {', '.join(eager)} eagerly")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+        print(f"baseline saved to {args.baseline}")
+    if failures:
+        print("startup regressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
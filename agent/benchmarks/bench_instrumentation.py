@@ -0,0 +1,63 @@
+"""
+Overhead of instrumentation spans when disabled, inside a run, and with a JSONL sink.
+
+Also drives one GroqJsonModel call against the local stub inside a run so the
+emitted events and run summary can be eyeballed.
+
+    python benchmarks/bench_instrumentation.py --spans 200000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The stub has no quota; do not throttle against it.
+os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "0")
+
+import instrumentation  # noqa: E402
+from groq_model import GroqJsonModel  # noqa: E402
+from llm_backend import OpenAICompatibleBackend  # noqa: E402
+from stubs import GroqStubHandler, serve  # noqa: E402
+
+
+def time_spans(count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        with instrumentation.span("noop", "llm") as sp:
+            sp.set(bytes=1)
+    return (time.perf_counter() - start) / count * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spans", type=int, default=200000)
+    args = parser.parse_args()
+
+    print(f"disabled    {time_spans(args.spans):8.0f} ns/span")
+    with instrumentation.run_context("bench"):
+        print(f"run only    {time_spans(args.spans):8.0f} ns/span")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.jsonl")
+        sink = instrumentation.JsonlSink(path)
+        instrumentation.add_sink(sink)
+        try:
+            print(f"jsonl sink  {time_spans(args.spans // 10):8.0f} ns/span")
+            open(path, "w").close()
+
+            with serve(GroqStubHandler) as server, instrumentation.run_context("stub-call"):
+                model = GroqJsonModel(backend=OpenAICompatibleBackend(f"{server.url}/openai/v1/chat/completions"))
+                model.invoke([{"role": "user", "content": "question what is LLM?"}])
+        finally:
+            instrumentation.remove_sink(sink)
+
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                print(json.dumps(json.loads(line)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Query latency and recall of the local vector index at growing sizes.
+
+Builds one index incrementally up to each of `--sizes` chunks of synthetic
+text (Zipf-distributed words, `--words` per chunk) and, at each size, times
+`--queries` searches made of a few words from a random stored chunk, both
+through the Hamming pre-filter and exhaustively. Recall@k is the share of
+exhaustive top-k rows the pre-filtered search also returns.
+
+    python benchmarks/bench_local_index.py --sizes 10000,100000,1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_index import DIM, LocalIndex, _slot  # noqa: E402
+
+
+def synthetic_chunks(rng, count: int, words: int, vocabulary: int, batch: int = 20000):
+    """Yield (term ids, vectors) batches; vectors are built exactly as `local_index.embed` would."""
+    ranks = np.arange(1, vocabulary + 1)
+    weights = 1.0 / ranks
+    weights /= weights.sum()
+    slots = [_slot(f"w{i}") for i in range(vocabulary)]
+    buckets = np.array([bucket for bucket, _ in slots])
+    signs = np.array([sign for _, sign in slots], dtype=np.float32)
+    for start in range(0, count, batch):
+        n = min(batch, count - start)
+        ids = rng.choice(vocabulary, size=(n, words), p=weights)
+        pairs, counts = np.unique(np.arange(n)[:, None] * vocabulary + ids, return_counts=True)
+        rows, terms = np.divmod(pairs, vocabulary)
+        vectors = np.zeros((n, DIM), dtype=np.float32)
+        np.add.at(vectors, (rows, buckets[terms]), signs[terms] * np.log1p(counts))
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        yield ids, vectors
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--candidates", type=int, default=4096)
+    parser.add_argument("--words", type=int, default=80)
+    parser.add_argument("--query-words", type=int, default=8)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--page-chunks", type=int, default=1000, help="chunks inserted per add_chunks call")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LocalIndex(tmp, max_age=0)
+        stored = []
+        inserted = 0
+        insert_seconds = 0.0
+        for size in sizes:
+            for ids, vectors in synthetic_chunks(rng, size - inserted, args.words, args.vocabulary):
+                stored.extend(ids[:: max(1, len(ids) // 100)])
+                start = time.perf_counter()
+                for offset in range(0, len(ids), args.page_chunks):
+                    chunk_ids = ids[offset:offset + args.page_chunks]
+                    index.add_chunks(
+                        f"https://example.com/{inserted + offset}",
+                        "synthetic",
+                        [f"chunk {inserted + offset + i}" for i in range(len(chunk_ids))],
+                        vectors[offset:offset + args.page_chunks],
+                    )
+                insert_seconds += time.perf_counter() - start
+                inserted += len(ids)
+
+            ann, exact, recall = [], [], []
+            for _ in range(args.queries):
+                source = stored[rng.integers(len(stored))]
+                query = " ".join(f"w{i}" for i in rng.choice(source, size=args.query_words, replace=False))
+                start = time.perf_counter()
+                approximate = index.search(query, args.k, candidates=args.candidates)
+                ann.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                truth = index.search(query, args.k, exact=True)
+                exact.append(time.perf_counter() - start)
+                truth_rows = {hit.row for hit in truth}
+                recall.append(len(truth_rows & {hit.row for hit in approximate}) / max(len(truth_rows), 1))
+
+            print(
+                f"{size:>9} chunks  "
+                f"ann p50={percentile(ann, 50) * 1000:7.2f}ms p95={percentile(ann, 95) * 1000:7.2f}ms  "
+                f"exact p50={percentile(exact, 50) * 1000:8.2f}ms  "
+                f"recall@{args.k}={statistics.mean(recall):.2f}  "
+                f"insert {inserted / insert_seconds:,.0f} chunks/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Per-run CPU time spent on agent output for each output sink.
+
+Replays one run's worth of agent outputs (planner, search results, selector,
+a large scraped page, reducer stats, report and the full reporter prompt)
+through each sink. Console output goes to /dev/null so only formatting cost
+is measured; "console+prompt" matches the old behaviour of printing every
+reporter prompt.
+
+    python benchmarks/bench_output_sinks.py --runs 200 --scale 20
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+
+import output  # noqa: E402
+from bench_extractors import load_corpus  # noqa: E402
+from extractors import get_extractor  # noqa: E402
+from tools import format_scraped_content  # noqa: E402
+
+
+def json_message(obj):
+    return AIMessage(content=json.dumps(obj), additional_kwargs={"parsed": obj})
+
+
+def run_outputs(scale: int):
+    extractor = get_extractor()
+    pages = []
+    for name, html in enumerate(load_corpus(scale)):
+        title, content = extractor.extract(html)
+        pages.append({"url": f"https://example.com/{name}", "title": title, "content": content, "status": "success"})
+    scraped = format_scraped_content(pages)
+    serp = "\n".join(
+        f"Title: Result {i}\nLink: https://example.com/{i}\nSnippet: about large language models\n---"
+        for i in range(10)
+    )
+    report = "Large language models are trained on ... " * 200
+    return [
+        ("PLANNER", json_message({"search_term": "llm training", "overall_strategy": "search", "additional_information": ""})),
+        ("SERPER", HumanMessage(content=serp)),
+        ("SELECTOR", json_message({"selected_page_url": "https://example.com/0", "description": "d", "reason_for_selection": "r"})),
+        ("SCRAPER", HumanMessage(content=scraped)),
+        ("REDUCER", {"original_tokens": len(scraped) // 4, "reduced_tokens": 6000, "tokens_saved": len(scraped) // 4 - 6000}),
+        ("REPORTER", AIMessage(content=report)),
+    ], scraped
+
+
+def cpu_per_run(sink, outputs, prompt, runs: int) -> float:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), output.use_sink(sink):
+        start = time.process_time()
+        for _ in range(runs):
+            for agent_name, value in outputs:
+                output.emit(agent_name, value)
+            output.debug("REPORTER", "prompt", lambda: prompt)
+        return (time.process_time() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--scale", type=int, default=20)
+    args = parser.parse_args()
+
+    outputs, scraped = run_outputs(args.scale)
+    print(f"scraped page: {len(scraped) / 1024:.0f} KB")
+
+    logging.basicConfig(stream=open(os.devnull, "w"), level=logging.INFO)
+    sinks = [
+        ("console+prompt", output.ConsoleSink(verbose=True)),
+        ("console", output.ConsoleSink(verbose=False)),
+        ("log", output.LogSink()),
+        ("null", output.NullSink()),
+    ]
+    baseline = None
+    for label, sink in sinks:
+        cpu = cpu_per_run(sink, outputs, scraped, args.runs)
+        baseline = baseline or cpu
+        print(f"{label:<15} {cpu * 1000:8.3f} ms CPU/run   saved vs console+prompt {(baseline - cpu) * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Throughput and request loss for concurrent Groq calls against a 429-ing stub.
+
+The stub allows `--quota` requests per `--window` seconds and answers the rest
+with 429 + Retry-After. `--clients` threads each make `--calls` planner
+calls; every call must eventually succeed, and the achieved rate should sit
+close to the stub's quota.
+
+    python benchmarks/bench_rate_limit.py --clients 20 --calls 5 --quota 10 --window 1
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Start unthrottled so the limiter has to learn the quota from 429s and headers.
+os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("GROQ_MAX_RETRIES", "20")
+
+from groq_model import GroqJsonModel  # noqa: E402
+from llm_backend import OpenAICompatibleBackend  # noqa: E402
+from stubs import GroqRateLimitedStubHandler, serve  # noqa: E402
+
+
+MESSAGES = [
+    {"role": "system", "content": "You are a planner."},
+    {"role": "user", "content": "question what is LLM?"},
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=5)
+    parser.add_argument("--quota", type=int, default=10)
+    parser.add_argument("--window", type=float, default=1.0)
+    args = parser.parse_args()
+
+    GroqRateLimitedStubHandler.quota = args.quota
+    GroqRateLimitedStubHandler.window = args.window
+    GroqRateLimitedStubHandler.reset()
+
+    with serve(GroqRateLimitedStubHandler) as server:
+        endpoint = f"{server.url}/openai/v1/chat/completions"
+
+        def client(_):
+            model = GroqJsonModel(backend=OpenAICompatibleBackend(endpoint))
+            return [json.loads(model.invoke(MESSAGES).content) for _ in range(args.calls)]
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            results = [result for batch in pool.map(client, range(args.clients)) for result in batch]
+        elapsed = time.perf_counter() - start
+        sent = server.requests
+
+    failed = sum(1 for result in results if "error" in result)
+    expected = args.clients * args.calls
+    print(f"calls={expected} succeeded={expected - failed} failed={failed}")
+    print(f"upstream requests={sent} rejected_429={GroqRateLimitedStubHandler.rejected}")
+    print(f"elapsed={elapsed:.2f}s achieved={(expected - failed) / elapsed:.1f}/s "
+          f"quota={args.quota / args.window:.1f}/s")
+    assert failed == 0, "every call must eventually succeed"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Wall-clock time of serial vs fan-out scraping for N=1, 5 and 10 pages.
+
+Pages are served by a local fixture server; each page sleeps for a delay drawn
+from `--min-delay`..`--max-delay`, and one page per batch is made slower than
+the deadline to show that late fetches are dropped.
+
+    python benchmarks/bench_scrape_fanout.py --deadline 1.5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Measure the network path, not the on-disk scrape cache.
+os.environ["SCRAPE_CACHE_PATH"] = ""
+
+from tools import scrape_url, scrape_urls  # noqa: E402
+from stubs import HtmlFixtureHandler, serve  # noqa: E402
+
+
+def build_urls(base: str, n: int, args, rng: random.Random):
+    urls = []
+    for i in range(n):
+        delay = rng.uniform(args.min_delay, args.max_delay)
+        if n > 1 and i == n - 1:
+            delay = args.deadline * 2
+        urls.append(f"{base}/page/{i}?delay={delay:.3f}")
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--min-delay", type=float, default=0.1)
+    parser.add_argument("--max-delay", type=float, default=0.5)
+    parser.add_argument("--deadline", type=float, default=1.5)
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument("--per-host", type=int, default=10,
+                        help="all fixture pages share one host, so this caps total concurrency")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with serve(HtmlFixtureHandler) as server:
+        for n in args.sizes:
+            urls = build_urls(server.url, n, args, rng)
+
+            start = time.perf_counter()
+            serial_pages = [page for page in map(scrape_url, urls) if isinstance(page, str)]
+            serial = time.perf_counter() - start
+
+            start = time.perf_counter()
+            fanout_result = scrape_urls(
+                urls,
+                max_workers=args.max_workers,
+                per_host=args.per_host,
+                deadline=args.deadline,
+            )
+            fanout = time.perf_counter() - start
+            fanout_pages = fanout_result.count("Status: success")
+
+            print(
+                f"N={n:<3} serial={serial:6.2f}s ({len(serial_pages)} pages)  "
+                f"fan-out={fanout:6.2f}s ({fanout_pages} pages by {args.deadline}s deadline)"
+            )
+
+
+if __name__ == "__main__":
+    main()
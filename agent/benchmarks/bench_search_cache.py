@@ -0,0 +1,62 @@
+"""
+Upstream SerpAPI calls and wall time for concurrent identical searches.
+
+Replaces `tools.GoogleSearch` with a fake that sleeps `--latency` seconds and
+counts calls, then fires `--clients` threads at a handful of search terms.
+Without coalescing every thread pays one upstream call; with the search cache
+each distinct term is fetched once.
+
+    python benchmarks/bench_search_cache.py --clients 50 --terms 3
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The stub has no quota; do not throttle against it.
+os.environ.setdefault("SERPAPI_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("SERPAPI_API_KEY", "benchmark")
+
+import search_cache  # noqa: E402
+import tools  # noqa: E402
+from stubs import FakeGoogleSearch  # noqa: E402
+
+
+def run(clients: int, terms: int, ttl: float):
+    search_cache._cache = search_cache.SearchCache(ttl=ttl)
+    FakeGoogleSearch.calls = 0
+    queries = [f"what is llm {i % terms}" for i in range(clients)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(tools.serpapi_organic_results, queries))
+    elapsed = time.perf_counter() - start
+    assert all(len(result) == 10 for result in results)
+    return FakeGoogleSearch.calls, elapsed, search_cache._cache.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--terms", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    FakeGoogleSearch.latency = args.latency
+    tools.GoogleSearch = FakeGoogleSearch
+
+    calls, elapsed, stats = run(args.clients, args.terms, ttl=3600)
+    print(f"cold:  upstream_calls={calls:<4} wall={elapsed:6.3f}s {stats}")
+    assert calls == args.terms, "concurrent identical searches must share one upstream call"
+
+    warm = search_cache._cache
+    FakeGoogleSearch.calls = 0
+    start = time.perf_counter()
+    for i in range(args.clients):
+        tools.serpapi_organic_results(f"What is  LLM {i % args.terms}")
+    print(f"warm:  upstream_calls={FakeGoogleSearch.calls:<4} wall={time.perf_counter() - start:6.3f}s {warm.stats()}")
+
+
+if __name__ == "__main__":
+    main()
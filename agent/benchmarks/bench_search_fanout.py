@@ -0,0 +1,115 @@
+"""
+Wall time and result coverage of the search node for 1 vs N concurrent queries.
+
+Runs the full graph `--runs` times against local stubs with SEARCH_FANOUT set
+to each of `--fanouts`. The planner stub always proposes five terms; the fake
+SerpAPI sleeps `--search-latency` per query and gives each query
+`--distinct-results` links of its own, so fusing several queries surfaces
+pages one query would not. Reports mean run time, mean time in the search
+node, upstream searches per run and the distinct URLs the selector was shown.
+
+    python benchmarks/bench_search_fanout.py --runs 10 --fanouts 1,5 --search-latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The stubs have no quota; do not throttle against them.
+os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("SERPAPI_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("SERPAPI_API_KEY", "benchmark")
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("AGENT_OUTPUT", "null")
+os.environ["REPORTER_STREAMING"] = "0"
+os.environ["SCRAPE_CACHE_PATH"] = ""
+# Every run searches for the same terms; never serve them from the cache.
+os.environ["SERPAPI_CACHE_TTL"] = "0"
+
+from stubs import FakeGoogleSearch, GroqPipelineStubHandler, HtmlFixtureHandler, serve  # noqa: E402
+
+
+def timed(search_seconds):
+    """Wrap the search nodes so the time spent in them is appended to `search_seconds`."""
+    import agents
+
+    serper_tool, aserper_tool = agents.serper_tool, agents.aserper_tool
+
+    def timed_serper_tool(state):
+        start = time.perf_counter()
+        try:
+            return serper_tool(state)
+        finally:
+            search_seconds.append(time.perf_counter() - start)
+
+    async def timed_aserper_tool(state):
+        start = time.perf_counter()
+        try:
+            return await aserper_tool(state)
+        finally:
+            search_seconds.append(time.perf_counter() - start)
+
+    agents.serper_tool, agents.aserper_tool = timed_serper_tool, timed_aserper_tool
+
+
+def run_graph(compiled, runs: int, use_async: bool):
+    latencies, urls = [], []
+    for i in range(runs):
+        state = {"research_question": f"what is a large language model {i}"}
+        config = {"recursion_limit": 50}
+        start = time.perf_counter()
+        if use_async:
+            final = asyncio.run(compiled.ainvoke(state, config))
+        else:
+            final = compiled.invoke(state, config)
+        latencies.append(time.perf_counter() - start)
+        assert final["report"] and not final["report"].error, final.get("report")
+        serp = final["serper_response"][-1].content
+        urls.append(len({line for line in serp.splitlines() if line.startswith("Link: ")}))
+    return latencies, urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--fanouts", default="1,5")
+    parser.add_argument("--search-latency", type=float, default=0.5)
+    parser.add_argument("--distinct-results", type=int, default=5, help="per-query links out of the 10 returned")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="use the async graph")
+    args = parser.parse_args()
+
+    FakeGoogleSearch.latency = args.search_latency
+    FakeGoogleSearch.distinct_results = args.distinct_results
+    with serve(HtmlFixtureHandler) as pages, serve(GroqPipelineStubHandler) as groq:
+        GroqPipelineStubHandler.page_url = f"{pages.url}/page/1"
+        os.environ["GROQ_CHAT_URL"] = f"{groq.url}/openai/v1/chat/completions"
+
+        import tools
+
+        search_seconds = []
+        # Before graph.py imports the nodes.
+        timed(search_seconds)
+        from graph import build_workflow
+
+        tools.GoogleSearch = FakeGoogleSearch
+        compiled = build_workflow(use_async=args.use_async).compile()
+
+        for fanout in (int(value) for value in args.fanouts.split(",")):
+            os.environ["SEARCH_FANOUT"] = str(fanout)
+            FakeGoogleSearch.calls = 0
+            search_seconds.clear()
+            latencies, urls = run_graph(compiled, args.runs, args.use_async)
+            print(
+                f"{fanout} quer{'y' if fanout == 1 else 'ies'}  "
+                f"run mean={statistics.mean(latencies) * 1000:8.1f}ms  "
+                f"search mean={statistics.mean(search_seconds) * 1000:7.1f}ms  "
+                f"upstream={FakeGoogleSearch.calls / args.runs:.1f}/run  "
+                f"distinct urls shown={statistics.mean(urls):.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
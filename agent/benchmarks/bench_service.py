@@ -0,0 +1,153 @@
+"""
+Load test of the research service against local stubs.
+
+Runs `service.ResearchService` behind its HTTP server in-process, with every
+agent on the fake LLM backend (`--profile`), searches on the fake SerpAPI and
+pages from the local fixture server. Clients submit `--questions` questions
+at `--rate` per second (open loop) and follow each job's event stream to its
+"done" event. For every admission mode and worker count it reports sustained
+throughput (completed jobs from the first submission to the last completion),
+queue latency (submission to start, as the service measured it), end-to-end
+latency as the client saw it, and how many submissions got a 429.
+
+`--serpapi-rpm` puts a budget on the fake SerpAPI so admission control has
+something to protect: `--admission reject` turns submissions away once a
+search would wait more than `--max-upstream-wait`, `--admission queue` holds
+them in the queue instead.
+
+    python benchmarks/bench_service.py --questions 64 --rate 8 --workers 1,4,16
+    python benchmarks/bench_service.py --serpapi-rpm 120 --admission queue,reject --workers 8
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SERPAPI_API_KEY", "benchmark")
+os.environ.setdefault("AGENT_OUTPUT", "null")
+# Every question pays for its own searches and pages.
+os.environ["SERPAPI_CACHE_TTL"] = "0"
+os.environ["SCRAPE_CACHE_PATH"] = ""
+os.environ["CHECKPOINT_PATH"] = ""
+
+import rate_limit  # noqa: E402
+from batch import percentile  # noqa: E402
+from stubs import FakeGoogleSearch, HtmlFixtureHandler, serve  # noqa: E402
+
+
+def ask(port: int, question: str):
+    """Submit `question` and follow its event stream; returns the client-side result of one job."""
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+    try:
+        conn.request("POST", "/jobs", json.dumps({"question": question}), {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        body = json.loads(response.read())
+        if response.status == 429:
+            return {"rejected": True, "retry_after": float(response.getheader("Retry-After", 0))}
+        if response.status != 202:
+            return {"error": f"{response.status} {body}"}
+
+        conn.request("GET", f"/jobs/{body['id']}/stream")
+        response = conn.getresponse()
+        event, first_event, done = None, None, None
+        for raw in response:
+            line = raw.decode("utf-8").rstrip("\n")
+            if line.startswith("event: "):
+                event = line[7:]
+                if first_event is None:
+                    first_event = time.perf_counter() - started
+            elif line.startswith("data: ") and event == "done":
+                done = json.loads(line[6:])
+                break
+        return {
+            "latency": time.perf_counter() - started,
+            "first_event": first_event,
+            "queue_ms": done["queue_ms"] if done else None,
+            "status": done["status"] if done else "disconnected",
+            "finished": time.perf_counter(),
+        }
+    finally:
+        conn.close()
+
+
+def run_load(admission: str, workers: int, args):
+    from service import ResearchService, make_server
+
+    # Fresh, full budgets for every configuration.
+    rate_limit._limiters.clear()
+    service = ResearchService(
+        workers=workers, queue_size=args.queue_size, admission=admission, max_upstream_wait=args.max_upstream_wait
+    ).start()
+    server = make_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    def client(i):
+        time.sleep(max(0.0, start + i / args.rate - time.perf_counter()))
+        return ask(port, f"question {i} for {admission} {workers}: what is a large language model")
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.questions) as executor:
+            results = list(executor.map(client, range(args.questions)))
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+    completed = [result for result in results if result.get("status") == "done"]
+    rejected = sum(1 for result in results if result.get("rejected"))
+    failed = len(results) - len(completed) - rejected
+    label = f"admission={admission:<6} workers={workers:<3}"
+    if not completed:
+        print(f"{label} no completed jobs ({rejected} rejected, {failed} failed)")
+        return
+    elapsed = max(result["finished"] for result in completed) - start
+    queue_ms = [result["queue_ms"] for result in completed]
+    latencies = [result["latency"] for result in completed]
+    print(
+        f"{label} sustained={len(completed) / elapsed:6.2f} q/s  "
+        f"queue p50={percentile(queue_ms, 50):7.0f}ms p95={percentile(queue_ms, 95):7.0f}ms  "
+        f"latency p50={percentile(latencies, 50):6.2f}s p95={percentile(latencies, 95):6.2f}s  "
+        f"first event p50={percentile([r['first_event'] for r in completed], 50) * 1000:5.0f}ms  "
+        f"rejected={rejected} failed={failed}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=64)
+    parser.add_argument("--rate", type=float, default=8.0, help="submissions per second")
+    parser.add_argument("--workers", default="1,4,16")
+    parser.add_argument("--admission", default="queue", help="comma-separated modes from service.ADMISSION_MODES")
+    parser.add_argument("--queue-size", type=int, default=256)
+    parser.add_argument("--max-upstream-wait", type=float, default=1.0)
+    parser.add_argument("--profile", default="small", help="fake LLM profile for every agent")
+    parser.add_argument("--search-latency", type=float, default=0.2)
+    parser.add_argument("--serpapi-rpm", type=float, default=0, help="SerpAPI budget per minute (0 for none)")
+    args = parser.parse_args()
+
+    os.environ["LLM_BACKEND"] = f"fake:{args.profile}"
+    os.environ["SERPAPI_REQUESTS_PER_MINUTE"] = str(args.serpapi_rpm)
+    FakeGoogleSearch.latency = args.search_latency
+    with serve(HtmlFixtureHandler) as pages:
+        FakeGoogleSearch.base_url = f"{pages.url}/page"
+
+        import tools
+        from graph import get_graph
+
+        tools.GoogleSearch = FakeGoogleSearch
+        get_graph()
+        for admission in args.admission.split(","):
+            for workers in (int(value) for value in args.workers.split(",")):
+                run_load(admission, workers, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+End-to-end latency saved by starting the search while the planner streams.
+
+Runs the full graph `--runs` times against local stubs (a Groq stub that
+generates at a fixed token rate, a SerpAPI fake with `--search-latency` and
+HTML pages), first with SPECULATIVE_SEARCH off and then on, and reports the
+mean run time and the time saved per run. `--revised-term` makes the planner
+change its term at the end of the plan, so every speculative search is
+discarded and the cost of guessing wrong shows up instead.
+
+    python benchmarks/bench_speculative_search.py --runs 10 --strategy-words 150
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The stubs have no quota; do not throttle against them.
+os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("SERPAPI_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("SERPAPI_API_KEY", "benchmark")
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("AGENT_OUTPUT", "null")
+os.environ["REPORTER_STREAMING"] = "0"
+os.environ["SCRAPE_CACHE_PATH"] = ""
+# Every run searches for the same term; keep coalescing but never serve it from the cache.
+os.environ["SERPAPI_CACHE_TTL"] = "0"
+
+from stubs import FakeGoogleSearch, GroqPipelineSSEStubHandler, HtmlFixtureHandler, serve  # noqa: E402
+
+
+def run_graph(compiled, runs: int, use_async: bool):
+    latencies = []
+    for i in range(runs):
+        state = {"research_question": f"what is a large language model {i}"}
+        # Speculative searches belong to the run's thread.
+        config = {"recursion_limit": 50, "configurable": {"thread_id": f"run-{i}"}}
+        start = time.perf_counter()
+        if use_async:
+            final = asyncio.run(compiled.ainvoke(state, config))
+        else:
+            final = compiled.invoke(state, config)
+        latencies.append(time.perf_counter() - start)
+        assert final["report"] and not final["report"].error, final.get("report")
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--strategy-words", type=int, default=150, help="planner text generated after search_term")
+    parser.add_argument("--token-interval", type=float, default=0.005)
+    parser.add_argument("--search-latency", type=float, default=0.5)
+    parser.add_argument("--revised-term", help="search_term the plan switches to at the very end")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="use the async graph")
+    args = parser.parse_args()
+
+    GroqPipelineSSEStubHandler.strategy_words = args.strategy_words
+    GroqPipelineSSEStubHandler.token_interval = args.token_interval
+    GroqPipelineSSEStubHandler.revised_term = args.revised_term
+    FakeGoogleSearch.latency = args.search_latency
+    with serve(HtmlFixtureHandler) as pages, serve(GroqPipelineSSEStubHandler) as groq:
+        GroqPipelineSSEStubHandler.page_url = f"{pages.url}/page/1"
+        os.environ["GROQ_CHAT_URL"] = f"{groq.url}/openai/v1/chat/completions"
+
+        import tools
+        from graph import build_workflow
+        from speculation import get_speculative_searches
+
+        tools.GoogleSearch = FakeGoogleSearch
+        compiled = build_workflow(use_async=args.use_async).compile()
+
+        os.environ["SPECULATIVE_SEARCH"] = "0"
+        serial = run_graph(compiled, args.runs, args.use_async)
+        FakeGoogleSearch.calls = 0
+        os.environ["SPECULATIVE_SEARCH"] = "1"
+        speculative = run_graph(compiled, args.runs, args.use_async)
+        stats = get_speculative_searches().stats()
+
+    saved = statistics.mean(serial) - statistics.mean(speculative)
+    print(f"serial      mean={statistics.mean(serial) * 1000:8.1f}ms/run")
+    print(f"speculative mean={statistics.mean(speculative) * 1000:8.1f}ms/run")
+    print(f"saved       {saved * 1000:8.1f}ms/run ({saved / statistics.mean(serial):.1%})")
+    print(
+        f"speculative searches: {stats['started']} started, {stats['used']} used, "
+        f"{stats['discarded']} discarded; {FakeGoogleSearch.calls} upstream searches"
+    )
+
+
+if __name__ == "__main__":
+    main()
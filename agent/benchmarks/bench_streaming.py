@@ -0,0 +1,71 @@
+"""
+Time-to-first-token vs time-to-complete for GroqModel, streaming and not.
+
+Runs against a local SSE stub, so the numbers reflect the stub's configured
+first-token latency and token rate rather than a real model.
+
+    python benchmarks/bench_streaming.py --tokens 400 --token-interval 0.005
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The stub has no quota; do not throttle against it.
+os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "0")
+
+from groq_model import GroqModel  # noqa: E402
+from llm_backend import OpenAICompatibleBackend  # noqa: E402
+from stubs import GroqSSEStubHandler, serve  # noqa: E402
+
+
+MESSAGES = [
+    {"role": "system", "content": "You are a reporter."},
+    {"role": "user", "content": "question what is LLM?"},
+]
+
+
+def measure_streaming(model: GroqModel):
+    start = time.perf_counter()
+    first = None
+    tokens = 0
+    for _ in model.stream(MESSAGES):
+        if first is None:
+            first = time.perf_counter() - start
+        tokens += 1
+    return first, time.perf_counter() - start, tokens
+
+
+def measure_blocking(model: GroqModel):
+    start = time.perf_counter()
+    model.invoke(MESSAGES)
+    elapsed = time.perf_counter() - start
+    # Nothing reaches the caller until the whole completion is back.
+    return elapsed, elapsed, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    parser.add_argument("--token-interval", type=float, default=0.005)
+    args = parser.parse_args()
+
+    GroqSSEStubHandler.tokens = args.tokens
+    GroqSSEStubHandler.first_token_latency = args.first_token_latency
+    GroqSSEStubHandler.token_interval = args.token_interval
+
+    with serve(GroqSSEStubHandler) as server:
+        model = GroqModel(backend=OpenAICompatibleBackend(f"{server.url}/openai/v1/chat/completions"))
+        for label, measure in (("blocking", measure_blocking), ("streaming", measure_streaming)):
+            samples = [measure(model) for _ in range(args.runs)]
+            ttft = statistics.median(sample[0] for sample in samples)
+            total = statistics.median(sample[1] for sample in samples)
+            print(f"{label:<10} ttft={ttft * 1000:8.1f}ms  complete={total * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
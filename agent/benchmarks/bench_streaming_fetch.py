@@ -0,0 +1,90 @@
+"""
+Latency and peak RSS of `scrape_url` against huge, slow and non-HTML responses.
+
+Serves three pages from a local stub (`--huge-mb` MiB of HTML, a small page
+trickled over `--slow-seconds`, and `--huge-mb` MiB labelled application/pdf)
+and fetches each one in its own subprocess, so peak RSS is not shared: once
+the way `scrape_url` used to (`requests.get` of the whole body, then
+`response.text` into the extractor) and once through the streaming fetch with
+SCRAPE_MAX_BYTES and SCRAPE_PAGE_DEADLINE.
+
+    python benchmarks/bench_streaming_fetch.py --huge-mb 200 --slow-seconds 30
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["SCRAPE_CACHE_PATH"] = ""
+
+from stubs import HeavyPageHandler, serve  # noqa: E402
+
+
+def worker(mode: str, url: str):
+    import requests
+    import tools
+
+    start = time.perf_counter()
+    if mode == "buffered":
+        try:
+            response = requests.get(url, timeout=600)
+            response.raise_for_status()
+            page = tools._extract_page(url, response.text)
+        except requests.RequestException as e:
+            page = tools._scrape_error(url, e)
+    else:
+        page = tools.scrape_url(url)
+    elapsed = time.perf_counter() - start
+    # Failures come back as the `_scrape_error` dict instead of formatted text.
+    error = page["content"] if isinstance(page, dict) else None
+    print(json.dumps({
+        "seconds": elapsed,
+        "chars": 0 if error else len(page),
+        "error": error,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--huge-mb", type=float, default=200)
+    parser.add_argument("--slow-seconds", type=float, default=30)
+    parser.add_argument("--max-bytes", type=int, default=5 * 1024 * 1024)
+    parser.add_argument("--deadline", type=float, default=20)
+    parser.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    env = dict(os.environ, SCRAPE_MAX_BYTES=str(args.max_bytes), SCRAPE_PAGE_DEADLINE=str(args.deadline))
+    with serve(HeavyPageHandler) as server:
+        pages = {
+            f"huge ({args.huge_mb:g} MiB)": f"{server.url}/huge?mb={args.huge_mb}",
+            f"slow ({args.slow_seconds:g}s)": f"{server.url}/slow?seconds={args.slow_seconds}",
+            f"pdf ({args.huge_mb:g} MiB)": f"{server.url}/pdf?mb={args.huge_mb}",
+        }
+        for name, url in pages.items():
+            for mode in ("buffered", "streaming"):
+                result = subprocess.run(
+                    [sys.executable, __file__, "--worker", mode, url],
+                    capture_output=True, text=True, env=env,
+                )
+                if result.returncode != 0:
+                    print(f"{name:<18} {mode:<9} failed: {result.stderr.strip().splitlines()[-1]}")
+                    continue
+                stats = json.loads(result.stdout.strip().splitlines()[-1])
+                outcome = stats["error"] if stats["error"] else f"{stats['chars']:,} chars"
+                print(
+                    f"{name:<18} {mode:<9} {stats['seconds']:7.2f}s  "
+                    f"peak RSS {stats['peak_rss_mb']:8.1f} MiB  {outcome}"
+                )
+
+
+if __name__ == "__main__":
+    main()
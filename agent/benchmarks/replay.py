@@ -0,0 +1,409 @@
+"""
+Record and replay the graph's external calls: chat completions, SerpAPI results and fetched pages.
+
+A fixture set is a directory of three JSONL files:
+
+- ``completions.jsonl``: one line per chat completion (request key, agent
+  template key, content, usage, latency).
+- ``searches.jsonl``: one line per SerpAPI search (query, engine, num, result dict, latency).
+- ``pages.jsonl``: one line per fetched page (url, status, content type, base64 body, latency).
+
+plus ``questions.json``, the research questions the recording was made from.
+
+`Recorder` wraps the real backends and clients while a live run goes through
+them; `Replayer` installs in-process stand-ins that answer from the fixtures,
+so the compiled graph runs with no network access. Requests are matched on
+their messages with the prompt timestamps removed; a request that has no
+exact match gets the next recording made from the same prompt template, and
+is counted in `Replayer.misses`.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import instrumentation
+import llm_backend
+import tools
+from completion_cache import normalize_messages
+from llm_backend import _TOKEN_RE, get_backend, register_backend
+from utils import estimate_tokens
+
+
+_DATE_RE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+# Enough of the system prompt to tell the agents' templates apart.
+_TEMPLATE_CHARS = 200
+
+
+def request_key(messages) -> str:
+    """Key of a completion request: its normalized messages without dates."""
+    normalized = [(role, _DATE_RE.sub("", content)) for role, content in normalize_messages(messages)]
+    return hashlib.sha256(json.dumps(normalized, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def template_key(messages) -> str:
+    """Key of the prompt template a request was built from: the start of its first message."""
+    head = _DATE_RE.sub("", " ".join(str(messages[0]["content"]).split())[:_TEMPLATE_CHARS]) if messages else ""
+    return hashlib.sha256(head.encode("utf-8")).hexdigest()[:16]
+
+
+def search_key(query: str, engine: str, num: int) -> str:
+    return json.dumps([" ".join(query.lower().split()), engine, num])
+
+
+def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class Fixtures:
+    """The recordings in one fixture directory, appended to as a recording run goes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completions = _read_jsonl(os.path.join(path, "completions.jsonl"))
+        self.searches = _read_jsonl(os.path.join(path, "searches.jsonl"))
+        self.pages = _read_jsonl(os.path.join(path, "pages.jsonl"))
+        questions = os.path.join(path, "questions.json")
+        self.questions: List[str] = []
+        if os.path.exists(questions):
+            with open(questions, encoding="utf-8") as f:
+                self.questions = json.load(f)
+        self._lock = threading.Lock()
+
+    def add_question(self, question: str) -> None:
+        self.questions.append(question)
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "questions.json"), "w", encoding="utf-8") as f:
+            json.dump(self.questions, f, indent=1)
+
+    def append(self, kind: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            getattr(self, kind).append(record)
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, f"{kind}.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def __len__(self) -> int:
+        return len(self.completions) + len(self.searches) + len(self.pages)
+
+
+class _RecordingBackend:
+    """Delegates to a real backend and records every completion it returns."""
+
+    def __init__(self, inner, fixtures: Fixtures):
+        self.inner = inner
+        self.name = inner.name
+        self.fixtures = fixtures
+
+    def _record(self, payload, content: str, usage, started: float) -> None:
+        messages = payload["messages"]
+        self.fixtures.append("completions", {
+            "key": request_key(messages),
+            "template": template_key(messages),
+            "content": content,
+            "usage": usage or {},
+            "latency_ms": (time.perf_counter() - started) * 1000,
+        })
+
+    def complete(self, payload, sp=instrumentation._NOOP):
+        started = time.perf_counter()
+        response_json = self.inner.complete(payload, sp)
+        self._record(payload, response_json["choices"][0]["message"]["content"], response_json.get("usage"), started)
+        return response_json
+
+    async def acomplete(self, payload, sp=instrumentation._NOOP):
+        started = time.perf_counter()
+        response_json = await self.inner.acomplete(payload, sp)
+        self._record(payload, response_json["choices"][0]["message"]["content"], response_json.get("usage"), started)
+        return response_json
+
+    def stream(self, payload, sp=instrumentation._NOOP, usage=None):
+        started = time.perf_counter()
+        tokens = []
+        usage = {} if usage is None else usage
+        for token in self.inner.stream(payload, sp, usage):
+            tokens.append(token)
+            yield token
+        self._record(payload, "".join(tokens), usage, started)
+
+    async def astream(self, payload, sp=instrumentation._NOOP, usage=None):
+        started = time.perf_counter()
+        tokens = []
+        usage = {} if usage is None else usage
+        async for token in self.inner.astream(payload, sp, usage):
+            tokens.append(token)
+            yield token
+        self._record(payload, "".join(tokens), usage, started)
+
+
+class Recorder:
+    """
+    Record a live run into `fixtures`: wraps the LLM backends, `tools.GoogleSearch` and the page fetchers.
+
+    Use as a context manager; everything is restored on exit.
+    """
+
+    def __init__(self, fixtures: Fixtures):
+        self.fixtures = fixtures
+        self._saved: List[Tuple[Any, str, Any]] = []
+
+    def _patch(self, owner, name: str, value) -> None:
+        self._saved.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, value)
+
+    def __enter__(self):
+        fixtures = self.fixtures
+        wrapped: Dict[int, _RecordingBackend] = {}
+        real_get_backend = get_backend
+
+        def recording_get_backend(spec=None):
+            inner = real_get_backend(spec)
+            if id(inner) not in wrapped:
+                wrapped[id(inner)] = _RecordingBackend(inner, fixtures)
+            return wrapped[id(inner)]
+
+        real_search = tools.GoogleSearch
+
+        class RecordingGoogleSearch:
+            def __init__(self, params):
+                self.params = params
+
+            def get_dict(self):
+                started = time.perf_counter()
+                result = real_search(self.params).get_dict()
+                fixtures.append("searches", {
+                    "key": search_key(self.params["q"], self.params.get("engine", "google"), self.params["num"]),
+                    "result": result,
+                    "latency_ms": (time.perf_counter() - started) * 1000,
+                })
+                return result
+
+        def record_page(url, fetched, started):
+            if fetched is not None:
+                reader, headers = fetched
+                fixtures.append("pages", {
+                    "url": url,
+                    "status": 200,
+                    "content_type": headers.get("Content-Type", ""),
+                    "body": base64.b64encode(bytes(reader.body)).decode("ascii"),
+                    "latency_ms": (time.perf_counter() - started) * 1000,
+                })
+
+        real_fetch, real_afetch = tools._fetch_page, tools._afetch_page
+
+        def recording_fetch(url, headers, sp):
+            started = time.perf_counter()
+            fetched = real_fetch(url, headers, sp)
+            record_page(url, fetched, started)
+            return fetched
+
+        async def recording_afetch(url, headers, sp):
+            started = time.perf_counter()
+            fetched = await real_afetch(url, headers, sp)
+            record_page(url, fetched, started)
+            return fetched
+
+        self._patch(llm_backend, "get_backend", recording_get_backend)
+        self._patch(tools, "GoogleSearch", RecordingGoogleSearch)
+        self._patch(tools, "_fetch_page", recording_fetch)
+        self._patch(tools, "_afetch_page", recording_afetch)
+        return self
+
+    def __exit__(self, *exc):
+        while self._saved:
+            owner, name, value = self._saved.pop()
+            setattr(owner, name, value)
+
+
+class ReplayBackend:
+    """
+    Answers completions from the fixtures.
+
+    Prompt tokens are estimated from the request actually sent, so prompt
+    growth shows up in a replay; completion tokens are the recorded ones.
+    With `speed` > 0 each reply waits its recorded latency times `speed`.
+    """
+
+    def __init__(self, replayer: "Replayer", speed: float = 0.0):
+        self.replayer = replayer
+        self.speed = speed
+        self.name = "replay"
+
+    def _reply(self, payload) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        messages = payload["messages"]
+        record = self.replayer.completion(messages)
+        prompt_tokens = sum(estimate_tokens(str(message["content"])) for message in messages)
+        completion_tokens = (record["usage"] or {}).get("completion_tokens") or estimate_tokens(record["content"])
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        return record, usage
+
+    def _response(self, record, usage) -> Dict[str, Any]:
+        return {
+            "id": "replay",
+            "object": "chat.completion",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": record["content"]},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    def complete(self, payload, sp=instrumentation._NOOP):
+        record, usage = self._reply(payload)
+        if self.speed:
+            time.sleep(record["latency_ms"] / 1000 * self.speed)
+        return self._response(record, usage)
+
+    async def acomplete(self, payload, sp=instrumentation._NOOP):
+        record, usage = self._reply(payload)
+        if self.speed:
+            await asyncio.sleep(record["latency_ms"] / 1000 * self.speed)
+        return self._response(record, usage)
+
+    def stream(self, payload, sp=instrumentation._NOOP, usage=None):
+        record, reply_usage = self._reply(payload)
+        if self.speed:
+            time.sleep(record["latency_ms"] / 1000 * self.speed)
+        yield from _TOKEN_RE.findall(record["content"])
+        if usage is not None:
+            usage.update(reply_usage)
+
+    async def astream(self, payload, sp=instrumentation._NOOP, usage=None):
+        record, reply_usage = self._reply(payload)
+        if self.speed:
+            await asyncio.sleep(record["latency_ms"] / 1000 * self.speed)
+        for token in _TOKEN_RE.findall(record["content"]):
+            yield token
+        if usage is not None:
+            usage.update(reply_usage)
+
+
+class Replayer:
+    """
+    Serve a run from `fixtures` with no network access.
+
+    Installs a `ReplayBackend` as the only LLM backend, a GoogleSearch
+    stand-in and page fetchers that feed the recorded bodies through the
+    normal `tools._PageReader` parsing path. Use as a context manager.
+    """
+
+    def __init__(self, fixtures: Fixtures, speed: float = 0.0):
+        self.fixtures = fixtures
+        self.speed = speed
+        self.misses: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._completions = {record["key"]: record for record in fixtures.completions}
+        self._by_template: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for record in fixtures.completions:
+            self._by_template[record["template"]].append(record)
+        self._next: Dict[str, int] = defaultdict(int)
+        self._searches = {record["key"]: record for record in fixtures.searches}
+        self._pages = {record["url"]: record for record in fixtures.pages}
+        self._saved: List[Tuple[Any, str, Any]] = []
+        self._env: Dict[str, Optional[str]] = {}
+
+    def _miss(self, kind: str) -> None:
+        with self._lock:
+            self.misses[kind] += 1
+
+    def completion(self, messages) -> Dict[str, Any]:
+        record = self._completions.get(request_key(messages))
+        if record is not None:
+            return record
+        self._miss("completions")
+        template = template_key(messages)
+        candidates = self._by_template.get(template) or self.fixtures.completions
+        if not candidates:
+            raise LookupError("The fixture set has no completions to replay")
+        with self._lock:
+            index = self._next[template]
+            self._next[template] = index + 1
+        return candidates[index % len(candidates)]
+
+    def search(self, params) -> Dict[str, Any]:
+        record = self._searches.get(search_key(params["q"], params.get("engine", "google"), params["num"]))
+        if record is None:
+            self._miss("searches")
+            return {"organic_results": []}
+        if self.speed:
+            time.sleep(record["latency_ms"] / 1000 * self.speed)
+        return record["result"]
+
+    def page(self, url: str) -> Optional[Dict[str, Any]]:
+        record = self._pages.get(url)
+        if record is None:
+            self._miss("pages")
+        return record
+
+    def _reader(self, url: str, record) -> Tuple[Any, Dict[str, str]]:
+        if record is None:
+            raise tools.ScrapeAborted(f"No recorded page for {url}")
+        max_bytes, _ = tools._fetch_limits()
+        reader = tools._PageReader(record["content_type"], max_bytes)
+        body = base64.b64decode(record["body"])
+        for start in range(0, len(body), tools._READ_SIZE):
+            if not reader.feed(body[start:start + tools._READ_SIZE]):
+                break
+        return reader, {"Content-Type": record["content_type"]}
+
+    def _patch(self, owner, name: str, value) -> None:
+        self._saved.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, value)
+
+    def __enter__(self):
+        replayer = self
+
+        class ReplayGoogleSearch:
+            def __init__(self, params):
+                self.params = params
+
+            def get_dict(self):
+                return replayer.search(self.params)
+
+        def replay_fetch(url, headers, sp):
+            record = replayer.page(url)
+            if record is not None and replayer.speed:
+                time.sleep(record["latency_ms"] / 1000 * replayer.speed)
+            sp.set(status=record["status"] if record else 404)
+            return replayer._reader(url, record)
+
+        async def replay_afetch(url, headers, sp):
+            record = replayer.page(url)
+            if record is not None and replayer.speed:
+                await asyncio.sleep(record["latency_ms"] / 1000 * replayer.speed)
+            sp.set(status=record["status"] if record else 404)
+            return replayer._reader(url, record)
+
+        register_backend("replay", ReplayBackend(self, self.speed))
+        # Every agent goes to the replay backend, whatever the per-agent routing says.
+        for name in [name for name in os.environ if name.startswith("LLM_BACKEND")] + ["LLM_BACKEND"]:
+            self._env[name] = os.environ.get(name)
+            os.environ[name] = "replay"
+        self._patch(tools, "GoogleSearch", ReplayGoogleSearch)
+        self._patch(tools, "_fetch_page", replay_fetch)
+        self._patch(tools, "_afetch_page", replay_afetch)
+        return self
+
+    def __exit__(self, *exc):
+        while self._saved:
+            owner, name, value = self._saved.pop()
+            setattr(owner, name, value)
+        for name, value in self._env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
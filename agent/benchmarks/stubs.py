@@ -0,0 +1,412 @@
+"""
+Local stub servers and fakes used by the benchmark scripts.
+
+Everything here runs on 127.0.0.1 with an ephemeral port, so the benchmarks
+never touch the network.
+"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Threading HTTP server that can delay newly accepted connections.
+
+    `handshake_delay` is slept once per accepted TCP connection, which stands in
+    for the TCP+TLS handshake cost a client pays when it does not reuse
+    connections.
+    """
+    daemon_threads = True
+
+    def __init__(self, handler_cls, handshake_delay: float = 0.0):
+        super().__init__(("127.0.0.1", 0), handler_cls)
+        self.handshake_delay = handshake_delay
+        self.connections = 0
+        self.requests = 0
+        self._counter_lock = threading.Lock()
+
+    def get_request(self):
+        request = super().get_request()
+        with self._counter_lock:
+            self.connections += 1
+        if self.handshake_delay:
+            time.sleep(self.handshake_delay)
+        return request
+
+    def count_request(self):
+        with self._counter_lock:
+            self.requests += 1
+
+    def handle_error(self, request, client_address):
+        # Clients that give up mid-response (a scrape deadline, an abandoned fan-out) are expected, not errors.
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def send_json(self, status: int, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def write_chunk(self, data: bytes):
+        """Write one chunk of a `Transfer-Encoding: chunked` body; b"" ends it."""
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class GroqStubHandler(StubHandler):
+    """Answers OpenAI-compatible chat completion requests with a fixed JSON body."""
+    completion = json.dumps({
+        "search_term": "stub search term",
+        "overall_strategy": "stub strategy",
+        "additional_information": "stub information",
+    })
+    latency = 0.0
+    # Extra delay per KiB of request body, a stand-in for prompt prefill time.
+    seconds_per_kb = 0.0
+
+    def do_POST(self):
+        body = self.read_body()
+        self.server.count_request()
+        delay = self.latency + self.seconds_per_kb * len(body) / 1024
+        if delay:
+            time.sleep(delay)
+        self.send_json(200, {
+            "id": "stub",
+            "object": "chat.completion",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.completion},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+        })
+
+
+class GroqPipelineStubHandler(GroqStubHandler):
+    """
+    One fixed reply that satisfies every agent in the graph.
+
+    The JSON carries the planner, selector, reviewer and router fields, so a
+    whole research run can go through one stub (the review passes first time); set `page_url` to a page served by
+    `HtmlFixtureHandler` before starting the server.
+    """
+    page_url = "http://127.0.0.1/page/0"
+    # Alternative terms the planner proposes after "large language models".
+    search_terms = ["llm architecture", "how llms are trained", "llm applications", "llm limitations"]
+
+    @property
+    def completion(self):
+        return json.dumps({
+            "search_term": "large language models",
+            "search_terms": ["large language models", *self.search_terms],
+            "overall_strategy": "stub strategy",
+            "additional_information": "stub information",
+            "selected_page_url": self.page_url,
+            "selected_page_urls": [self.page_url],
+            "description": "stub page",
+            "reason_for_selection": "stub reason",
+            "feedback": "stub feedback",
+            "pass_review": True,
+            "comprehensive": True,
+            "citations_provided": True,
+            "relevant_to_research_question": True,
+            "next_agent": "final_report",
+        })
+
+
+class GroqPipelineSSEStubHandler(GroqPipelineStubHandler):
+    """
+    `GroqPipelineStubHandler` that takes time to generate, streamed or not.
+
+    The completion is sent in `chunk_chars`-sized SSE deltas, `token_interval`
+    apart after `first_token_latency`; non-streaming requests wait for the same
+    total before answering. `search_term` comes first and `strategy_words` of
+    filler follow it, like a planner that explains itself at length. With
+    `revised_term` set, a second `search_term` key at the end overrides the
+    first, so a term read early turns out wrong.
+    """
+    first_token_latency = 0.2
+    token_interval = 0.005
+    chunk_chars = 4
+    strategy_words = 150
+    revised_term = None
+
+    @property
+    def completion(self):
+        fields = json.loads(super().completion)
+        fields["overall_strategy"] = " ".join(f"step{i}" for i in range(self.strategy_words))
+        text = json.dumps(fields)
+        if self.revised_term:
+            text = text[:-1] + f', "search_term": {json.dumps(self.revised_term)}}}'
+        return text
+
+    def do_POST(self):
+        payload = json.loads(self.read_body() or b"{}")
+        self.server.count_request()
+        text = self.completion
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        if not payload.get("stream"):
+            time.sleep(self.first_token_latency + self.token_interval * (len(chunks) - 1))
+            self.send_json(200, {
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": len(chunks), "total_tokens": 10 + len(chunks)},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(self.first_token_latency)
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(self.token_interval)
+            event = {"choices": [{"index": 0, "delta": {"content": chunk}}]}
+            self.write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        write_usage_chunk(self, payload, 10, len(chunks))
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.write_chunk(b"")
+
+
+class GroqRateLimitedStubHandler(GroqStubHandler):
+    """
+    Groq stub that enforces a fixed request quota per window.
+
+    Over-quota requests get a 429 with Retry-After; every response carries
+    x-ratelimit-* headers the way the real API does.
+    """
+    quota = 10
+    window = 1.0
+    _window_start = 0.0
+    _used = 0
+    rejected = 0
+    _state_lock = threading.Lock()
+
+    @classmethod
+    def reset(cls):
+        with cls._state_lock:
+            cls._window_start = time.monotonic()
+            cls._used = 0
+            cls.rejected = 0
+
+    def do_POST(self):
+        self.read_body()
+        self.server.count_request()
+        cls = type(self)
+        with cls._state_lock:
+            now = time.monotonic()
+            if now - cls._window_start >= cls.window:
+                cls._window_start = now
+                cls._used = 0
+            reset_in = cls.window - (now - cls._window_start)
+            allowed = cls._used < cls.quota
+            if allowed:
+                cls._used += 1
+            else:
+                cls.rejected += 1
+            remaining = cls.quota - cls._used
+        headers = {
+            "x-ratelimit-limit-requests": str(cls.quota),
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": f"{reset_in:.3f}s",
+        }
+        if not allowed:
+            headers["retry-after"] = f"{reset_in:.3f}"
+            self.send_json(429, {"error": {"message": "Rate limit reached"}}, headers)
+            return
+        self.send_json(200, {
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.completion}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+        }, headers)
+
+
+def write_usage_chunk(handler, payload, prompt_tokens: int, completion_tokens: int) -> None:
+    """The final, choice-less usage chunk an OpenAI-compatible server sends for `stream_options.include_usage`."""
+    if not (payload.get("stream_options") or {}).get("include_usage"):
+        return
+    usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+             "total_tokens": prompt_tokens + completion_tokens}
+    handler.write_chunk(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode("utf-8"))
+
+
+class GroqSSEStubHandler(StubHandler):
+    """
+    Streams an OpenAI-compatible SSE completion when the request asks for `stream: true`.
+
+    Waits `first_token_latency` before the first token and `token_interval`
+    between tokens, roughly like a hosted model generating a long report.
+    """
+    tokens = 200
+    first_token_latency = 0.2
+    token_interval = 0.005
+
+    def do_POST(self):
+        payload = json.loads(self.read_body() or b"{}")
+        self.server.count_request()
+        words = [f"word{i} " for i in range(self.tokens)]
+        if not payload.get("stream"):
+            time.sleep(self.first_token_latency + self.token_interval * self.tokens)
+            self.send_json(200, {"choices": [{"index": 0, "message": {
+                "role": "assistant", "content": "".join(words)}}]})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(self.first_token_latency)
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.token_interval)
+            event = {"choices": [{"index": 0, "delta": {"content": word}}]}
+            self.write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        write_usage_chunk(self, payload, 10, len(words))
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.write_chunk(b"")
+
+
+class HtmlFixtureHandler(StubHandler):
+    """
+    Serves generated article pages at /page/<n>.
+
+    A `delay` query parameter (seconds) is slept before responding, so callers
+    can inject per-page latency.
+    """
+    paragraphs = 40
+
+    def do_GET(self):
+        self.server.count_request()
+        parts = urlsplit(self.path)
+        delay = float(parse_qs(parts.query).get("delay", ["0"])[0])
+        if delay:
+            time.sleep(delay)
+        name = parts.path.rsplit("/", 1)[-1]
+        body = "".join(
+            f"<p>Paragraph {i} of page {name} about large language models.</p>"
+            for i in range(self.paragraphs)
+        )
+        data = (
+            f"<html><head><title>Fixture page {name}</title></head>"
+            f"<body>{body}</body></html>"
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class HeavyPageHandler(StubHandler):
+    """
+    Pages that are expensive to fetch whole, sent as chunked bodies generated on the fly.
+
+    /huge?mb=N is N MiB of HTML paragraphs, /slow?seconds=N trickles a small
+    HTML page over N seconds and /pdf?mb=N is N MiB labelled application/pdf.
+    """
+    chunk_bytes = 64 * 1024
+
+    def do_GET(self):
+        self.server.count_request()
+        parts = urlsplit(self.path)
+        query = {key: float(values[0]) for key, values in parse_qs(parts.query).items()}
+        kind = parts.path.rsplit("/", 1)[-1]
+        content_type = "application/pdf" if kind == "pdf" else "text/html; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        # A client that gives up mid-body leaves the connection unusable.
+        self.close_connection = True
+        try:
+            if kind == "slow":
+                self.write_chunk(b"<html><head><title>Slow page</title></head><body>")
+                steps = 20
+                for i in range(steps):
+                    time.sleep(query.get("seconds", 5.0) / steps)
+                    self.write_chunk(f"<p>Paragraph {i} of a slow page.</p>".encode("utf-8"))
+                self.write_chunk(b"</body></html>")
+            else:
+                prefix = b"%PDF-1.7\n" if kind == "pdf" else b"<html><head><title>Huge page</title></head><body>"
+                self.write_chunk(prefix)
+                paragraph = b"<p>Paragraph about large language models and how they are trained.</p>"
+                block = paragraph * (self.chunk_bytes // len(paragraph))
+                for _ in range(int(query.get("mb", 50.0) * 1024 * 1024 // len(block))):
+                    self.write_chunk(block)
+                self.write_chunk(b"</body></html>")
+            self.write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client stopped reading: the point of the streaming fetch.
+
+
+class FakeGoogleSearch:
+    """
+    Drop-in for `serpapi.GoogleSearch` (assign it to `tools.GoogleSearch`) that sleeps `latency` and counts calls.
+
+    Every query returns the same links, except that the last `distinct_results`
+    of them are specific to the query, so different queries overlap partially.
+    Point `base_url` at an `HtmlFixtureHandler` server's /page to make the
+    links scrapeable.
+    """
+    latency = 0.2
+    calls = 0
+    distinct_results = 0
+    base_url = "https://example.com"
+    _lock = threading.Lock()
+
+    def __init__(self, params):
+        self.params = params
+
+    def link(self, i: int) -> str:
+        if i >= self.params["num"] - self.distinct_results:
+            return f"{self.base_url}/{'-'.join(self.params['q'].split())}/{i}"
+        return f"{self.base_url}/{i}"
+
+    def get_dict(self):
+        with FakeGoogleSearch._lock:
+            FakeGoogleSearch.calls += 1
+        time.sleep(self.latency)
+        return {"organic_results": [
+            {"title": f"{self.params['q']} #{i}", "link": self.link(i), "snippet": "..."}
+            for i in range(self.params["num"])
+        ]}
+
+
+@contextmanager
+def serve(handler_cls, handshake_delay: float = 0.0):
+    """Run `handler_cls` on a background StubServer for the duration of the block."""
+    server = StubServer(handler_cls, handshake_delay=handshake_delay)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
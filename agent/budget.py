@@ -0,0 +1,104 @@
+import os
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional
+
+from utils import estimate_tokens
+
+
+@dataclass(slots=True)
+class Usage:
+    """What a research run has spent so far; kept in `AgentGraph["usage"]` and replaced, never mutated."""
+    started_at: float
+    iterations: int = 0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def as_dict(self, budget: "Budget" = None) -> Dict[str, Any]:
+        budget = budget or Budget.from_env()
+        return {
+            "iterations": self.iterations,
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost": round(budget.cost(self), 6),
+            "seconds": round(time.time() - self.started_at, 3),
+        }
+
+
+def start_usage(usage: Optional[Usage]) -> Usage:
+    return usage if usage is not None else Usage(started_at=time.time())
+
+
+def add_llm_call(usage: Optional[Usage], messages, response) -> Usage:
+    """
+    Add one model call to `usage`.
+
+    Uses the provider's token counts from `response_metadata["token_usage"]`
+    when present (non-streaming calls) and the chars/4 estimate otherwise.
+    """
+    usage = start_usage(usage)
+    counts = getattr(response, "response_metadata", {}).get("token_usage") or {}
+    prompt = counts.get("prompt_tokens")
+    completion = counts.get("completion_tokens")
+    if prompt is None:
+        prompt = sum(estimate_tokens(message["content"]) for message in messages)
+    if completion is None:
+        completion = estimate_tokens(str(response.content))
+    return replace(
+        usage,
+        llm_calls=usage.llm_calls + 1,
+        prompt_tokens=usage.prompt_tokens + prompt,
+        completion_tokens=usage.completion_tokens + completion,
+    )
+
+
+@dataclass(slots=True)
+class Budget:
+    """
+    Limits for one research run; 0 disables a limit.
+
+    Checked by the router after every review, so a run can overshoot by at
+    most one planner-to-reviewer loop.
+    """
+    max_iterations: int = 3
+    max_tokens: int = 0
+    max_seconds: float = 300
+    max_cost: float = 0
+    # USD per million tokens, for `max_cost`.
+    prompt_price: float = 0.59
+    completion_price: float = 0.79
+
+    @classmethod
+    def from_env(cls) -> "Budget":
+        """RUN_MAX_ITERATIONS, RUN_MAX_TOKENS, RUN_MAX_SECONDS, RUN_MAX_COST and the GROQ_PRICE_* rates."""
+        return cls(
+            max_iterations=int(os.getenv("RUN_MAX_ITERATIONS", "3")),
+            max_tokens=int(os.getenv("RUN_MAX_TOKENS", "0")),
+            max_seconds=float(os.getenv("RUN_MAX_SECONDS", "300")),
+            max_cost=float(os.getenv("RUN_MAX_COST", "0")),
+            prompt_price=float(os.getenv("GROQ_PRICE_PROMPT_PER_MTOK", "0.59")),
+            completion_price=float(os.getenv("GROQ_PRICE_COMPLETION_PER_MTOK", "0.79")),
+        )
+
+    def cost(self, usage: Usage) -> float:
+        return (usage.prompt_tokens * self.prompt_price + usage.completion_tokens * self.completion_price) / 1e6
+
+    def exhausted(self, usage: Optional[Usage]) -> Optional[str]:
+        """The first limit `usage` has reached, or None while the run may continue."""
+        if usage is None:
+            return None
+        if self.max_iterations and usage.iterations >= self.max_iterations:
+            return f"max_iterations ({self.max_iterations})"
+        if self.max_tokens and usage.total_tokens >= self.max_tokens:
+            return f"max_tokens ({self.max_tokens})"
+        if self.max_seconds and time.time() - usage.started_at >= self.max_seconds:
+            return f"max_seconds ({self.max_seconds:g})"
+        if self.max_cost and self.cost(usage) >= self.max_cost:
+            return f"max_cost ({self.max_cost:g})"
+        return None
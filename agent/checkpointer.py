@@ -0,0 +1,374 @@
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from budget import Usage
+from payloads import LocalPage, Plan, Report, Review, Route, ScrapeResult, Selection
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_id TEXT,
+    checkpoint_hash TEXT NOT NULL,
+    metadata_hash TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS channels (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    blob_hash TEXT,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    blob_hash TEXT NOT NULL,
+    task_path TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    compressed INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+# State types LangGraph's msgpack serializer may rebuild on load, on top of its own safe types.
+ALLOWED_TYPES = [(cls.__module__, cls.__name__) for cls in (Plan, Selection, LocalPage, ScrapeResult, Report, Review, Route, Usage)]
+
+# Serialized values smaller than this are stored as-is; compressing them costs more than it saves.
+_COMPRESS_MIN_BYTES = 512
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    LangGraph checkpointer that snapshots `AgentGraph` into a local SQLite file.
+
+    Every serialized value (channel snapshot, pending write, checkpoint header,
+    metadata) is stored once per content hash and zlib-compressed, so the
+    scraped pages and message lists that every node copies forward are not
+    duplicated across checkpoints or threads. Compile the graph with it and
+    pass `{"configurable": {"thread_id": ...}}`; invoking the same thread
+    again with `None` as the input resumes after the last completed node.
+    """
+
+    def __init__(self, path: str, compress_level: int = 6, serde=None):
+        super().__init__(serde=serde or JsonPlusSerializer(allowed_msgpack_modules=ALLOWED_TYPES))
+        self.path = path
+        self.compress_level = compress_level
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _store(self, conn: sqlite3.Connection, value: Any) -> str:
+        type_, data = self.serde.dumps_typed(value)
+        digest = hashlib.sha1(type_.encode() + b"\0" + data).hexdigest()
+        if conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is None:
+            compressed = len(data) >= _COMPRESS_MIN_BYTES
+            if compressed:
+                data = zlib.compress(data, self.compress_level)
+            conn.execute(
+                "INSERT OR IGNORE INTO blobs (hash, type, compressed, data) VALUES (?, ?, ?, ?)",
+                (digest, type_, int(compressed), data),
+            )
+        return digest
+
+    def _load(self, conn: sqlite3.Connection, digest: str) -> Any:
+        type_, compressed, data = conn.execute(
+            "SELECT type, compressed, data FROM blobs WHERE hash = ?", (digest,)
+        ).fetchone()
+        if compressed:
+            data = zlib.decompress(data)
+        return self.serde.loads_typed((type_, data))
+
+    def _tuple(self, conn: sqlite3.Connection, row: Tuple) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_hash, metadata_hash = row
+        checkpoint = self._load(conn, checkpoint_hash)
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = conn.execute(
+                "SELECT blob_hash FROM channels "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if blob and blob[0]:
+                channel_values[channel] = self._load(conn, blob[0])
+        writes = conn.execute(
+            "SELECT task_id, channel, blob_hash FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+        def config_for(cid):
+            return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": cid}}
+
+        return CheckpointTuple(
+            config=config_for(checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self._load(conn, metadata_hash),
+            parent_config=config_for(parent_id) if parent_id else None,
+            pending_writes=[(task_id, channel, self._load(conn, digest)) for task_id, channel, digest in writes],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        conn = self._connect()
+        columns = "thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_hash, metadata_hash"
+        if checkpoint_id:
+            row = conn.execute(
+                f"SELECT {columns} FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+        else:
+            row = conn.execute(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+        return self._tuple(conn, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config:
+            configurable = config["configurable"]
+            clauses.append("thread_id = ?")
+            params.append(configurable["thread_id"])
+            if configurable.get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(configurable["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_hash, metadata_hash "
+            f"FROM checkpoints {where} ORDER BY checkpoint_id DESC",
+            params,
+        ).fetchall()
+        for row in rows:
+            if filter:
+                metadata = self._load(conn, row[5])
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield self._tuple(conn, row)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        header = dict(checkpoint)
+        values = header.pop("channel_values")
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for channel, version in new_versions.items():
+                digest = self._store(conn, values[channel]) if channel in values else None
+                conn.execute(
+                    "INSERT OR REPLACE INTO channels VALUES (?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, str(version), digest),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    configurable.get("checkpoint_id"),
+                    self._store(conn, header),
+                    self._store(conn, get_checkpoint_metadata(config, metadata)),
+                ),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        key = (configurable["thread_id"], configurable.get("checkpoint_ns", ""), configurable["checkpoint_id"])
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                # Special writes (errors, interrupts) overwrite; regular ones are written once.
+                verb = "INSERT OR REPLACE" if idx < 0 else "INSERT OR IGNORE"
+                conn.execute(
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (*key, task_id, idx, channel, self._store(conn, value), task_path),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Drop a thread's checkpoints and any blobs no other thread still references."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in ("checkpoints", "channels", "writes"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            conn.execute(
+                "DELETE FROM blobs WHERE hash NOT IN ("
+                "SELECT blob_hash FROM channels WHERE blob_hash IS NOT NULL "
+                "UNION SELECT blob_hash FROM writes "
+                "UNION SELECT checkpoint_hash FROM checkpoints "
+                "UNION SELECT metadata_hash FROM checkpoints)"
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        """Checkpoint count and stored (compressed) bytes, for benchmarks and housekeeping."""
+        conn = self._connect()
+        checkpoints, threads = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT thread_id) FROM checkpoints"
+        ).fetchone()
+        blobs, stored_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()
+        return {"threads": threads, "checkpoints": checkpoints, "blobs": blobs, "stored_bytes": stored_bytes}
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items: List[CheckpointTuple] = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # Same scheme as LangGraph's in-memory saver: zero-padded counter plus a random tiebreak.
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+_checkpointer: Optional[SqliteCheckpointSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> Optional[SqliteCheckpointSaver]:
+    """
+    Return the process-wide checkpointer, or None when checkpointing is off.
+
+    Enabled by pointing CHECKPOINT_PATH at a SQLite file; it is off by default
+    because a checkpointed graph requires a thread_id on every call.
+    """
+    global _checkpointer
+    if _checkpointer is None:
+        path = os.getenv("CHECKPOINT_PATH", "")
+        if not path:
+            return None
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                _checkpointer = SqliteCheckpointSaver(path)
+    return _checkpointer
@@ -0,0 +1,316 @@
+"""
+Cache of chat completions in front of `GroqJsonModel` and `GroqModel`.
+
+Entries are keyed on a hash of (model, temperature, output mode, normalized
+messages) and hold the provider's response JSON, so a hit is turned back into
+an `AIMessage` by the same `_to_message` as a fresh reply. Normalizing
+collapses whitespace and cuts the prompts' `%Y-%m-%d %H:%M:%S` clock down to
+the date, so the timestamp in every prompt does not make each one unique.
+
+With a similarity threshold set, a miss falls back to near-duplicates: entries
+whose messages match except for the last user message, and whose user message
+is at least that cosine-similar (hashed bag of words, see `local_index.embed`).
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+_TIMESTAMP_RE = re.compile(r"\b(\d{4}-\d{2}-\d{2}) \d{2}:\d{2}:\d{2}\b")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    shape TEXT NOT NULL,
+    vector BLOB,
+    response TEXT NOT NULL,
+    latency_ms REAL NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS completions_shape ON completions (shape);
+CREATE INDEX IF NOT EXISTS completions_accessed_at ON completions (accessed_at);
+"""
+
+
+def normalize_messages(messages: Sequence[Dict[str, str]]) -> List[Tuple[str, str]]:
+    """(role, content) pairs with whitespace collapsed and prompt timestamps cut to the date."""
+    return [
+        (message["role"], _TIMESTAMP_RE.sub(r"\1", " ".join(str(message["content"]).split())))
+        for message in messages
+    ]
+
+
+def _last_user(normalized: List[Tuple[str, str]]) -> int:
+    for i in range(len(normalized) - 1, -1, -1):
+        if normalized[i][0] == "user":
+            return i
+    return -1
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def completion_keys(model: str, temperature: float, json_mode: bool, messages) -> Tuple[str, str, str]:
+    """
+    The exact key, the near-duplicate group key and the question text for a request.
+
+    The group key hashes everything but the last user message, which is
+    returned as the text to compare for near-duplicates.
+    """
+    normalized = normalize_messages(messages)
+    exact = _digest(model, temperature, json_mode, normalized)
+    user = _last_user(normalized)
+    question = normalized[user][1] if user >= 0 else ""
+    rest = [message for i, message in enumerate(normalized) if i != user]
+    return exact, _digest(model, temperature, json_mode, rest), question
+
+
+class MemoryCompletionStore:
+    """In-process LRU of completions with a TTL and an entry bound."""
+
+    def __init__(self, ttl: float = 86400, max_entries: int = 4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (stored_at, shape, vector, response, latency_ms)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _fresh(self, key: str) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl and time.time() - entry[0] >= self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        with self._lock:
+            entry = self._fresh(key)
+            return (entry[3], entry[4]) if entry else None
+
+    def similar(self, shape: str, vector: "np.ndarray", threshold: float) -> Optional[Tuple[Dict[str, Any], float]]:
+        with self._lock:
+            best, best_score = None, threshold
+            for key, entry in list(self._entries.items()):
+                if entry[1] != shape or entry[2] is None:
+                    continue
+                score = float(entry[2] @ vector)
+                if score >= best_score and self._fresh(key):
+                    best, best_score = entry, score
+            return (best[3], best[4]) if best else None
+
+    def put(self, key: str, shape: str, vector: Optional["np.ndarray"], response: Dict[str, Any], latency_ms: float):
+        with self._lock:
+            self._entries[key] = (time.time(), shape, vector, response, latency_ms)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteCompletionStore:
+    """
+    On-disk completion store shared by every worker process on the host.
+
+    Least recently used entries beyond `max_entries` are evicted on write;
+    expired entries are skipped on read and evicted with them.
+    """
+
+    def __init__(self, path: str, ttl: float = 86400, max_entries: int = 4096):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _oldest(self) -> float:
+        return time.time() - self.ttl if self.ttl else 0.0
+
+    def _touch(self, conn: sqlite3.Connection, key: str) -> None:
+        conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (time.time(), key))
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT response, latency_ms FROM completions WHERE key = ? AND stored_at >= ?",
+            (key, self._oldest()),
+        ).fetchone()
+        if row is None:
+            return None
+        self._touch(conn, key)
+        return json.loads(row[0]), row[1]
+
+    def similar(self, shape: str, vector: "np.ndarray", threshold: float) -> Optional[Tuple[Dict[str, Any], float]]:
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT key, vector FROM completions WHERE shape = ? AND vector IS NOT NULL AND stored_at >= ?",
+            (shape, self._oldest()),
+        ).fetchall()
+        if not rows:
+            return None
+        import numpy as np
+
+        vectors = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32).reshape(len(rows), -1)
+        scores = vectors @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < threshold:
+            return None
+        return self.get(rows[best][0])
+
+    def put(self, key: str, shape: str, vector: Optional["np.ndarray"], response: Dict[str, Any], latency_ms: float):
+        now = time.time()
+        blob = vector.astype("float32").tobytes() if vector is not None else None
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions "
+                "(key, shape, vector, response, latency_ms, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, shape, blob, json.dumps(response), latency_ms, now, now),
+            )
+            conn.execute("DELETE FROM completions WHERE stored_at < ?", (self._oldest(),))
+            conn.execute(
+                "DELETE FROM completions WHERE key IN ("
+                "SELECT key FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM completions")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+
+class CompletionCache:
+    """
+    Completion lookups and per-agent statistics over a store.
+
+    Args:
+        store: A `MemoryCompletionStore` or `SqliteCompletionStore`.
+        similarity (float): Cosine threshold for near-duplicate questions; 0 disables them.
+    """
+
+    def __init__(self, store, similarity: float = 0.0):
+        self.store = store
+        self.similarity = similarity
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"hits": 0, "near_hits": 0, "misses": 0, "saved_ms": 0.0}
+        )
+
+    def _vector(self, question: str) -> Optional["np.ndarray"]:
+        if not self.similarity or not question:
+            return None
+        # numpy comes in with local_index, and only once near-duplicate matching is on.
+        from local_index import embed
+
+        return embed([question])[0]
+
+    def _count(self, agent: Optional[str], field: str, saved_ms: float = 0.0) -> None:
+        with self._lock:
+            stats = self._stats[agent or "unnamed"]
+            stats[field] += 1
+            stats["saved_ms"] += saved_ms
+
+    def lookup(self, model: str, temperature: float, json_mode: bool, messages, agent: str = None):
+        """The cached response JSON for this request, or None (counted as a miss for `agent`)."""
+        exact, shape, question = completion_keys(model, temperature, json_mode, messages)
+        found = self.store.get(exact)
+        if found is not None:
+            self._count(agent, "hits", found[1])
+            return found[0]
+        vector = self._vector(question)
+        if vector is not None:
+            found = self.store.similar(shape, vector, self.similarity)
+            if found is not None:
+                self._count(agent, "near_hits", found[1])
+                return found[0]
+        self._count(agent, "misses")
+        return None
+
+    def put(self, model: str, temperature: float, json_mode: bool, messages, response: Dict[str, Any], latency_ms: float):
+        exact, shape, question = completion_keys(model, temperature, json_mode, messages)
+        self.store.put(exact, shape, self._vector(question), response, latency_ms)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per agent: hits, near_hits, misses, hit_rate and saved_ms (original latency of every hit)."""
+        with self._lock:
+            stats = {agent: dict(values) for agent, values in self._stats.items()}
+        for values in stats.values():
+            lookups = values["hits"] + values["near_hits"] + values["misses"]
+            values["hit_rate"] = (values["hits"] + values["near_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+_cache: Optional[CompletionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_completion_cache() -> Optional[CompletionCache]:
+    """
+    Return the process-wide completion cache, or None when it is disabled.
+
+    Configured through COMPLETION_CACHE ("memory" or "sqlite"; unset or empty
+    disables it), COMPLETION_CACHE_PATH (for sqlite), COMPLETION_CACHE_TTL
+    (seconds), COMPLETION_CACHE_MAX_ENTRIES and COMPLETION_CACHE_SIMILARITY
+    (cosine threshold for near-duplicate questions, 0 for exact matches only).
+    """
+    global _cache
+    if _cache is None:
+        backend = os.getenv("COMPLETION_CACHE", "")
+        if not backend:
+            return None
+        with _cache_lock:
+            if _cache is None:
+                ttl = float(os.getenv("COMPLETION_CACHE_TTL", "86400"))
+                max_entries = int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", "4096"))
+                if backend == "sqlite":
+                    path = os.getenv(
+                        "COMPLETION_CACHE_PATH",
+                        os.path.expanduser("~/.cache/focusaider/completions.sqlite3"),
+                    )
+                    store = SqliteCompletionStore(path, ttl=ttl, max_entries=max_entries)
+                elif backend == "memory":
+                    store = MemoryCompletionStore(ttl=ttl, max_entries=max_entries)
+                else:
+                    raise ValueError(f"Unknown COMPLETION_CACHE backend {backend!r}; expected 'memory' or 'sqlite'")
+                _cache = CompletionCache(store, similarity=float(os.getenv("COMPLETION_CACHE_SIMILARITY", "0")))
+    return _cache
@@ -0,0 +1,19 @@
+"""
+One-time configuration loading.
+
+Settings are read from the environment where they are used; `load_env` fills
+the environment from a `.env` file first. It runs once per process, on the
+first call from an entry point (`graph.build_workflow`, `batch.main`) or from
+code that needs a credential (`llm_backend.get_backend`, `llm_backend.route`,
+`tools.serpapi_organic_results`) instead of at import time. Variables already
+set in the environment win.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def load_env() -> bool:
+    """Load `.env` into os.environ once; returns whether a file was found."""
+    from dotenv import load_dotenv
+
+    return load_dotenv()
@@ -0,0 +1,142 @@
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+
+from utils import estimate_tokens
+
+
+_TOKEN_RE = re.compile(r"\w+")
+PAGE_SEPARATOR = "\n---\n"
+
+
+def _terms(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def split_page(page: str) -> Tuple[str, str]:
+    """Split one `format_scraped_content` entry into its header lines and its content."""
+    marker = "\nContent: "
+    index = page.find(marker)
+    if index == -1:
+        return "", page
+    return page[:index + len(marker)], page[index + len(marker):]
+
+
+def chunk_text(text: str, max_words: int = 120) -> List[str]:
+    """
+    Split text into chunks of at most `max_words` words, preferring line boundaries.
+
+    The extractors emit one line per block, so chunks usually hold whole
+    paragraphs, list items or table rows.
+    """
+    chunks = []
+    current: List[str] = []
+    for line in text.splitlines():
+        words = line.split()
+        while len(words) > max_words:
+            if current:
+                chunks.append(" ".join(current))
+                current = []
+            chunks.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+        if current and len(current) + len(words) > max_words:
+            chunks.append(" ".join(current))
+            current = []
+        current.extend(words)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def bm25_scores(query: str, chunks: List[str], k1: float = 1.5, b: float = 0.75) -> np.ndarray:
+    """
+    Score each chunk against `query` with Okapi BM25.
+
+    Only the query's terms are counted, so the term-frequency matrix is
+    (chunks x query terms) and the scoring itself is a few NumPy operations.
+    """
+    query_terms = sorted(set(_terms(query)))
+    if not chunks or not query_terms:
+        return np.zeros(len(chunks))
+
+    column = {term: i for i, term in enumerate(query_terms)}
+    tf = np.zeros((len(chunks), len(query_terms)))
+    lengths = np.empty(len(chunks))
+    for row, chunk in enumerate(chunks):
+        terms = _terms(chunk)
+        lengths[row] = len(terms)
+        for term in terms:
+            col = column.get(term)
+            if col is not None:
+                tf[row, col] += 1
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((len(chunks) - df + 0.5) / (df + 0.5) + 1.0)
+    norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1.0))
+    return ((tf * (k1 + 1)) / (tf + norm[:, None])) @ idf
+
+
+@dataclass
+class Reduction:
+    text: str
+    original_tokens: int
+    reduced_tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.reduced_tokens
+
+
+def reduce_research(question: str, research: str, token_budget: int, max_words: int = 120) -> Reduction:
+    """
+    Keep the chunks of the scraped research most relevant to `question`, within `token_budget`.
+
+    Each page's header (URL, title, status) is kept so the reporter can still
+    cite it. Chunks are ranked across all pages with BM25, packed greedily
+    until the budget is used, then put back in their original page order.
+
+    Args:
+        question (str): The research question used as the ranking query.
+        research (str): Scraper output, one or more pages joined by "\\n---\\n".
+        token_budget (int): Maximum estimated tokens for the reduced research.
+        max_words (int, optional): Chunk size in words. Defaults to 120.
+
+    Returns:
+        Reduction: The reduced text and its before/after token estimates.
+    """
+    original_tokens = estimate_tokens(research)
+    if original_tokens <= token_budget:
+        return Reduction(research, original_tokens, original_tokens)
+
+    pages = [split_page(page) for page in research.split(PAGE_SEPARATOR)]
+    chunks = []
+    for page_index, (_, content) in enumerate(pages):
+        for chunk in chunk_text(content, max_words):
+            chunks.append((page_index, chunk))
+
+    scores = bm25_scores(question, [chunk for _, chunk in chunks])
+    used = sum(estimate_tokens(header) for header, _ in pages)
+    selected = set()
+    # Stable sort keeps document order between equally scored chunks.
+    for i in np.argsort(-scores, kind="stable"):
+        cost = estimate_tokens(chunks[i][1]) + 1
+        if used + cost > token_budget:
+            continue
+        selected.add(int(i))
+        used += cost
+
+    kept = [[] for _ in pages]
+    for i in sorted(selected):
+        page_index, chunk = chunks[i]
+        kept[page_index].append(chunk)
+    text = PAGE_SEPARATOR.join(
+        header + "\n".join(page_chunks)
+        for (header, _), page_chunks in zip(pages, kept)
+        if page_chunks
+    )
+    if not text:
+        # Not even one chunk fits next to the headers: fall back to a hard cut.
+        text = research[:token_budget * 4]
+    return Reduction(text, original_tokens, estimate_tokens(text))
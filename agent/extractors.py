@@ -0,0 +1,216 @@
+import importlib.util
+import os
+from html.parser import HTMLParser
+from typing import Dict, Optional, Tuple
+
+
+# Subtrees that never carry article text.
+SKIP_TAGS = frozenset({
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "header", "footer", "aside", "form", "button", "select",
+})
+
+# Tags that start or end a block of text. Text between boundaries is one block.
+BLOCK_TAGS = frozenset({
+    "p", "div", "section", "article", "main", "blockquote", "pre", "br", "hr",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+    "ul", "ol", "li", "dl", "dt", "dd",
+    "table", "thead", "tbody", "tfoot", "tr", "td", "th", "caption",
+    "figure", "figcaption", "address", "details", "summary",
+})
+
+
+class TextCollector:
+    """
+    Parser target that turns start/end/data events into (title, text) without building a tree.
+
+    Text inside SKIP_TAGS is dropped, and each BLOCK_TAGS boundary starts a new
+    line, so lists, tables and headings keep their content. The title is the
+    first <title> outside SKIP_TAGS, so an inline <svg><title> cannot replace it.
+    """
+    __slots__ = ("blocks", "current", "title_parts", "skip_depth", "in_title", "title_seen")
+
+    def __init__(self):
+        self.blocks = []
+        self.current = []
+        self.title_parts = []
+        self.skip_depth = 0
+        self.in_title = False
+        self.title_seen = False
+
+    def start(self, tag, attrib=None):
+        tag = tag.lower()
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag == "title":
+            if self.skip_depth or self.title_seen:
+                # Any other <title> (an <svg> tooltip, a stray one in the body) is dropped like SKIP_TAGS.
+                self.skip_depth += 1
+            else:
+                self.in_title = True
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def end(self, tag):
+        tag = tag.lower()
+        if tag in SKIP_TAGS:
+            if self.skip_depth:
+                self.skip_depth -= 1
+        elif tag == "title":
+            if self.in_title:
+                self.in_title = False
+                self.title_seen = True
+            elif self.skip_depth:
+                self.skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def data(self, text):
+        if self.in_title:
+            self.title_parts.append(text)
+        elif not self.skip_depth:
+            self.current.append(text)
+
+    def _flush(self):
+        if self.current:
+            text = " ".join("".join(self.current).split())
+            if text:
+                self.blocks.append(text)
+            self.current = []
+
+    def close(self) -> Tuple[str, str]:
+        self._flush()
+        title = " ".join("".join(self.title_parts).split())
+        return title or "No title found", "\n".join(self.blocks)
+
+
+class _StdlibPageParser(HTMLParser):
+    """Feeds html.parser events into a TextCollector."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.collector = TextCollector()
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.collector.start(tag)
+        self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+    def close(self) -> Tuple[str, str]:
+        super().close()
+        return self.collector.close()
+
+
+class _BufferedPageParser:
+    """Collects fed text and hands the whole document to `parse` on close."""
+
+    def __init__(self, parse):
+        self.parse = parse
+        self.parts = []
+
+    def feed(self, text: str) -> None:
+        self.parts.append(text)
+
+    def close(self) -> Tuple[str, str]:
+        return self.parse("".join(self.parts))
+
+
+def _parse_plain_text(text: str) -> Tuple[str, str]:
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "No title found", "\n".join(line for line in lines if line)
+
+
+def plain_text_parser() -> _BufferedPageParser:
+    """Parser with the extractor interface for text/plain bodies: one block per non-blank line."""
+    return _BufferedPageParser(_parse_plain_text)
+
+
+class Extractor:
+    """
+    Turns an HTML document into a (title, text) pair.
+
+    `parser()` returns an incremental parser with `feed(text)` and
+    `close() -> (title, text)`, so callers can extract while the body is still
+    downloading. `extract(html)` is the one-shot shortcut.
+    """
+    name = "base"
+
+    def parser(self):
+        raise NotImplementedError
+
+    def extract(self, html: str) -> Tuple[str, str]:
+        parser = self.parser()
+        parser.feed(html)
+        return parser.close()
+
+
+class StdlibExtractor(Extractor):
+    """Streaming extraction on the standard library's html.parser. No extra dependencies."""
+    name = "stdlib"
+
+    def parser(self):
+        return _StdlibPageParser()
+
+
+class LxmlExtractor(Extractor):
+    """Streaming extraction on libxml2's HTML parser via an lxml parser target."""
+    name = "lxml"
+
+    def parser(self):
+        from lxml import etree
+
+        return etree.HTMLParser(target=TextCollector(), recover=True, no_network=True)
+
+
+class SoupExtractor(Extractor):
+    """
+    The original BeautifulSoup extraction: the page title plus the text of every <p>.
+
+    Builds a full DOM, so it is the slowest option; kept as a fallback.
+    """
+    name = "soup"
+
+    def parser(self):
+        return _BufferedPageParser(self._parse)
+
+    @staticmethod
+    def _parse(html: str) -> Tuple[str, str]:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+        title = soup.title.string if soup.title else "No title found"
+        content = ' '.join([p.get_text() for p in soup.find_all('p')])
+        return title, content
+
+
+EXTRACTORS: Dict[str, Extractor] = {
+    extractor.name: extractor
+    for extractor in (LxmlExtractor(), StdlibExtractor(), SoupExtractor())
+}
+
+
+def get_extractor(name: Optional[str] = None) -> Extractor:
+    """
+    Return the extractor called `name`, or the configured default.
+
+    The default comes from SCRAPE_EXTRACTOR; without it, lxml is used when
+    installed and the stdlib parser otherwise.
+
+    Raises:
+        ValueError: If `name` is not a registered extractor.
+    """
+    name = name or os.getenv("SCRAPE_EXTRACTOR")
+    if not name:
+        name = "lxml" if importlib.util.find_spec("lxml") is not None else "stdlib"
+    try:
+        return EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown extractor {name!r}. Choose one of: {', '.join(EXTRACTORS)}")
@@ -1,30 +1,154 @@
-from agents import planner_agent, serper_tool, selector_agent,scraper_agent,reporter_agent
-from state import AgentGraph,state
-from langgraph.graph import StateGraph, END
+import uuid
+from functools import lru_cache
 
+from config import load_env
 
 
-workflow  = StateGraph(AgentGraph)
-workflow.add_node("planner_agent", planner_agent)
-workflow.add_node("serper_tool", serper_tool)
-workflow.add_node("selector_agent", selector_agent)
-workflow.add_node("scraper_agent", scraper_agent)
-workflow.add_node("reporter_agent", reporter_agent)
-workflow.set_entry_point("planner_agent")
-workflow.add_edge("planner_agent", "serper_tool")
-workflow.add_edge("serper_tool", "selector_agent")
-workflow.add_edge("selector_agent", "scraper_agent")
-workflow.add_edge("scraper_agent", "reporter_agent")
-workflow.add_edge("reporter_agent", END)
+def build_workflow(use_async: bool = False) -> "StateGraph":
+    """
+    Wire the research pipeline.
 
+    With `use_async=True` every I/O-bound node is the coroutine variant from `agents`,
+    so the compiled graph is driven through `ainvoke`/`astream` and many runs can share
+    one event loop. `content_reducer` and `final_report` are CPU-only and shared by both variants.
 
-graph = workflow.compile()
+    After each report the reviewer scores it and the router sends the run back to the
+    planner, selector or reporter, or on to `final_report`. The router finishes the run
+    without a model call once the review passes or the `budget.Budget` is spent.
+    Every node is wrapped by `instrumentation.instrument_node`, which is a
+    pass-through unless instrumentation is enabled.
 
-iterations = 10
+    The agents and LangGraph are imported here rather than with this module, so
+    importing `graph` stays cheap until a workflow is actually needed.
+    """
+    from langgraph.graph import StateGraph, END
+
+    from agents import planner_agent, serper_tool, selector_agent, scraper_agent, reporter_agent
+    from agents import aplanner_agent, aserper_tool, aselector_agent, ascraper_agent, areporter_agent
+    from agents import reviewer_agent, router_agent, areviewer_agent, arouter_agent
+    from agents import content_reducer, final_report, next_agent
+    from instrumentation import instrument_node
+    from state import AgentGraph
+
+    load_env()
+    if use_async:
+        nodes = (aplanner_agent, aserper_tool, aselector_agent, ascraper_agent, areporter_agent,
+                 areviewer_agent, arouter_agent)
+    else:
+        nodes = (planner_agent, serper_tool, selector_agent, scraper_agent, reporter_agent,
+                 reviewer_agent, router_agent)
+    planner, serper, selector, scraper, reporter, reviewer, router = nodes
+
+    workflow  = StateGraph(AgentGraph)
+    for name, node in (
+        ("planner_agent", planner),
+        ("serper_tool", serper),
+        ("selector_agent", selector),
+        ("scraper_agent", scraper),
+        ("content_reducer", content_reducer),
+        ("reporter_agent", reporter),
+        ("reviewer_agent", reviewer),
+        ("router_agent", router),
+        ("final_report", final_report),
+    ):
+        workflow.add_node(name, instrument_node(name, node))
+    workflow.set_entry_point("planner_agent")
+    workflow.add_edge("planner_agent", "serper_tool")
+    workflow.add_edge("serper_tool", "selector_agent")
+    workflow.add_edge("selector_agent", "scraper_agent")
+    workflow.add_edge("scraper_agent", "content_reducer")
+    workflow.add_edge("content_reducer", "reporter_agent")
+    workflow.add_edge("reporter_agent", "reviewer_agent")
+    workflow.add_edge("reviewer_agent", "router_agent")
+    workflow.add_conditional_edges(
+        "router_agent",
+        next_agent,
+        {
+            "planner": "planner_agent",
+            "selector": "selector_agent",
+            "reporter": "reporter_agent",
+            "final_report": "final_report",
+        },
+    )
+    workflow.add_edge("final_report", END)
+    return workflow
+
+
+def research_input(compiled, question: str, config: dict):
+    """
+    Input for `compiled.stream`/`astream` on the thread in `config`.
+
+    Returns None, which makes LangGraph resume from the last checkpoint, when
+    the thread was interrupted part-way through; otherwise a fresh question.
+
+    A fresh question on a thread that already finished one clears that run's
+    usage, decoded node outputs (so the reviewer's feedback too) and the
+    report/selection histories. The *_response message lists are append-only
+    (`add_messages`) and the nodes only read their newest entry, so they stay.
+    """
+    if compiled.checkpointer is not None and compiled.get_state(config).next:
+        return None
+    return {
+        "research_question": question,
+        "research_context": "",
+        "research_tokens_saved": 0,
+        "selection_history": [],
+        "report_history": [],
+        "plan": None,
+        "selection": None,
+        "local_pages": None,
+        "scrape": None,
+        "report": None,
+        "review": None,
+        "route": None,
+        "usage": None,
+    }
+
+
+def new_thread_id(prefix: str = "run") -> str:
+    """
+    A checkpoint thread id no other run shares.
+
+    Every new question gets one; pass an earlier id only to resume that run.
+    """
+    return f"{prefix}-{uuid.uuid4().hex}"
+
+
+def get_graph(use_async: bool = False):
+    """
+    The compiled research graph (the `ainvoke`/`astream` variant with `use_async=True`),
+    built on first use and shared by the rest of the process.
+
+    Checkpointing is opt-in (CHECKPOINT_PATH); with it on, callers must pass a thread_id.
+    """
+    return _compiled(bool(use_async))
+
+
+@lru_cache(maxsize=None)
+def _compiled(use_async: bool):
+    from checkpointer import get_checkpointer
+
+    return build_workflow(use_async).compile(checkpointer=get_checkpointer())
+
+
+def __getattr__(name):
+    # `from graph import graph` still works; the graph is compiled on that first access.
+    if name == "graph":
+        return get_graph()
+    if name == "async_graph":
+        return get_graph(use_async=True)
+    if name == "workflow":
+        return build_workflow()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# A LangGraph backstop only; budget.Budget (RUN_MAX_ITERATIONS etc.) normally ends the run first.
+iterations = 50
 
 if __name__ == "__main__":
 
     verbose = False
+    graph = get_graph()
 
     while True:
         print("Please enter your research question: what is LLM?")
@@ -32,9 +156,8 @@ if __name__ == "__main__":
         if query.lower() == "exit":
             break
 
-        dict_inputs = {"research_question": query}
-        # thread = {"configurable": {"thread_id": "4"}}
-        limit = {"recursion_limit": iterations}
+        limit = {"recursion_limit": iterations, "configurable": {"thread_id": new_thread_id("cli")}}
+        dict_inputs = research_input(graph, query, limit)
 
         # for event in workflow.stream(
         #     dict_inputs, thread, limit, stream_mode="values"
@@ -1,113 +1,383 @@
+import asyncio
+import httpx
 import requests
 import json
-import os 
-from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-load_dotenv()
-
-class GroqJsonModel:
-    def __init__(self, temperature=0.3, model="llama-3.1-70b-versatile"):
-        self.api_key = os.getenv("GROQ_API_KEY")
+import time
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, SystemMessage
+import instrumentation
+from completion_cache import SqliteCompletionStore, get_completion_cache
+from llm_backend import route
+
+def _error_message(error):
+    """The `{"error": ...}` message both models return instead of raising, pre-parsed like a JSON reply."""
+    parsed = {"error": error}
+    return AIMessage(content=json.dumps(parsed), additional_kwargs={"parsed": parsed})
+
+
+def parsed_json(message):
+    """The JSON object behind a `GroqJsonModel` message, decoding `content` only if it was not kept."""
+    parsed = message.additional_kwargs.get("parsed")
+    if parsed is None:
+        parsed = json.loads(message.content)
+    return parsed
+
+
+def _cached_response(model, messages, json_mode):
+    """The cached response JSON for this request, or None when there is no cache or no entry."""
+    cache = get_completion_cache()
+    if cache is None:
+        return None
+    with instrumentation.span("groq.chat.cache", "cache", model=model.model) as sp:
+        response_json = cache.lookup(model.model, model.temperature, json_mode, messages, agent=model.name)
+        sp.set(cache="miss" if response_json is None else "hit")
+    if response_json is None:
+        return None
+    # A hit spends no tokens, so run budgets must not be charged for it.
+    return {**response_json, "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}}
+
+
+def _cache_response(model, messages, json_mode, response_json, started):
+    cache = get_completion_cache()
+    if cache is not None:
+        latency_ms = (time.perf_counter() - started) * 1000
+        cache.put(model.model, model.temperature, json_mode, messages, response_json, latency_ms)
+
+
+def _cache_blocks():
+    """Whether completion cache calls touch disk: the SQLite store does, the in-memory one does not."""
+    cache = get_completion_cache()
+    return cache is not None and isinstance(cache.store, SqliteCompletionStore)
+
+
+async def _acached_response(model, messages, json_mode):
+    """Async `_cached_response`; a SQLite lookup runs on a worker thread so it never blocks the event loop."""
+    if _cache_blocks():
+        return await asyncio.to_thread(_cached_response, model, messages, json_mode)
+    return _cached_response(model, messages, json_mode)
+
+
+async def _acache_response(model, messages, json_mode, response_json, started):
+    """Async `_cache_response`, off the event loop for a SQLite store like `_acached_response`."""
+    if _cache_blocks():
+        await asyncio.to_thread(_cache_response, model, messages, json_mode, response_json, started)
+    else:
+        _cache_response(model, messages, json_mode, response_json, started)
+
+
+def _text_response(content, usage=None):
+    """Response JSON for a streamed completion, so it can be cached like a regular one."""
+    return {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}], "usage": usage or {}}
+
+
+async def _replay(content):
+    yield content
+
+
+def _langchain_messages(messages):
+    types = {"system": SystemMessage, "user": HumanMessage, "assistant": AIMessage}
+    return [types.get(msg["role"], HumanMessage)(content=msg["content"]) for msg in messages]
+
+class _ChatModel:
+    """
+    What both models share: backend routing and the request payload.
+
+    Args:
+        temperature (float): Sampling temperature.
+        model (str, optional): Model name; defaults to the agent's route (see `llm_backend.route`).
+        name (str, optional): The calling agent. Picks the backend and model and
+            labels completion cache statistics.
+        backend (optional): A backend to use instead of the agent's route.
+    """
+    json_mode = False
+
+    def __init__(self, temperature=0.3, model=None, name=None, backend=None):
         self.temperature = temperature
-        self.model = model
-        self.model_endpoint = "https://api.groq.com/openai/v1/chat/completions"
-        self.headers = {
-            'Content-Type': 'application/json', 
-            'Authorization': f'Bearer {self.api_key}'
-        }
+        self.name = name
+        routed_backend, self.model = route(name, model)
+        self.backend = backend or routed_backend
 
-    def invoke(self, messages):
+    def _payload(self, messages):
         # Properly format messages for the API call
-        messages_call = []
-        for msg in messages:
-            messages_call.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
-
         payload = {
             "model": self.model,
-            "messages": messages_call,
+            "messages": [{"role": msg["role"], "content": msg["content"]} for msg in messages],
             "temperature": self.temperature,
-            "response_format": {"type": "json_object"}
         }
+        if self.json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        return payload
 
-        try:
-            response = requests.post(
-                self.model_endpoint, 
-                headers=self.headers, 
-                json=payload
-            )
-            response.raise_for_status()
-            
-            response_json = response.json()
-            
-            if 'choices' not in response_json or len(response_json['choices']) == 0:
-                raise ValueError("No choices in response")
-                
-            content = response_json['choices'][0]['message']['content']
+    def _span(self, **attrs):
+        return instrumentation.span("groq.chat", "llm", model=self.model, backend=self.backend.name, **attrs)
+
+
+class GroqJsonModel(_ChatModel):
+    json_mode = True
+
+    def _to_message(self, response_json):
+        if 'choices' not in response_json or len(response_json['choices']) == 0:
+            raise ValueError("No choices in response")
             
-            # Attempt to parse the content as JSON
-            try:
-                parsed_content = json.loads(content)
-                # Convert the response to an AIMessage
-                return AIMessage(content=json.dumps(parsed_content))
-            except json.JSONDecodeError:
-                # If parsing fails, wrap the content in a JSON object
-                wrapped_content = {"response": content}
-                return AIMessage(content=json.dumps(wrapped_content))
+        content = response_json['choices'][0]['message']['content']
+        return self._json_message(content, response_json.get("usage"))
+
+    def _json_message(self, content, usage=None):
+        # Attempt to parse the content as JSON
+        try:
+            parsed_content = json.loads(content)
+        except json.JSONDecodeError:
+            # If parsing fails, wrap the content in a JSON object
+            parsed_content = {"response": content}
+            content = json.dumps(parsed_content)
+        # Keep the decoded object next to the text so downstream agents never re-parse it
+        return AIMessage(
+            content=content,
+            additional_kwargs={"parsed": parsed_content},
+            response_metadata={"token_usage": usage or {}},
+        )
+
+    def _stream_payload(self, messages):
+        # Groq's JSON mode cannot be combined with streaming, so streamed calls
+        # rely on the prompt asking for JSON; see `_streamed_message`.
+        payload = {**self._payload(messages), "stream": True}
+        del payload["response_format"]
+        return payload
+
+    def _streamed_message(self, tokens, usage=None):
+        content = "".join(tokens).strip()
+        # Without JSON mode the model may wrap the object in prose or a code fence.
+        start, end = content.find("{"), content.rfind("}")
+        if 0 <= start < end:
+            content = content[start:end + 1]
+        return self._json_message(content, usage)
+
+    def invoke_streaming(self, messages, on_token):
+        """
+        Like `invoke`, but streams the completion and calls `on_token(delta)` as it arrives.
+
+        Lets a caller act on a field (e.g. the planner's `search_term`) before
+        the rest of the object has been generated.
+        """
+        cached = _cached_response(self, messages, True)
+        if cached is not None:
+            content = cached["choices"][0]["message"]["content"]
+            on_token(content)
+            return self._streamed_message([content], cached["usage"])
+
+        payload = self._stream_payload(messages)
+        tokens = []
+        usage = {}
+        started = time.perf_counter()
+        try:
+            with self._span(stream=True) as sp:
+                for token in self.backend.stream(payload, sp, usage):
+                    tokens.append(token)
+                    on_token(token)
+            _cache_response(self, messages, True, _text_response("".join(tokens), usage), started)
+            return self._streamed_message(tokens, usage)
 
         except requests.RequestException as e:
-            error_content = {"error": f"Request error: {str(e)}"}
-            return AIMessage(content=json.dumps(error_content))
+            return _error_message(f"Request error: {str(e)}")
         except (ValueError, KeyError) as e:
-            error_content = {"error": f"Error in processing response: {str(e)}"}
-            return AIMessage(content=json.dumps(error_content))
+            return _error_message(f"Error in processing response: {str(e)}")
+
+    async def ainvoke_streaming(self, messages, on_token):
+        """Async counterpart of `invoke_streaming`; `on_token` is a plain callable."""
+        cached = await _acached_response(self, messages, True)
+        if cached is not None:
+            content = cached["choices"][0]["message"]["content"]
+            on_token(content)
+            return self._streamed_message([content], cached["usage"])
+
+        payload = self._stream_payload(messages)
+        tokens = []
+        usage = {}
+        started = time.perf_counter()
+        try:
+            with self._span(stream=True) as sp:
+                async for token in self.backend.astream(payload, sp, usage):
+                    tokens.append(token)
+                    on_token(token)
+            await _acache_response(self, messages, True, _text_response("".join(tokens), usage), started)
+            return self._streamed_message(tokens, usage)
+
+        except httpx.HTTPError as e:
+            return _error_message(f"Request error: {str(e)}")
+        except (ValueError, KeyError) as e:
+            return _error_message(f"Error in processing response: {str(e)}")
 
-class GroqModel:
-    def __init__(self, temperature=0.3, model="llama-3.1-70b-versatile"):
-        self.api_key = os.getenv("GROQ_API_KEY")
-        self.temperature = temperature
-        self.model = model
-        self.model_endpoint = "https://api.groq.com/openai/v1/chat/completions"
-        self.headers = {
-            'Content-Type': 'application/json', 
-            'Authorization': f'Bearer {self.api_key}'
-        }
     def invoke(self, messages):
+        cached = _cached_response(self, messages, True)
+        if cached is not None:
+            return self._to_message(cached)
+        payload = self._payload(messages)
+
+        try:
+            started = time.perf_counter()
+            with self._span() as sp:
+                response_json = self.backend.complete(payload, sp)
+            message = self._to_message(response_json)
+            _cache_response(self, messages, True, response_json, started)
+            return message
+
+        except requests.RequestException as e:
+            return _error_message(f"Request error: {str(e)}")
+        except (ValueError, KeyError) as e:
+            return _error_message(f"Error in processing response: {str(e)}")
+
+    async def ainvoke(self, messages):
+        cached = await _acached_response(self, messages, True)
+        if cached is not None:
+            return self._to_message(cached)
+        payload = self._payload(messages)
+
+        try:
+            started = time.perf_counter()
+            with self._span() as sp:
+                response_json = await self.backend.acomplete(payload, sp)
+            message = self._to_message(response_json)
+            await _acache_response(self, messages, True, response_json, started)
+            return message
+
+        except httpx.HTTPError as e:
+            return _error_message(f"Request error: {str(e)}")
+        except (ValueError, KeyError) as e:
+            return _error_message(f"Error in processing response: {str(e)}")
+
+class GroqModel(_ChatModel):
+    def __init__(self, temperature=0.3, model=None, streaming=False, name=None, backend=None):
+        super().__init__(temperature, model, name, backend)
+        self.streaming = streaming
+
+    def _to_message(self, response_json):
+        content = response_json['choices'][0]['message']['content']
+        return AIMessage(content=str(content), response_metadata={"token_usage": response_json.get("usage") or {}})
+
+    def invoke(self, messages, config=None):
+        cached = _cached_response(self, messages, False)
+        if self.streaming:
+            return self._invoke_streaming(messages, config, cached)
+        if cached is not None:
+            return self._to_message(cached)
+
+        payload = self._payload(messages)
 
-            system = messages[0]["content"]
-            user = messages[1]["content"]
-
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": f"system:{system}\n\n user:{user}"
-                    }
-                ],
-                "temperature": self.temperature,
-            }
-
-            try:
-                request_response = requests.post(
-                    self.model_endpoint, 
-                    headers=self.headers, 
-                    data=json.dumps(payload)
+        try:
+            started = time.perf_counter()
+            with self._span() as sp:
+                response_json = self.backend.complete(payload, sp)
+            message = self._to_message(response_json)
+            _cache_response(self, messages, False, response_json, started)
+            return message
+        except requests.RequestException as e:
+            return _error_message(f"Error in invoking model! {str(e)}")
+        except (ValueError, KeyError, IndexError) as e:
+            return _error_message(f"Error in processing response: {str(e)}")
+
+    async def ainvoke(self, messages, config=None):
+        cached = await _acached_response(self, messages, False)
+        if self.streaming:
+            return await self._ainvoke_streaming(messages, config, cached)
+        if cached is not None:
+            return self._to_message(cached)
+
+        payload = self._payload(messages)
+
+        try:
+            started = time.perf_counter()
+            with self._span() as sp:
+                response_json = await self.backend.acomplete(payload, sp)
+            message = self._to_message(response_json)
+            await _acache_response(self, messages, False, response_json, started)
+            return message
+        except httpx.HTTPError as e:
+            return _error_message(f"Error in invoking model! {str(e)}")
+        except (ValueError, KeyError, IndexError) as e:
+            return _error_message(f"Error in processing response: {str(e)}")
+
+    def stream(self, messages, usage=None):
+        """Yield completion tokens as they arrive."""
+        with self._span(stream=True) as sp:
+            yield from self.backend.stream(self._payload(messages), sp, usage)
+
+    async def astream(self, messages, usage=None):
+        """Async counterpart of `stream`."""
+        with self._span(stream=True) as sp:
+            async for token in self.backend.astream(self._payload(messages), sp, usage):
+                yield token
+
+    def _invoke_streaming(self, messages, config, cached=None):
+        # Report tokens through the LangChain callbacks in `config`, which is how
+        # LangGraph's stream_mode="messages" picks them up. A cached completion
+        # is reported as a single token. The callback machinery is imported here:
+        # it is only needed once a graph is running, and it is slow to import.
+        from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, LLMResult
+        from langchain_core.runnables.config import get_callback_manager_for_config
+
+        run_manager = None
+        if config is not None:
+            run_manager = get_callback_manager_for_config(config).on_chat_model_start(
+                {"name": type(self).__name__}, [_langchain_messages(messages)], name=type(self).__name__
+            )[0]
+        message_id = f"run-{run_manager.run_id}" if run_manager else None
+
+        tokens = []
+        # Filled from the provider's final usage chunk, so run budgets see real token counts.
+        usage = cached["usage"] if cached is not None else {}
+        started = time.perf_counter()
+        try:
+            source = [self._to_message(cached).content] if cached is not None else self.stream(messages, usage)
+            for token in source:
+                tokens.append(token)
+                if run_manager:
+                    run_manager.on_llm_new_token(
+                        token, chunk=ChatGenerationChunk(message=AIMessageChunk(content=token, id=message_id))
                     )
-                
-                print("REQUEST RESPONSE", request_response)
-                request_response_json = request_response.json()['choices'][0]['message']['content']
-                response = str(request_response_json)
-                
-                response_formatted = AIMessage(content=response)
-
-                return response_formatted
-            except requests.RequestException as e:
-                response = {"error": f"Error in invoking model! {str(e)}"}
-                response_formatted = AIMessage(content=response)
-                return response_formatted
+        except (requests.RequestException, ValueError) as e:
+            if run_manager:
+                run_manager.on_llm_error(e)
+            return _error_message(f"Error in invoking model! {str(e)}")
+
+        response = AIMessage(content="".join(tokens), id=message_id, response_metadata={"token_usage": usage})
+        if cached is None:
+            _cache_response(self, messages, False, _text_response(response.content, usage), started)
+        if run_manager:
+            run_manager.on_llm_end(LLMResult(generations=[[ChatGeneration(message=response)]]))
+        return response
+
+    async def _ainvoke_streaming(self, messages, config, cached=None):
+        from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, LLMResult
+        from langchain_core.runnables.config import get_async_callback_manager_for_config
+
+        run_manager = None
+        if config is not None:
+            run_manager = (await get_async_callback_manager_for_config(config).on_chat_model_start(
+                {"name": type(self).__name__}, [_langchain_messages(messages)], name=type(self).__name__
+            ))[0]
+        message_id = f"run-{run_manager.run_id}" if run_manager else None
+
+        tokens = []
+        usage = cached["usage"] if cached is not None else {}
+        started = time.perf_counter()
+        try:
+            source = _replay(self._to_message(cached).content) if cached is not None else self.astream(messages, usage)
+            async for token in source:
+                tokens.append(token)
+                if run_manager:
+                    await run_manager.on_llm_new_token(
+                        token, chunk=ChatGenerationChunk(message=AIMessageChunk(content=token, id=message_id))
+                    )
+        except (httpx.HTTPError, ValueError) as e:
+            if run_manager:
+                await run_manager.on_llm_error(e)
+            return _error_message(f"Error in invoking model! {str(e)}")
+
+        response = AIMessage(content="".join(tokens), id=message_id, response_metadata={"token_usage": usage})
+        if cached is None:
+            await _acache_response(self, messages, False, _text_response(response.content, usage), started)
+        if run_manager:
+            await run_manager.on_llm_end(LLMResult(generations=[[ChatGeneration(message=response)]]))
+        return response
 
 
 # if __name__ == "__main__":
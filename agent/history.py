@@ -0,0 +1,56 @@
+import os
+from typing import List
+
+
+def max_selections() -> int:
+    """How many past selected URLs the selector sees (HISTORY_MAX_SELECTIONS)."""
+    return int(os.getenv("HISTORY_MAX_SELECTIONS", "10"))
+
+
+def max_reports() -> int:
+    """How many past reports the reporter keeps (HISTORY_MAX_REPORTS)."""
+    return int(os.getenv("HISTORY_MAX_REPORTS", "3"))
+
+
+def report_token_cap() -> int:
+    """Token cap for the rendered previous reports (HISTORY_REPORT_TOKENS)."""
+    return int(os.getenv("HISTORY_REPORT_TOKENS", "1500"))
+
+
+def append_bounded(history: List[str], items: List[str], limit: int) -> List[str]:
+    """Return `history` plus `items`, keeping only the newest `limit` entries."""
+    combined = list(history or []) + [item for item in items if item]
+    return combined[-limit:] if limit > 0 else []
+
+
+def render_selections(urls: List[str]) -> str:
+    """URL-only digest of the previous selections for the selector prompt."""
+    if not urls:
+        return "None"
+    return "\n".join(f"- {url}" for url in urls)
+
+
+def render_reports(reports: List[str], token_cap: int) -> str:
+    """
+    Render past reports for the reporter prompt within `token_cap` tokens.
+
+    Newer reports take priority; the oldest report that does not fit is cut
+    short and anything older is dropped. The "Report N:" labels and the blank
+    lines between reports count against the cap too.
+    """
+    reports = reports or []
+    rendered = []
+    # Budget in characters: `utils.estimate_tokens` counts four per token.
+    remaining = token_cap * 4
+    label = len(f"Report {len(reports)}:\n")
+    for report in reversed(reports):
+        overhead = label + (2 if rendered else 0)
+        room = remaining - overhead
+        if room <= len(" ..."):
+            break
+        if len(report) > room:
+            report = report[:room - len(" ...")].rstrip() + " ..."
+        rendered.append(report)
+        remaining -= overhead + len(report)
+    rendered.reverse()
+    return "\n\n".join(f"Report {i + 1}:\n{report}" for i, report in enumerate(rendered))
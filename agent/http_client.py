@@ -0,0 +1,145 @@
+import asyncio
+import importlib.util
+import os
+import threading
+import weakref
+from typing import Optional, Tuple
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+# httpx async clients are bound to the event loop they were first used on.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def get_timeout() -> Tuple[float, float]:
+    """
+    Return the (connect, read) timeout used for outbound HTTP calls.
+
+    Configured through HTTP_CONNECT_TIMEOUT and HTTP_READ_TIMEOUT (seconds).
+    """
+    return (
+        _env_float("HTTP_CONNECT_TIMEOUT", 5.0),
+        _env_float("HTTP_READ_TIMEOUT", 60.0),
+    )
+
+
+def create_session(
+    pool_connections: Optional[int] = None,
+    pool_maxsize: Optional[int] = None,
+    keep_alive: Optional[bool] = None,
+) -> requests.Session:
+    """
+    Build a requests Session backed by a pooled HTTPAdapter.
+
+    Args:
+        pool_connections (int, optional): Number of per-host pools to cache.
+            Defaults to HTTP_POOL_CONNECTIONS or 10.
+        pool_maxsize (int, optional): Maximum connections kept per host.
+            Defaults to HTTP_POOL_MAXSIZE or 32.
+        keep_alive (bool, optional): Reuse connections between requests.
+            Defaults to HTTP_KEEP_ALIVE (anything but "0" enables it).
+
+    Returns:
+        requests.Session: A session with the adapter mounted for http and https.
+    """
+    if pool_connections is None:
+        pool_connections = _env_int("HTTP_POOL_CONNECTIONS", 10)
+    if pool_maxsize is None:
+        pool_maxsize = _env_int("HTTP_POOL_MAXSIZE", 32)
+    if keep_alive is None:
+        keep_alive = os.getenv("HTTP_KEEP_ALIVE", "1") != "0"
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def close_session() -> None:
+    """Close the shared session and drop its pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def create_async_client(
+    pool_maxsize: Optional[int] = None,
+    keep_alive: Optional[bool] = None,
+) -> httpx.AsyncClient:
+    """
+    Build an httpx AsyncClient with the same pool and timeout settings as the sync session.
+
+    HTTP/2 is negotiated when the optional `h2` package is installed.
+
+    Args:
+        pool_maxsize (int, optional): Maximum open connections.
+            Defaults to HTTP_POOL_MAXSIZE or 32.
+        keep_alive (bool, optional): Reuse connections between requests.
+            Defaults to HTTP_KEEP_ALIVE (anything but "0" enables it).
+
+    Returns:
+        httpx.AsyncClient: A pooled client that follows redirects like requests does.
+    """
+    if pool_maxsize is None:
+        pool_maxsize = _env_int("HTTP_POOL_MAXSIZE", 32)
+    if keep_alive is None:
+        keep_alive = os.getenv("HTTP_KEEP_ALIVE", "1") != "0"
+
+    connect_timeout, read_timeout = get_timeout()
+    limits = httpx.Limits(
+        max_connections=pool_maxsize,
+        max_keepalive_connections=pool_maxsize if keep_alive else 0,
+    )
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        limits=limits,
+        http2=importlib.util.find_spec("h2") is not None,
+        follow_redirects=True,
+    )
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the pooled async client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = create_async_client()
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_async_client() -> None:
+    """Close the async client bound to the running event loop, if any."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
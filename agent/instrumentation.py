@@ -0,0 +1,238 @@
+"""
+Structured timing, byte, token and cache events for the research pipeline.
+
+When no sink is installed and no `run_context` is active, `span()` hands back
+a shared no-op object, so instrumented code pays roughly one function call
+per span.
+
+Sinks are configured with `add_sink`, or from the environment at import time:
+INSTRUMENTATION_JSONL=<path> appends JSON lines, INSTRUMENTATION_OTEL=1
+forwards spans to the active OpenTelemetry tracer provider.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+
+_sinks: List[Any] = []
+_current_run: contextvars.ContextVar = contextvars.ContextVar("instrumentation_run", default=None)
+_current_node: contextvars.ContextVar = contextvars.ContextVar("instrumentation_node", default=None)
+
+
+class JsonlSink:
+    """Appends every event as one JSON line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class OTelSink:
+    """Re-creates finished spans on an OpenTelemetry tracer so any configured exporter receives them."""
+
+    def __init__(self, tracer_name: str = "focusaider"):
+        from opentelemetry import trace
+
+        self.tracer = trace.get_tracer(tracer_name)
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        if event.get("type") != "span":
+            return
+        start_ns = int(event["start"] * 1e9)
+        otel_span = self.tracer.start_span(event["name"], start_time=start_ns)
+        attributes = {"kind": event["kind"], "run_id": event.get("run_id") or "", "node": event.get("node") or ""}
+        attributes.update({k: v for k, v in event["attrs"].items() if isinstance(v, (str, bool, int, float))})
+        otel_span.set_attributes(attributes)
+        otel_span.end(end_time=start_ns + int(event["duration_ms"] * 1e6))
+
+
+def add_sink(sink) -> None:
+    _sinks.append(sink)
+
+
+def remove_sink(sink) -> None:
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def _emit(event: Dict[str, Any]) -> None:
+    for sink in list(_sinks):
+        sink.emit(event)
+
+
+class RunStats:
+    """Per-run totals accumulated from finished spans."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.nodes: Dict[str, float] = defaultdict(float)
+        self.kinds: Dict[str, float] = defaultdict(float)
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    def add(self, event: Dict[str, Any]) -> None:
+        attrs = event["attrs"]
+        with self._lock:
+            if event["kind"] == "node":
+                self.nodes[event["name"]] += event["duration_ms"]
+            else:
+                self.kinds[event["kind"]] += event["duration_ms"]
+            for key in ("bytes", "prompt_tokens", "completion_tokens"):
+                if isinstance(attrs.get(key), int):
+                    self.counters[key] += attrs[key]
+            if attrs.get("cache"):
+                self.counters[f"cache_{attrs['cache']}"] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "type": "run_summary",
+                "run_id": self.run_id,
+                "wall_ms": (time.time() - self.started) * 1000,
+                "node_ms": dict(self.nodes),
+                "external_ms": dict(self.kinds),
+                **self.counters,
+            }
+
+
+class Span:
+    __slots__ = ("name", "kind", "attrs", "start", "_t0", "run", "node")
+    recording = True
+
+    def __init__(self, name: str, kind: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.run = _current_run.get()
+        self.node = _current_node.get()
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        event = {
+            "type": "span",
+            "run_id": self.run.run_id if self.run else None,
+            "node": self.node,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "duration_ms": (time.perf_counter() - self._t0) * 1000,
+            "attrs": self.attrs,
+        }
+        if self.run is not None:
+            self.run.add(event)
+        _emit(event)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+    recording = False
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def enabled() -> bool:
+    return bool(_sinks) or _current_run.get() is not None
+
+
+def span(name: str, kind: str, **attrs):
+    """
+    Time a block of work.
+
+    Args:
+        name (str): What is being timed, e.g. "groq.chat" or a node name.
+        kind (str): One of "node", "llm", "search", "scrape".
+        **attrs: Initial attributes; add more with `span.set(...)`. Check
+            `span.recording` before computing anything expensive.
+    """
+    if not _sinks and _current_run.get() is None:
+        return _NOOP
+    return Span(name, kind, attrs)
+
+
+@contextmanager
+def run_context(run_id: Optional[str] = None):
+    """Attribute every span in the block to one run and emit a `run_summary` event at the end."""
+    stats = RunStats(run_id or uuid.uuid4().hex)
+    token = _current_run.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_run.reset(token)
+        _emit(stats.summary())
+
+
+def instrument_node(name: str, fn: Callable) -> Callable:
+    """Wrap a graph node so its wall time is recorded and inner spans are tagged with the node name."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            if not enabled():
+                return await fn(*args, **kwargs)
+            token = _current_node.set(name)
+            try:
+                with span(name, "node"):
+                    return await fn(*args, **kwargs)
+            finally:
+                _current_node.reset(token)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not enabled():
+            return fn(*args, **kwargs)
+        token = _current_node.set(name)
+        try:
+            with span(name, "node"):
+                return fn(*args, **kwargs)
+        finally:
+            _current_node.reset(token)
+    return wrapper
+
+
+def usage_attrs(response_json: Dict[str, Any]) -> Dict[str, int]:
+    """Prompt/completion token counts from an OpenAI-compatible response body."""
+    usage = response_json.get("usage") or {}
+    return {
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+    }
+
+
+if os.getenv("INSTRUMENTATION_JSONL"):
+    add_sink(JsonlSink(os.environ["INSTRUMENTATION_JSONL"]))
+if os.getenv("INSTRUMENTATION_OTEL", "0") != "0":
+    add_sink(OTelSink())
@@ -0,0 +1,453 @@
+"""
+Chat completion backends behind `GroqJsonModel` and `GroqModel`.
+
+A backend takes an OpenAI-style request payload (model, messages,
+temperature, optional response_format) and returns the response JSON, or
+streams the content deltas. Two implementations:
+
+- `OpenAICompatibleBackend`: any `/v1/chat/completions` endpoint (Groq, vLLM,
+  the llama.cpp server), through the pooled HTTP clients, the upstream rate
+  limiter and the retry policy.
+- `FakeBackend`: deterministic, in-process replies that satisfy every agent,
+  generated at a configurable first-token latency and token rate, so the whole
+  graph can be load-tested offline.
+
+Each agent is routed to a backend and a model by `route`, configured through
+LLM_BACKEND / LLM_MODEL and per-agent LLM_BACKEND_<AGENT> / LLM_MODEL_<AGENT>
+(e.g. LLM_MODEL_PLANNER=llama-3.1-8b-instant for a fast planner).
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, fields
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+import requests
+
+import instrumentation
+from config import load_env
+from http_client import get_async_client, get_session, get_timeout
+from rate_limit import backoff_delay, get_limiter, parse_duration
+from utils import estimate_tokens
+
+
+DEFAULT_MODEL = "llama-3.1-70b-versatile"
+
+# Responses worth retrying: rate limited or a transient server failure.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _max_retries():
+    return int(os.getenv("GROQ_MAX_RETRIES", "5"))
+
+
+def _retry_delay(response, attempt, service):
+    """Back off after a retryable response; a 429 pauses every caller sharing the limiter."""
+    delay = backoff_delay(attempt, parse_duration(response.headers.get("retry-after")))
+    if response.status_code == 429:
+        get_limiter(service).pause(delay)
+        return 0.0
+    return delay
+
+
+def _post(endpoint, headers, payload, stream=False, service="groq"):
+    """
+    POST a chat completion through the `service` limiter, retrying 429s, 5xxs and dropped connections.
+
+    The last response is returned once retries run out, so callers still see the failure status.
+    """
+    limiter = get_limiter(service)
+    cost = estimate_tokens(json.dumps(payload["messages"]))
+    retries = _max_retries()
+    for attempt in range(retries + 1):
+        limiter.acquire(cost)
+        try:
+            response = get_session().post(
+                endpoint,
+                headers=headers,
+                json=payload,
+                stream=stream,
+                timeout=get_timeout()
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        limiter.update_from_headers(response.headers)
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        response.close()
+        time.sleep(_retry_delay(response, attempt, service))
+
+
+async def _apost(endpoint, headers, payload, stream=False, service="groq"):
+    """Async counterpart of `_post`. With `stream=True` the caller must `aclose()` the response."""
+    limiter = get_limiter(service)
+    cost = estimate_tokens(json.dumps(payload["messages"]))
+    retries = _max_retries()
+    client = get_async_client()
+    for attempt in range(retries + 1):
+        await limiter.aacquire(cost)
+        try:
+            request = client.build_request("POST", endpoint, headers=headers, json=payload)
+            response = await client.send(request, stream=stream)
+        except httpx.TransportError:
+            if attempt == retries:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+            continue
+
+        limiter.update_from_headers(response.headers)
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        await response.aclose()
+        await asyncio.sleep(_retry_delay(response, attempt, service))
+
+
+def _sse_delta(line, sp=instrumentation._NOOP, usage: Dict[str, Any] = None):
+    """
+    Decode one line of an OpenAI-compatible SSE stream.
+
+    Returns the content delta (possibly ""), or None once the stream is done.
+    The usage block sent with the final chunk (`stream_options.include_usage`,
+    or Groq's `x_groq.usage`) is copied into `usage`; when `sp` is recording,
+    it and the line's bytes are added to the span.
+    """
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+    if not line.startswith("data:"):
+        return ""
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return None
+    chunk = json.loads(data)
+    chunk_usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage")
+    if chunk_usage and usage is not None:
+        usage.update(chunk_usage)
+    if sp.recording:
+        sp.attrs["bytes"] = sp.attrs.get("bytes", 0) + len(line)
+        if chunk_usage:
+            sp.set(**instrumentation.usage_attrs({"usage": chunk_usage}))
+    choices = chunk.get("choices") or [{}]
+    return choices[0].get("delta", {}).get("content") or ""
+
+
+def _record_response(sp, response, response_json):
+    if sp.recording:
+        sp.set(status=response.status_code, bytes=len(response.content), **instrumentation.usage_attrs(response_json))
+
+
+class OpenAICompatibleBackend:
+    """
+    Backend for an OpenAI-compatible chat completions endpoint.
+
+    Args:
+        url (str): The full `/chat/completions` URL.
+        api_key (str, optional): Sent as a bearer token when set.
+        service (str, optional): The `rate_limit` service whose limiter the calls go through.
+        name (str, optional): Label for spans. Defaults to `service`.
+    """
+
+    def __init__(self, url: str, api_key: str = None, service: str = "groq", name: str = None):
+        self.url = url
+        self.service = service
+        self.name = name or service
+        self.headers = {'Content-Type': 'application/json'}
+        if api_key:
+            self.headers['Authorization'] = f'Bearer {api_key}'
+
+    def complete(self, payload: Dict[str, Any], sp=instrumentation._NOOP) -> Dict[str, Any]:
+        """The response JSON; raises `requests.RequestException` on failure."""
+        response = _post(self.url, self.headers, payload, service=self.service)
+        response.raise_for_status()
+        response_json = response.json()
+        _record_response(sp, response, response_json)
+        return response_json
+
+    async def acomplete(self, payload: Dict[str, Any], sp=instrumentation._NOOP) -> Dict[str, Any]:
+        """Async counterpart of `complete`; raises `httpx.HTTPError` on failure."""
+        response = await _apost(self.url, self.headers, payload, service=self.service)
+        response.raise_for_status()
+        response_json = response.json()
+        _record_response(sp, response, response_json)
+        return response_json
+
+    def _stream_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        # Ask for the usage chunk at the end of the stream, so budgets see real token counts.
+        return {**payload, "stream": True, "stream_options": {"include_usage": True}}
+
+    def stream(self, payload: Dict[str, Any], sp=instrumentation._NOOP, usage: Dict[str, Any] = None) -> Iterator[str]:
+        """Yield content deltas as they arrive over the SSE stream; the final usage block is copied into `usage`."""
+        with _post(self.url, self.headers, self._stream_payload(payload), stream=True, service=self.service) as response:
+            sp.set(status=response.status_code)
+            response.raise_for_status()
+            for line in response.iter_lines():
+                token = _sse_delta(line, sp, usage)
+                if token is None:
+                    break
+                if token:
+                    yield token
+
+    async def astream(
+        self, payload: Dict[str, Any], sp=instrumentation._NOOP, usage: Dict[str, Any] = None
+    ) -> AsyncIterator[str]:
+        """Async counterpart of `stream`."""
+        response = await _apost(self.url, self.headers, self._stream_payload(payload), stream=True, service=self.service)
+        sp.set(status=response.status_code)
+        try:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                token = _sse_delta(line, sp, usage)
+                if token is None:
+                    break
+                if token:
+                    yield token
+        finally:
+            await response.aclose()
+
+
+@dataclass(slots=True)
+class FakeProfile:
+    """Generation speed of a `FakeBackend`: seconds to the first token, then tokens per second (0 for no delay)."""
+    first_token: float = 0.0
+    tokens_per_second: float = 0.0
+    # Length of the plain-text (reporter) completion, in words.
+    report_words: int = 150
+
+    @classmethod
+    def parse(cls, spec: str) -> "FakeProfile":
+        """A profile name from FAKE_PROFILES, or "key=value,..." overrides of the instant profile."""
+        if not spec:
+            return cls()
+        if spec in FAKE_PROFILES:
+            return FAKE_PROFILES[spec]
+        types = {f.name: f.type for f in fields(cls)}
+        values = {}
+        for item in spec.split(","):
+            key, _, value = item.partition("=")
+            key = key.strip()
+            if key not in types:
+                raise ValueError(f"Unknown fake backend profile or setting {key!r}")
+            values[key] = types[key](value)
+        return cls(**values)
+
+
+# Rough stand-ins for a hosted small model, a hosted large model and a CPU-bound local server.
+FAKE_PROFILES = {
+    "instant": FakeProfile(),
+    "small": FakeProfile(first_token=0.1, tokens_per_second=800),
+    "large": FakeProfile(first_token=0.3, tokens_per_second=250),
+    "local": FakeProfile(first_token=0.5, tokens_per_second=30),
+}
+
+_LINK_RE = re.compile(r"^(?:Link|URL): (\S+)", re.MULTILINE)
+_TOKEN_RE = re.compile(r"\S+\s*")
+
+
+def _fake_question(messages: List[Dict[str, str]]) -> str:
+    users = [message["content"] for message in messages if message["role"] == "user"]
+    question = " ".join(str(users[-1]).split()) if users else ""
+    return question[len("question "):] if question.startswith("question ") else question
+
+
+def fake_reply(messages: List[Dict[str, str]], json_mode: bool, report_words: int = 150) -> str:
+    """
+    A deterministic completion that every agent can parse.
+
+    JSON requests get one object with the planner, selector, reviewer and
+    router fields; the selector's URLs are the links in the prompt (search
+    results or recalled pages). Text requests get a report citing the URLs
+    in the prompt, padded to `report_words`.
+    """
+    prompt = "\n".join(str(message["content"]) for message in messages)
+    question = _fake_question(messages)
+    links = list(dict.fromkeys(_LINK_RE.findall(prompt)))
+    if json_mode:
+        term = " ".join(question.split()[:8]) or "research question"
+        return json.dumps({
+            "search_term": term,
+            "search_terms": [term, f"{term} overview", f"{term} examples", f"{term} research", f"{term} news"],
+            "overall_strategy": f"Search for {term} and read the most authoritative result.",
+            "additional_information": "Prefer primary sources.",
+            "selected_page_url": links[0] if links else "",
+            "selected_page_urls": links[:5],
+            "description": "The first result for the search term.",
+            "reason_for_selection": "It is the highest ranked result.",
+            "feedback": "The report answers the question and cites its sources.",
+            "pass_review": True,
+            "comprehensive": True,
+            "citations_provided": True,
+            "relevant_to_research_question": True,
+            "next_agent": "final_report",
+        })
+    sources = links or ["https://example.com/"]
+    body = f"Based on the information gathered, here is the answer to {question or 'the question'} [1]."
+    filler = " ".join(f"Point {i} is supported by the sources [{i % len(sources) + 1}]." for i in range(report_words))
+    words = f"{body} {filler}".split()[:max(report_words, len(body.split()))]
+    citations = "\n".join(f"[{i}] {url}" for i, url in enumerate(sources, start=1))
+    return f"{' '.join(words)}\n\nSources:\n{citations}"
+
+
+class FakeBackend:
+    """
+    In-process backend that answers with `fake_reply` at the speed of a `FakeProfile`.
+
+    Replies depend only on the request, so runs are reproducible; a request
+    is treated as JSON mode when it sets response_format or its prompt asks
+    for JSON (streamed JSON calls drop response_format, see `GroqJsonModel`).
+    """
+
+    def __init__(self, profile: FakeProfile = None, name: str = "fake"):
+        self.profile = profile or FakeProfile()
+        self.name = name
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _reply(self, payload: Dict[str, Any]) -> Tuple[List[str], Dict[str, int]]:
+        with self._lock:
+            self.calls += 1
+        messages = payload["messages"]
+        json_mode = "response_format" in payload or any(
+            "json" in str(message["content"]).lower() for message in messages if message["role"] == "system"
+        )
+        tokens = _TOKEN_RE.findall(fake_reply(messages, json_mode, self.profile.report_words))
+        prompt_tokens = estimate_tokens(json.dumps(messages))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        return tokens, usage
+
+    def _delays(self, count: int) -> Iterator[float]:
+        """Seconds to wait before each of `count` tokens."""
+        rate = self.profile.tokens_per_second
+        for i in range(count):
+            yield (self.profile.first_token if i == 0 else 0.0) + (1.0 / rate if rate else 0.0)
+
+    def _response(self, tokens: List[str], usage: Dict[str, int], sp) -> Dict[str, Any]:
+        sp.set(status=200, **instrumentation.usage_attrs({"usage": usage}))
+        return {
+            "id": "fake",
+            "object": "chat.completion",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    def complete(self, payload: Dict[str, Any], sp=instrumentation._NOOP) -> Dict[str, Any]:
+        tokens, usage = self._reply(payload)
+        delay = sum(self._delays(len(tokens)))
+        if delay:
+            time.sleep(delay)
+        return self._response(tokens, usage, sp)
+
+    async def acomplete(self, payload: Dict[str, Any], sp=instrumentation._NOOP) -> Dict[str, Any]:
+        tokens, usage = self._reply(payload)
+        delay = sum(self._delays(len(tokens)))
+        if delay:
+            await asyncio.sleep(delay)
+        return self._response(tokens, usage, sp)
+
+    def stream(self, payload: Dict[str, Any], sp=instrumentation._NOOP, usage: Dict[str, Any] = None) -> Iterator[str]:
+        tokens, reply_usage = self._reply(payload)
+        # Sleep to a schedule rather than per token, so sleep overshoot does not add up.
+        due = time.perf_counter()
+        for token, delay in zip(tokens, self._delays(len(tokens))):
+            due += delay
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            yield token
+        if usage is not None:
+            usage.update(reply_usage)
+        sp.set(status=200, **instrumentation.usage_attrs({"usage": reply_usage}))
+
+    async def astream(
+        self, payload: Dict[str, Any], sp=instrumentation._NOOP, usage: Dict[str, Any] = None
+    ) -> AsyncIterator[str]:
+        tokens, reply_usage = self._reply(payload)
+        due = time.perf_counter()
+        for token, delay in zip(tokens, self._delays(len(tokens))):
+            due += delay
+            wait = due - time.perf_counter()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            yield token
+        if usage is not None:
+            usage.update(reply_usage)
+        sp.set(status=200, **instrumentation.usage_attrs({"usage": reply_usage}))
+
+
+_backends: Dict[str, Any] = {}
+_backends_lock = threading.Lock()
+
+
+def _create_backend(spec: str):
+    kind, _, arg = spec.partition(":")
+    if kind == "groq":
+        return OpenAICompatibleBackend(
+            os.getenv("GROQ_CHAT_URL", "https://api.groq.com/openai/v1/chat/completions"),
+            os.getenv("GROQ_API_KEY"),
+            service="groq",
+        )
+    if kind == "openai":
+        return OpenAICompatibleBackend(
+            arg or os.getenv("OPENAI_CHAT_URL", "http://127.0.0.1:8000/v1/chat/completions"),
+            os.getenv("OPENAI_API_KEY"),
+            service="openai",
+        )
+    if kind == "fake":
+        return FakeBackend(FakeProfile.parse(arg or os.getenv("FAKE_LLM_PROFILE", "")), name=spec)
+    raise ValueError(f"Unknown LLM backend {spec!r}; expected 'groq', 'openai[:url]' or 'fake[:profile]'")
+
+
+def get_backend(spec: str = None):
+    """
+    Return the process-wide backend for `spec`, creating it on first use.
+
+    Specs: "groq" (GROQ_CHAT_URL, GROQ_API_KEY), "openai" or "openai:<url>"
+    for any other OpenAI-compatible server (OPENAI_CHAT_URL, OPENAI_API_KEY,
+    limited by OPENAI_REQUESTS_PER_MINUTE), and "fake" or "fake:<profile>"
+    (a FAKE_PROFILES name or "first_token=0.2,tokens_per_second=100";
+    defaults to FAKE_LLM_PROFILE). Defaults to LLM_BACKEND, then "groq".
+    """
+    load_env()
+    spec = spec or os.getenv("LLM_BACKEND") or "groq"
+    backend = _backends.get(spec)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(spec)
+            if backend is None:
+                backend = _backends[spec] = _create_backend(spec)
+    return backend
+
+
+def register_backend(spec: str, backend) -> None:
+    """Make `backend` the one `get_backend(spec)` returns, e.g. a replay or recording backend in a benchmark."""
+    with _backends_lock:
+        _backends[spec] = backend
+
+
+def route(agent: Optional[str], model: str = None) -> Tuple[Any, str]:
+    """
+    The (backend, model) an agent's calls go to.
+
+    LLM_BACKEND_<AGENT> and LLM_MODEL_<AGENT> override LLM_BACKEND and
+    LLM_MODEL for one agent (PLANNER, SELECTOR, REPORTER, REVIEWER, ROUTER);
+    an explicit `model` wins over both.
+    """
+    load_env()
+    suffix = f"_{agent.upper()}" if agent else ""
+    backend = get_backend(os.getenv(f"LLM_BACKEND{suffix}") if suffix else None)
+    model = model or (suffix and os.getenv(f"LLM_MODEL{suffix}")) or os.getenv("LLM_MODEL") or DEFAULT_MODEL
+    return backend, model
@@ -0,0 +1,439 @@
+"""
+Local vector index over previously scraped pages.
+
+Pages are split with `content_reducer.chunk_text` and each chunk is embedded
+as a signed, hashed bag of words (log term frequency, L2-normalized), so no
+model or vocabulary is needed and inserts never re-embed old chunks. Query
+terms are weighted by IDF, which is kept as per-bucket document counts.
+
+Storage, in one directory:
+
+- ``vectors.f16``: (capacity, DIM) float16 memory-mapped matrix of chunk vectors.
+- ``codes.u64``: (capacity, CODE_WORDS) sign-of-random-projection bit codes.
+- ``added.f64``: insert time per row; 0 marks a deleted or evicted row.
+- ``df.f64``: per-bucket document counts, the last slot holds the chunk count.
+- ``chunks.sqlite3``: url, title and text per row, and the used row count.
+
+A search ranks every live row by Hamming distance between bit codes, then
+re-scores the closest `candidates` rows exactly against the float vectors.
+Rows are append-only; deleted rows stay in place until `compact` rewrites
+the files. Writes are serialized through SQLite's write lock, so several
+processes may insert into the same directory, but `compact` must run while
+no other process has the index open.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import instrumentation
+from content_reducer import PAGE_SEPARATOR, chunk_text, split_page
+from payloads import LocalPage
+from scrape_cache import normalize_url
+
+
+DIM = 256
+CODE_WORDS = 4  # 256-bit codes
+
+_TOKEN_RE = re.compile(r"\w+")
+_EXACT_BLOCK = 65536
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    row INTEGER PRIMARY KEY,
+    url_key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    text TEXT NOT NULL,
+    added_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_url_key ON chunks (url_key);
+CREATE INDEX IF NOT EXISTS chunks_added_at ON chunks (added_at);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_FILES = {
+    "vectors": ("vectors.f16", np.float16, (DIM,)),
+    "codes": ("codes.u64", np.uint64, (CODE_WORDS,)),
+    "added": ("added.f64", np.float64, ()),
+}
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:
+    _BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        return _BYTE_BITS[words.view(np.uint8)].reshape(*words.shape, 8).sum(axis=-1)
+
+
+@lru_cache(maxsize=1 << 16)
+def _slot(term: str) -> Tuple[int, float]:
+    """Hash bucket and sign for one term."""
+    digest = zlib.crc32(term.encode("utf-8"))
+    return digest % DIM, (1.0 if digest & 0x80000000 else -1.0)
+
+
+def term_counts(text: str) -> Counter:
+    return Counter(_TOKEN_RE.findall(text.lower()))
+
+
+def embed(texts: Sequence[str]) -> np.ndarray:
+    """Hashed log-TF vectors, one L2-normalized float32 row per text."""
+    vectors = np.zeros((len(texts), DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for term, count in term_counts(text).items():
+            bucket, sign = _slot(term)
+            vectors[row, bucket] += sign * np.log1p(count)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+# Fixed seed: every process must project onto the same hyperplanes.
+_PLANES = np.random.default_rng(0x10CA1).standard_normal((DIM, CODE_WORDS * 64)).astype(np.float32)
+_BIT_WEIGHTS = (np.uint64(1) << np.arange(64, dtype=np.uint64))
+
+
+def bit_codes(vectors: np.ndarray) -> np.ndarray:
+    """Sign-of-random-projection codes: vectors with a small angle between them share most bits."""
+    bits = (np.asarray(vectors, dtype=np.float32) @ _PLANES) > 0
+    bits = bits.reshape(len(bits), CODE_WORDS, 64).astype(np.uint64)
+    return (bits * _BIT_WEIGHTS).sum(axis=2, dtype=np.uint64)
+
+
+@dataclass(slots=True)
+class LocalHit:
+    row: int
+    url: str
+    title: str
+    text: str
+    score: float
+
+
+class LocalIndex:
+    """
+    Append-only on-disk vector index of scraped page chunks.
+
+    Args:
+        path (str): Directory holding the index files; created if missing.
+        max_age (float): Seconds a chunk stays searchable; 0 keeps chunks forever.
+        max_words (int): Chunk size in words.
+        min_score (float): Similarity a page needs to count towards `recall`.
+        min_pages (int): Pages above `min_score` that make local recall good enough.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_age: float = 7 * 86400,
+        max_words: int = 120,
+        min_score: float = 0.2,
+        min_pages: int = 2,
+    ):
+        self.path = path
+        self.max_age = max_age
+        self.max_words = max_words
+        self.min_score = min_score
+        self.min_pages = min_pages
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._capacity = 0
+        self._arrays: Dict[str, np.memmap] = {}
+        os.makedirs(path, exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+        self._df = self._open_df()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.path, "chunks.sqlite3"), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _open_df(self) -> np.memmap:
+        path = os.path.join(self.path, "df.f64")
+        if not os.path.exists(path):
+            np.zeros(DIM + 1, dtype=np.float64).tofile(path)
+        return np.memmap(path, dtype=np.float64, mode="r+", shape=(DIM + 1,))
+
+    def _count(self, conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT value FROM meta WHERE name = 'rows'").fetchone()
+        return row[0] if row else 0
+
+    def _map(self, capacity: int) -> None:
+        """(Re)map the row files at `capacity` rows, growing them on disk if needed."""
+        for name, (filename, dtype, shape) in _FILES.items():
+            path = os.path.join(self.path, filename)
+            size = capacity * int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+            if not os.path.exists(path) or os.path.getsize(path) < size:
+                with open(path, "ab") as f:
+                    f.truncate(size)
+            self._arrays[name] = np.memmap(path, dtype=dtype, mode="r+", shape=(capacity, *shape))
+        self._capacity = capacity
+
+    def _rows(self) -> int:
+        """Rows in use, remapping if another process has grown the files since the last call."""
+        count = self._count(self._connect())
+        if count > self._capacity:
+            with self._lock:
+                self._reserve(count)
+        return count
+
+    def _reserve(self, rows: int) -> None:
+        """Map at least `rows` rows; the files grow geometrically so appends stay cheap."""
+        if rows <= self._capacity:
+            return
+        added = os.path.join(self.path, _FILES["added"][0])
+        on_disk = os.path.getsize(added) // 8 if os.path.exists(added) else 0
+        self._map(max(rows, on_disk, 2 * self._capacity, 1024))
+
+    def add_page(self, url: str, title: str, text: str) -> int:
+        """
+        Chunk, embed and insert one page, replacing any chunks stored for the same URL.
+
+        Returns:
+            int: The number of chunks inserted.
+        """
+        chunks = chunk_text(text, self.max_words)
+        if not chunks:
+            return 0
+        return self.add_chunks(url, title, chunks, embed(chunks))
+
+    def add_scraped(self, scraped: str) -> int:
+        """Index every successful page in `format_scraped_content` output; returns the chunks inserted."""
+        inserted = 0
+        for page in scraped.split(PAGE_SEPARATOR):
+            header, content = split_page(page)
+            fields = dict(line.split(": ", 1) for line in header.splitlines() if ": " in line)
+            if fields.get("Status") == "success" and fields.get("URL"):
+                inserted += self.add_page(fields["URL"], fields.get("Title", ""), content)
+        return inserted
+
+    def add_chunks(self, url: str, title: str, chunks: Sequence[str], vectors: np.ndarray) -> int:
+        """Insert pre-embedded chunks of one page; `vectors` rows must come from `embed`."""
+        now = time.time()
+        url_key = normalize_url(url)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        conn = self._connect()
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                start = self._count(conn)
+                end = start + len(chunks)
+                self._reserve(end)
+                self._delete(conn, [row for (row,) in conn.execute(
+                    "SELECT row FROM chunks WHERE url_key = ?", (url_key,)
+                )])
+                self._arrays["vectors"][start:end] = vectors
+                self._arrays["codes"][start:end] = bit_codes(vectors)
+                self._arrays["added"][start:end] = now
+                self._df[:DIM] += np.count_nonzero(vectors, axis=0)
+                self._df[DIM] += len(chunks)
+                conn.executemany(
+                    "INSERT INTO chunks (row, url_key, url, title, text, added_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(start + i, url_key, url, title, chunk, now) for i, chunk in enumerate(chunks)],
+                )
+                conn.execute(
+                    "INSERT INTO meta (name, value) VALUES ('rows', ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                    (end,),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return len(chunks)
+
+    def _delete(self, conn: sqlite3.Connection, rows: List[int]) -> None:
+        if not rows:
+            return
+        rows = np.asarray(rows)
+        self._df[:DIM] -= np.count_nonzero(self._arrays["vectors"][rows], axis=0)
+        self._df[DIM] -= len(rows)
+        self._arrays["added"][rows] = 0
+        conn.executemany("DELETE FROM chunks WHERE row = ?", [(int(row),) for row in rows])
+
+    def evict(self, max_age: float = None) -> int:
+        """Delete chunks older than `max_age` seconds (defaults to the index's max_age); returns the count."""
+        max_age = self.max_age if max_age is None else max_age
+        if not max_age:
+            return 0
+        self._rows()
+        conn = self._connect()
+        with self._lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = [row for (row,) in conn.execute(
+                    "SELECT row FROM chunks WHERE added_at < ?", (time.time() - max_age,)
+                )]
+                self._delete(conn, rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def compact(self) -> int:
+        """
+        Rewrite the row files without deleted rows; returns the number of rows reclaimed.
+
+        Row numbers change, so no other process may have the index open.
+        """
+        count = self._rows()
+        conn = self._connect()
+        with self._lock:
+            live = np.flatnonzero(self._arrays["added"][:count] > 0) if count else np.zeros(0, dtype=np.int64)
+            if len(live) == count:
+                return 0
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for name in _FILES:
+                    self._arrays[name][:len(live)] = self._arrays[name][live]
+                    self._arrays[name][len(live):count] = 0
+                # Live rows only move down, so renumbering in ascending order never collides.
+                conn.executemany(
+                    "UPDATE chunks SET row = ? WHERE row = ?",
+                    [(new, int(old)) for new, old in enumerate(live) if new != old],
+                )
+                conn.execute("UPDATE meta SET value = ? WHERE name = 'rows'", (len(live),))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return count - len(live)
+
+    def query_vector(self, query: str) -> np.ndarray:
+        """The IDF-weighted, L2-normalized vector for `query`."""
+        n = self._df[DIM]
+        idf = np.log((n + 1) / (self._df[:DIM] + 1)) + 1
+        vector = embed([query])[0] * idf.astype(np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def search(self, query: str, k: int = 8, candidates: int = 4096, exact: bool = False) -> List[LocalHit]:
+        """
+        Return up to `k` live chunks most similar to `query`, best first.
+
+        Args:
+            query (str): Free text, usually the research question and search term.
+            k (int): Number of chunks to return.
+            candidates (int): Rows re-scored exactly after the Hamming pre-filter.
+            exact (bool): Score every row exactly instead (for recall measurements).
+        """
+        count = self._rows()
+        if not count:
+            return []
+        vector = self.query_vector(query)
+        added = self._arrays["added"][:count]
+        cutoff = time.time() - self.max_age if self.max_age else 0.0
+        live = added > cutoff
+
+        if exact or count <= candidates:
+            rows = np.arange(count)
+            scores = np.empty(count, dtype=np.float32)
+            # Score in blocks so a large index is never copied to float32 whole.
+            for start in range(0, count, _EXACT_BLOCK):
+                block = self._arrays["vectors"][start:min(start + _EXACT_BLOCK, count)]
+                scores[start:start + len(block)] = block.astype(np.float32) @ vector
+        else:
+            # The code is taken from the IDF-weighted vector, so Hamming distance
+            # approximates the same similarity the re-scoring computes.
+            code = bit_codes(vector[None])[0]
+            distance = _popcount(self._arrays["codes"][:count] ^ code).sum(axis=1, dtype=np.int32)
+            rows = np.sort(np.argpartition(distance, candidates - 1)[:candidates])
+            scores = self._arrays["vectors"][rows].astype(np.float32) @ vector
+        scores[~live[rows]] = -np.inf
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        return self._hits(rows[top], scores[top])
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray) -> List[LocalHit]:
+        placeholders = ",".join("?" * len(rows))
+        found = {
+            row: (url, title, text)
+            for row, url, title, text in self._connect().execute(
+                f"SELECT row, url, title, text FROM chunks WHERE row IN ({placeholders})",
+                [int(row) for row in rows],
+            )
+        }
+        return [
+            LocalHit(int(row), *found[int(row)], float(score))
+            for row, score in zip(rows, scores)
+            if int(row) in found
+        ]
+
+    def recall(self, query: str, k: int = 8) -> List[LocalPage]:
+        """
+        Pages good enough to answer `query` without a web search, best first.
+
+        Returns the pages whose best chunk scores at least `min_score`, or []
+        when fewer than `min_pages` qualify.
+        """
+        with instrumentation.span("local_index.search", "search") as sp:
+            pages = [page for page in group_hits(self.search(query, k)) if page.score >= self.min_score]
+            if len(pages) < self.min_pages:
+                pages = []
+            sp.set(pages=len(pages), cache="hit" if pages else "miss")
+        return pages
+
+    def stats(self) -> Dict[str, int]:
+        count = self._rows()
+        live = int(np.count_nonzero(self._arrays["added"][:count])) if count else 0
+        pages = self._connect().execute("SELECT COUNT(DISTINCT url_key) FROM chunks").fetchone()[0]
+        return {"rows": count, "live_rows": live, "pages": pages, "capacity": self._capacity}
+
+
+def group_hits(hits: List[LocalHit]) -> List[LocalPage]:
+    """Collapse chunk hits into one `LocalPage` per URL, best page first."""
+    pages: Dict[str, LocalPage] = {}
+    for hit in hits:
+        page = pages.get(hit.url)
+        if page is None:
+            page = pages[hit.url] = LocalPage(url=hit.url, title=hit.title, chunks=[], score=hit.score)
+        page.chunks.append(hit.text)
+        page.score = max(page.score, hit.score)
+    return sorted(pages.values(), key=lambda page: -page.score)
+
+
+_index: Optional[LocalIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_local_index() -> Optional[LocalIndex]:
+    """
+    Return the process-wide local index, or None when it is disabled.
+
+    Configured through LOCAL_INDEX_PATH (a directory; unset or empty disables
+    the index), LOCAL_INDEX_MAX_AGE (seconds), LOCAL_INDEX_MIN_SCORE and
+    LOCAL_INDEX_MIN_PAGES. Expired chunks are evicted when the index is opened.
+    """
+    global _index
+    if _index is None:
+        path = os.getenv("LOCAL_INDEX_PATH", "")
+        if not path:
+            return None
+        with _index_lock:
+            if _index is None:
+                index = LocalIndex(
+                    path,
+                    max_age=float(os.getenv("LOCAL_INDEX_MAX_AGE", str(7 * 86400))),
+                    min_score=float(os.getenv("LOCAL_INDEX_MIN_SCORE", "0.2")),
+                    min_pages=int(os.getenv("LOCAL_INDEX_MIN_PAGES", "2")),
+                )
+                index.evict()
+                _index = index
+    return _index
@@ -0,0 +1,269 @@
+"""
+Where agent output goes: nowhere, a structured log, or the coloured console.
+
+Agents hand raw responses to `emit`; parsing and formatting happen inside the
+sink, so the null sink does no work at all. The sink is chosen per run with
+`use_sink(...)`, or process-wide with AGENT_OUTPUT=console|log|null
+(console by default, matching the interactive CLI).
+"""
+import contextvars
+import json
+import logging
+import os
+from contextlib import contextmanager
+from typing import Any, Callable
+
+
+COLORS = {
+    "PLANNER": "blue",
+    "SERPER": "green",
+    "SELECTOR": "magenta",
+    "SCRAPER": "cyan",
+    "REDUCER": "white",
+    "REPORTER": "yellow",
+    "REVIEWER": "red",
+    "ROUTER": "white"
+}
+
+
+def _content(output: Any) -> Any:
+    """Decode `output` once, reusing the JSON the model already parsed when it is available."""
+    parsed = getattr(output, "additional_kwargs", {}).get("parsed")
+    if parsed is not None:
+        return parsed
+    text = output.content if hasattr(output, "content") else output
+    if isinstance(text, str):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return text
+    return text
+
+
+def parse_agent_response(agent_name: str, output: Any) -> dict:
+    """Parse the response content based on agent type"""
+    try:
+        content = _content(output)
+
+        if agent_name == "PLANNER":
+            return {
+                "search_term": content.get("search_term", "N/A"),
+                "overall_strategy": content.get("overall_strategy", "N/A"),
+                "additional_information": content.get("additional_information", "N/A")
+            }
+        elif agent_name == "SELECTOR":
+            return {
+                "selected_page_url": content.get("selected_page_url", "N/A"),
+                "description": content.get("description", "N/A"),
+                "reason_for_selection": content.get("reason_for_selection", "N/A")
+            }
+        elif agent_name == "SCRAPER":
+            # Handle dictionary with URL, title, and content
+            if isinstance(content, dict):
+                if "error" in content:
+                    return content
+
+                url = content.get("url", content.get("URL", "N/A"))
+                title = content.get("title", content.get("Title", "N/A"))
+                raw_content = content.get("content", content.get("Content", ""))
+
+                # Only return if we have actual content
+                if url != "N/A" or title != "N/A" or raw_content:
+                    return {
+                        "url": url,
+                        "title": title,
+                        "content_preview": f"{raw_content[:200]}..." if raw_content else "N/A"
+                    }
+
+            # If we get here, treat the content as raw text
+            if content and str(content).strip():
+                return {"raw_content": str(content)}
+
+            return {"error": "No valid content found"}
+        elif agent_name == "REPORTER":
+            # For reporter, just return the raw content without parsing
+            if hasattr(output, 'content'):
+                return {"report": output.content}
+            return {"report": str(output)}
+        else:
+            return content
+    except Exception as e:
+        return {"error": f"Error parsing content: {str(e)}", "raw_content": str(output)}
+
+
+def format_parsed_content(content: dict, colored: Callable = None) -> str:
+    """Format the parsed content for display"""
+    output_lines = []
+
+    # Handle error messages first
+    if "error" in content:
+        message = f"ERROR: {content['error']}"
+        return colored(message, "red") if colored else message
+
+    # Handle reporter content
+    if "report" in content:
+        return str(content["report"])
+
+    # Handle raw content
+    if "raw_content" in content:
+        output_lines.append("Raw Content:")
+        output_lines.append("-" * 40)
+        output_lines.append(str(content["raw_content"]))
+        output_lines.append("-" * 40)
+        return "\n".join(output_lines)
+
+    # Handle structured content
+    for key, value in content.items():
+        if value and value != "N/A":  # Only show non-empty and non-N/A values
+            key_formatted = key.replace('_', ' ').title()
+            output_lines.append(f"{key_formatted}:")
+            output_lines.append(f"  {value}")
+            output_lines.append("")
+
+    if output_lines:
+        return "\n".join(output_lines)
+    return colored("No valid content found", "red") if colored else "No valid content found"
+
+
+def _parsed(agent_name: str, output: Any) -> Any:
+    if agent_name in ("SERPER", "REDUCER"):
+        return getattr(output, "content", output)
+    return parse_agent_response(agent_name, output)
+
+
+class NullSink:
+    """Discards everything; agents skip the call entirely when `enabled` is false."""
+
+    enabled = False
+
+    def emit(self, agent_name: str, output: Any) -> None:
+        pass
+
+    def debug(self, agent_name: str, label: str, value: Callable[[], Any]) -> None:
+        pass
+
+
+class ConsoleSink:
+    """The original coloured banner output of the interactive CLI."""
+
+    enabled = True
+
+    def __init__(self, verbose: bool = None):
+        from termcolor import colored
+
+        self.colored = colored
+        # Full prompts are only printed on request (AGENT_OUTPUT_VERBOSE=1).
+        self.verbose = os.getenv("AGENT_OUTPUT_VERBOSE", "0") != "0" if verbose is None else verbose
+
+    def emit(self, agent_name: str, output: Any) -> None:
+        color = COLORS[agent_name]
+        parsed = _parsed(agent_name, output)
+        if isinstance(parsed, dict):
+            if agent_name in ("SERPER", "REDUCER"):
+                formatted_output = json.dumps(parsed, indent=2)
+            else:
+                formatted_output = format_parsed_content(parsed, self.colored)
+        else:
+            formatted_output = str(parsed)
+
+        print("\n" + "="*50)
+        print(self.colored(f"[{agent_name} AGENT]", color, attrs=['bold']))
+        print(self.colored("-"*50, color))
+        print(self.colored(formatted_output, color))
+        print(self.colored("="*50 + "\n", color))
+
+    def debug(self, agent_name: str, label: str, value: Callable[[], Any]) -> None:
+        if self.verbose:
+            print(f"{agent_name.title()} {label} : ", value(), sep="\n")
+
+
+class _LazyJson:
+    __slots__ = ("record",)
+
+    def __init__(self, record: Callable[[], dict]):
+        self.record = record
+
+    def __str__(self) -> str:
+        return json.dumps(self.record(), default=str)
+
+
+class LogSink:
+    """
+    One JSON record per agent step on the "focusaider.agents" logger.
+
+    Records are built only if the logger would actually handle them, so
+    raising the log level makes this as cheap as the null sink.
+    """
+
+    enabled = True
+
+    def __init__(self, logger: logging.Logger = None, max_chars: int = 2000):
+        self.logger = logger or logging.getLogger("focusaider.agents")
+        self.max_chars = max_chars
+
+    def _record(self, agent_name: str, output: Any) -> dict:
+        parsed = _parsed(agent_name, output)
+        if not isinstance(parsed, dict):
+            parsed = {"text": str(parsed)[:self.max_chars]}
+        elif "raw_content" in parsed:
+            parsed = {**parsed, "raw_content": parsed["raw_content"][:self.max_chars]}
+        elif "report" in parsed:
+            parsed = {**parsed, "report": str(parsed["report"])[:self.max_chars]}
+        return {"agent": agent_name, **parsed}
+
+    def emit(self, agent_name: str, output: Any) -> None:
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("%s", _LazyJson(lambda: self._record(agent_name, output)))
+
+    def debug(self, agent_name: str, label: str, value: Callable[[], Any]) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("%s", _LazyJson(lambda: {
+                "agent": agent_name, label: str(value())[:self.max_chars]
+            }))
+
+
+SINKS = {
+    "null": NullSink,
+    "console": ConsoleSink,
+    "log": LogSink,
+}
+
+_default_sink = None
+_current_sink: contextvars.ContextVar = contextvars.ContextVar("output_sink", default=None)
+
+
+def get_sink(name: str = None):
+    """Build the sink called `name`, or return the process default (AGENT_OUTPUT) when omitted."""
+    global _default_sink
+    if name is not None:
+        return SINKS[name]()
+    if _default_sink is None:
+        _default_sink = SINKS[os.getenv("AGENT_OUTPUT", "console")]()
+    return _default_sink
+
+
+def current_sink():
+    return _current_sink.get() or get_sink()
+
+
+@contextmanager
+def use_sink(sink):
+    """Send agent output in this block (one graph run, say) to `sink`, a sink instance or name."""
+    token = _current_sink.set(get_sink(sink) if isinstance(sink, str) else sink)
+    try:
+        yield
+    finally:
+        _current_sink.reset(token)
+
+
+def emit(agent_name: str, output: Any) -> None:
+    sink = current_sink()
+    if sink.enabled:
+        sink.emit(agent_name, output)
+
+
+def debug(agent_name: str, label: str, value: Callable[[], Any]) -> None:
+    """Emit a large diagnostic (e.g. a full prompt); `value` is only called if a sink wants it."""
+    sink = current_sink()
+    if sink.enabled:
+        sink.debug(agent_name, label, value)
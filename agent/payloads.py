@@ -0,0 +1,148 @@
+"""
+Typed node outputs kept in `AgentGraph` next to the message history.
+
+The model's JSON is decoded once, in `GroqJsonModel`, and turned into one of
+these here; downstream nodes read fields instead of re-parsing message text.
+A model-side failure (the `{"error": ...}` messages `GroqJsonModel` returns)
+is carried in `error` rather than raising later as a KeyError.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+def _fields(data: Any) -> Dict[str, Any]:
+    return data if isinstance(data, dict) else {"error": f"Expected a JSON object, got {type(data).__name__}"}
+
+
+def _text(data: Dict[str, Any], key: str) -> str:
+    value = data.get(key)
+    return value if isinstance(value, str) else ""
+
+
+@dataclass(slots=True)
+class Plan:
+    search_term: str
+    search_terms: List[str] = field(default_factory=list)
+    overall_strategy: str = ""
+    additional_information: str = ""
+    error: Optional[str] = None
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Plan":
+        data = _fields(data)
+        terms = data.get("search_terms")
+        return cls(
+            search_term=_text(data, "search_term"),
+            search_terms=[term for term in terms if isinstance(term, str)] if isinstance(terms, list) else [],
+            overall_strategy=_text(data, "overall_strategy"),
+            additional_information=_text(data, "additional_information"),
+            error=data.get("error"),
+        )
+
+    def terms(self, limit: int = None) -> List[str]:
+        """The primary term followed by the alternatives, without blanks or duplicates (ignoring case)."""
+        terms, seen = [], set()
+        for term in [self.search_term, *self.search_terms]:
+            key = " ".join(term.lower().split())
+            if key and key not in seen:
+                seen.add(key)
+                terms.append(term.strip())
+        return terms[:limit] if limit else terms
+
+
+@dataclass(slots=True)
+class Selection:
+    selected_page_url: str
+    selected_page_urls: List[str] = field(default_factory=list)
+    description: str = ""
+    reason_for_selection: str = ""
+    error: Optional[str] = None
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Selection":
+        data = _fields(data)
+        ranked = data.get("selected_page_urls")
+        return cls(
+            selected_page_url=_text(data, "selected_page_url"),
+            selected_page_urls=[url for url in ranked if isinstance(url, str)] if isinstance(ranked, list) else [],
+            description=_text(data, "description"),
+            reason_for_selection=_text(data, "reason_for_selection"),
+            error=data.get("error"),
+        )
+
+    def urls(self, limit: int = None) -> List[str]:
+        """The primary URL followed by the ranked alternatives, without duplicates."""
+        urls = []
+        for url in [self.selected_page_url, *self.selected_page_urls]:
+            if url and url not in urls:
+                urls.append(url)
+        return urls[:limit] if limit else urls
+
+
+@dataclass(slots=True)
+class ScrapeResult:
+    urls: List[str]
+    text: str
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class LocalPage:
+    """A previously scraped page recalled from `local_index` in place of a web search."""
+    url: str
+    title: str
+    chunks: List[str]
+    score: float
+
+
+@dataclass(slots=True)
+class Report:
+    text: str
+    error: Optional[str] = None
+
+
+def _flag(data: Dict[str, Any], key: str) -> bool:
+    # The prompt asks for "True/False", so accept strings as well as JSON booleans.
+    value = data.get(key)
+    if isinstance(value, str):
+        return value.strip().lower() == "true"
+    return bool(value)
+
+
+@dataclass(slots=True)
+class Review:
+    feedback: str
+    pass_review: bool = False
+    comprehensive: bool = False
+    citations_provided: bool = False
+    relevant_to_research_question: bool = False
+    error: Optional[str] = None
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Review":
+        data = _fields(data)
+        return cls(
+            feedback=_text(data, "feedback"),
+            pass_review=_flag(data, "pass_review"),
+            comprehensive=_flag(data, "comprehensive"),
+            citations_provided=_flag(data, "citations_provided"),
+            relevant_to_research_question=_flag(data, "relevant_to_research_question"),
+            error=data.get("error"),
+        )
+
+
+ROUTES = ("planner", "selector", "reporter", "final_report")
+
+
+@dataclass(slots=True)
+class Route:
+    next_agent: str
+    reason: str = ""
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Route":
+        data = _fields(data)
+        next_agent = _text(data, "next_agent").strip().lower()
+        if next_agent not in ROUTES:
+            return cls("final_report", reason=data.get("error") or f"unknown next_agent {next_agent!r}")
+        return cls(next_agent, reason="router")
@@ -4,7 +4,8 @@ Questions may vary from simple to complex, multi-step queries. Your plan should
 team to use an internet search engine effectively.
 
 Focus on highlighting the most relevant search term to start with, as another team member will use your suggestions 
-to search for relevant information.
+to search for relevant information. When more than one search term is allowed, add different phrasings or angles 
+on the question that would surface pages the first term misses.
 
 If you receive feedback, you must adjust your plan accordingly. Here is the feedback received:
 Feedback: {feedback}
@@ -15,6 +16,7 @@ Current date and time:
 Your response must take the following json format:
 
     "search_term": "The most relevant search term to start with"
+    "search_terms": "A list of up to {num_queries} distinct search terms, starting with search_term"
     "overall_strategy": "The overall strategy to guide the search process"
     "additional_information": "Any additional information to guide the search including other search terms or filters"
 
@@ -27,6 +29,11 @@ planner_guided_json = {
             "type": "string",
             "description": "The most relevant search term to start with"
         },
+        "search_terms": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Up to N distinct search terms, starting with search_term"
+        },
         "overall_strategy": {
             "type": "string",
             "description": "The overall strategy to guide the search process"
@@ -51,6 +58,7 @@ here is the search engine results page:
 Return your findings in the following json format:
 
     "selected_page_url": "The exact URL of the page you selected",
+    "selected_page_urls": "A list of up to {num_pages} exact URLs from the results, ranked from most to least relevant, starting with selected_page_url",
     "description": "A brief description of the page",
     "reason_for_selection": "Why you selected this page"
 
@@ -73,6 +81,11 @@ selector_guided_json = {
             "type": "string",
             "description": "The exact URL of the page you selected"
         },
+        "selected_page_urls": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Up to N exact URLs from the results, ranked from most to least relevant"
+        },
         "description": {
             "type": "string",
             "description": "A brief description of the page"
@@ -0,0 +1,205 @@
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket refilled at `per_minute` permits per minute.
+
+    The bucket holds `burst` permits, ten seconds' worth by default.
+    A `per_minute` of 0 means unlimited, though `pause` still applies.
+
+    `acquire` blocks the calling thread; `aacquire` sleeps on the event loop.
+    Every caller in the process shares the same bucket.
+    """
+
+    def __init__(self, per_minute: float, burst: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, per_minute / 6.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _reserve(self, amount: float) -> float:
+        """Take `amount` permits and return how long the caller must wait for them."""
+        with self._lock:
+            now = time.monotonic()
+            blocked = max(0.0, self.blocked_until - now)
+            if self.rate <= 0:
+                return blocked
+            self._refill(now)
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return blocked
+            return max(blocked, -self.tokens / self.rate)
+
+    def wait_time(self, amount: float = 1.0) -> float:
+        """How long `acquire(amount)` would block right now, without taking any permits."""
+        with self._lock:
+            now = time.monotonic()
+            blocked = max(0.0, self.blocked_until - now)
+            if self.rate <= 0:
+                return blocked
+            self._refill(now)
+            return max(blocked, (amount - self.tokens) / self.rate)
+
+    def acquire(self, amount: float = 1.0) -> None:
+        delay = self._reserve(amount)
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self, amount: float = 1.0) -> None:
+        delay = self._reserve(amount)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back for `seconds`, e.g. after a 429 with Retry-After."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def sync(self, remaining: Optional[float], reset: Optional[float]) -> None:
+        """
+        Align the bucket with the server's view of the current window.
+
+        Args:
+            remaining (float, optional): Permits the server says are left.
+            reset (float, optional): Seconds until the server's window resets.
+        """
+        if remaining is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self.rate > 0:
+                self._refill(now)
+                self.tokens = min(self.tokens, remaining)
+            if remaining <= 0 and reset:
+                self.blocked_until = max(self.blocked_until, now + reset)
+
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a reset/retry duration such as "7.66s", "2m59.56s", "500ms" or "12" into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None, base: float = 0.5, cap: float = 30.0) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based).
+
+    Honours a server-supplied Retry-After, plus a little jitter so waiting
+    callers do not all retry at once; otherwise uses full-jitter exponential
+    backoff capped at `cap`.
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, base)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _header_number(headers, name: str) -> Optional[float]:
+    try:
+        value = headers.get(name)
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class UpstreamLimiter:
+    """
+    Request and token budgets for one upstream service.
+
+    `acquire(tokens)` waits for both one request permit and `tokens` token
+    permits. `update_from_headers` keeps the buckets in line with the
+    x-ratelimit-* headers an OpenAI-compatible API returns on every response.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float = 0):
+        self.requests = RateLimiter(requests_per_minute)
+        self.tokens = RateLimiter(tokens_per_minute)
+
+    def acquire(self, tokens: float = 0) -> None:
+        delay = max(self.requests._reserve(1), self.tokens._reserve(tokens))
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens: float = 0) -> None:
+        delay = max(self.requests._reserve(1), self.tokens._reserve(tokens))
+        if delay:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        self.requests.pause(seconds)
+
+    def wait_time(self, tokens: float = 0) -> float:
+        """How long `acquire(tokens)` would block right now; used for admission control."""
+        return max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def update_from_headers(self, headers) -> None:
+        self.requests.sync(
+            _header_number(headers, "x-ratelimit-remaining-requests"),
+            parse_duration(headers.get("x-ratelimit-reset-requests")),
+        )
+        self.tokens.sync(
+            _header_number(headers, "x-ratelimit-remaining-tokens"),
+            parse_duration(headers.get("x-ratelimit-reset-tokens")),
+        )
+
+
+# Per-minute budgets per upstream service, as (environment variable, default). 0 disables a limit.
+SERVICE_LIMITS = {
+    "groq": {
+        "requests": ("GROQ_REQUESTS_PER_MINUTE", "30"),
+        "tokens": ("GROQ_TOKENS_PER_MINUTE", "0"),
+    },
+    "serpapi": {
+        "requests": ("SERPAPI_REQUESTS_PER_MINUTE", "60"),
+    },
+    # Any other OpenAI-compatible server (vLLM, llama.cpp); usually self-hosted and unmetered.
+    "openai": {
+        "requests": ("OPENAI_REQUESTS_PER_MINUTE", "0"),
+        "tokens": ("OPENAI_TOKENS_PER_MINUTE", "0"),
+    },
+}
+
+_limiters: Dict[str, UpstreamLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(service: str) -> UpstreamLimiter:
+    """Return the process-wide limiter for `service` ("groq", "serpapi" or "openai")."""
+    limiter = _limiters.get(service)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(service)
+            if limiter is None:
+                budgets = {
+                    kind: float(os.getenv(env, default))
+                    for kind, (env, default) in SERVICE_LIMITS[service].items()
+                }
+                limiter = _limiters[service] = UpstreamLimiter(
+                    budgets["requests"], budgets.get("tokens", 0)
+                )
+    return limiter
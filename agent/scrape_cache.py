@@ -0,0 +1,240 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url_key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    body_hash TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    text TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at);
+CREATE TABLE IF NOT EXISTS bodies (
+    hash TEXT PRIMARY KEY,
+    body BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+COUNTERS = ("hits", "misses", "revalidations", "refreshes", "stores", "evictions", "bytes_saved")
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonicalize a URL for use as a cache key.
+
+    Lowercases the scheme and host, drops default ports and fragments, and
+    sorts the query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+@dataclass
+class CacheEntry:
+    url_key: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    text: str
+    size: int
+    fetched_at: float
+    fresh: bool
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers for a conditional GET that revalidates this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ScrapeCache:
+    """
+    On-disk cache of scraped pages, shared by every worker process on the host.
+
+    Pages are keyed by normalized URL. Raw bodies are stored once per content
+    hash, so mirrors and redirects that serve identical bytes share storage.
+    SQLite in WAL mode provides the cross-process locking.
+    """
+
+    def __init__(self, path: str, ttl: float = 86400, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, conn: sqlite3.Connection, **deltas: int) -> None:
+        conn.executemany(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            [(name, delta) for name, delta in deltas.items() if delta],
+        )
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Return the cached entry for `url`, fresh or stale, or None on a miss."""
+        url_key = normalize_url(url)
+        row = self._connect().execute(
+            "SELECT etag, last_modified, text, size, fetched_at FROM pages WHERE url_key = ?",
+            (url_key,),
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, text, size, fetched_at = row
+        return CacheEntry(
+            url_key=url_key,
+            etag=etag,
+            last_modified=last_modified,
+            text=text,
+            size=size,
+            fetched_at=fetched_at,
+            fresh=time.time() - fetched_at < self.ttl,
+        )
+
+    def record_hit(self, entry: CacheEntry) -> None:
+        conn = self._connect()
+        conn.execute("UPDATE pages SET accessed_at = ? WHERE url_key = ?", (time.time(), entry.url_key))
+        self._bump(conn, hits=1, bytes_saved=entry.size)
+
+    def record_miss(self) -> None:
+        self._bump(self._connect(), misses=1)
+
+    def record_revalidated(self, entry: CacheEntry) -> None:
+        """The origin answered 304 Not Modified: the entry is fresh again."""
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url_key = ?",
+            (now, now, entry.url_key),
+        )
+        self._bump(conn, revalidations=1, bytes_saved=entry.size)
+
+    def store(
+        self,
+        url: str,
+        body: bytes,
+        text: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        revalidated: bool = False,
+    ) -> None:
+        """
+        Store a freshly downloaded page and evict least recently used pages over budget.
+
+        Args:
+            url (str): The requested URL.
+            body (bytes): The raw response body.
+            text (str): The extracted text returned to callers.
+            etag (str, optional): The response ETag header.
+            last_modified (str, optional): The response Last-Modified header.
+            revalidated (bool): True when this replaces a stale entry after a 200.
+        """
+        url_key = normalize_url(url)
+        body_hash = hashlib.sha256(body).hexdigest()
+        size = len(body) + len(text.encode("utf-8"))
+        now = time.time()
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR IGNORE INTO bodies (hash, body) VALUES (?, ?)", (body_hash, body))
+            conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(url_key, url, body_hash, etag, last_modified, text, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url_key, url, body_hash, etag, last_modified, text, size, now, now),
+            )
+            self._bump(conn, stores=1, refreshes=int(revalidated))
+            self._evict(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for url_key, size in conn.execute(
+            "SELECT url_key, size FROM pages ORDER BY accessed_at ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM pages WHERE url_key = ?", (url_key,))
+            total -= size
+            evicted += 1
+        conn.execute("DELETE FROM bodies WHERE hash NOT IN (SELECT body_hash FROM pages)")
+        self._bump(conn, evictions=evicted)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the shared hit/miss/revalidation counters plus current size."""
+        conn = self._connect()
+        stats = {name: 0 for name in COUNTERS}
+        stats.update(dict(conn.execute("SELECT name, value FROM counters").fetchall()))
+        entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        stats["entries"] = entries
+        stats["bytes_stored"] = total
+        return stats
+
+
+_cache: Optional[ScrapeCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_scrape_cache() -> Optional[ScrapeCache]:
+    """
+    Return the process-wide scrape cache, or None when caching is disabled.
+
+    Configured through SCRAPE_CACHE_PATH (the SQLite file, e.g.
+    ~/.cache/focusaider/scrape_cache.sqlite3; unset or empty disables the cache),
+    SCRAPE_CACHE_TTL (seconds) and SCRAPE_CACHE_MAX_BYTES.
+    """
+    global _cache
+    if _cache is None:
+        path = os.getenv("SCRAPE_CACHE_PATH", "")
+        if not path:
+            return None
+        with _cache_lock:
+            if _cache is None:
+                _cache = ScrapeCache(
+                    path,
+                    ttl=float(os.getenv("SCRAPE_CACHE_TTL", "86400")),
+                    max_bytes=int(os.getenv("SCRAPE_CACHE_MAX_BYTES", str(512 * 1024 * 1024))),
+                )
+    return _cache
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+def search_cache_key(query: str, engine: str, num_results: int) -> Tuple[str, str, int]:
+    """Cache key for a search: case- and whitespace-insensitive query, engine and result count."""
+    return (" ".join(query.lower().split()), engine, num_results)
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SearchCache:
+    """
+    In-process TTL cache with single-flight coalescing.
+
+    Concurrent `get_or_fetch` calls for the same key share one upstream call:
+    the first caller fetches, the others wait for its result (or its exception).
+    Only successful results are cached.
+    """
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _get_fresh(self, key: Hashable):
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        stored_at, value = item
+        if time.monotonic() - stored_at >= self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return item
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for `key`, calling `fetch` at most once across concurrent callers.
+
+        Args:
+            key (Hashable): Cache key, usually from `search_cache_key`.
+            fetch (Callable[[], Any]): Performs the upstream call on a miss.
+
+        Returns:
+            Any: The cached or freshly fetched value.
+        """
+        with self._lock:
+            item = self._get_fresh(key)
+            if item is not None:
+                self.hits += 1
+                return item[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            if self.ttl > 0:
+                with self._lock:
+                    self._entries[key] = (time.monotonic(), flight.result)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            return flight.result
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self._entries),
+            }
+
+
+_cache: Optional[SearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """
+    Return the process-wide search cache.
+
+    Configured through SERPAPI_CACHE_TTL (seconds, 0 keeps coalescing but stores
+    nothing) and SERPAPI_CACHE_MAX_ENTRIES.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SearchCache(
+                    ttl=float(os.getenv("SERPAPI_CACHE_TTL", "3600")),
+                    max_entries=int(os.getenv("SERPAPI_CACHE_MAX_ENTRIES", "1024")),
+                )
+    return _cache
@@ -0,0 +1,462 @@
+"""
+Research service: an HTTP/JSON API in front of a bounded job queue and a worker pool.
+
+    python service.py --port 8080 --workers 4 --queue-size 64
+
+    POST /jobs               {"question": "...", "id": optional} -> 202 {"id", "status", "position", ...}
+    GET  /jobs/<id>          status, queue and run times, usage and the number of progress events
+    GET  /jobs/<id>/events   progress events after ?after=<seq>, waiting up to ?wait=<seconds> for one
+    GET  /jobs/<id>/stream   the same events as Server-Sent Events, ending with a "done" event
+    GET  /jobs/<id>/report   the final report (409 until the job has finished)
+    GET  /health             queue depth, busy workers, upstream waits and totals
+
+Each job runs `batch.run_question` on a worker thread, so the compiled graph,
+the caches and the rate limiters are shared by every job in the process. A
+progress event is a small summary of what one node changed (search terms,
+selected URLs, review verdict, usage); the full state stays on the server.
+
+Admission control keeps a backlog from building up: a submission is rejected
+with 429 and Retry-After when the queue is full and, with
+SERVICE_ADMISSION=reject, when an upstream budget (see `rate_limit`) would
+make a new call wait longer than SERVICE_MAX_UPSTREAM_WAIT seconds. With the
+default SERVICE_ADMISSION=queue such jobs are accepted, and workers leave
+them queued until the budgets recover instead of starting runs that would
+only sleep in the limiters.
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from batch import run_question
+from config import load_env
+from llm_backend import route
+from rate_limit import get_limiter
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_MODES = ("queue", "reject")
+AGENTS = ("planner", "selector", "reporter", "reviewer", "router")
+MAX_BODY_BYTES = 64 * 1024
+
+# State key -> summary of a new value in a progress event.
+_PROGRESS = {
+    "plan": lambda plan: {"search_terms": plan.terms(), "error": plan.error},
+    "local_pages": lambda pages: {"urls": [page.url for page in pages]},
+    "selection": lambda selection: {"urls": selection.urls(), "error": selection.error},
+    "scrape": lambda scrape: {"urls": scrape.urls, "chars": len(scrape.text), "error": scrape.error},
+    "report": lambda report: {"chars": len(report.text), "error": report.error},
+    "review": lambda review: {"pass_review": review.pass_review, "feedback": review.feedback, "error": review.error},
+    "route": lambda route: {"next_agent": route.next_agent, "reason": route.reason},
+    "usage": lambda usage: usage.as_dict(),
+}
+
+
+class Rejected(Exception):
+    """A submission turned away by admission control; `retry_after` is a hint in seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Job:
+    """One submitted question: its status, progress events and, once finished, the `run_question` result."""
+
+    def __init__(self, job_id: str, question: str):
+        self.id = job_id
+        self.question = question
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.events: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self._submitted = time.perf_counter()
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._seen: Dict[str, Any] = {}
+        self._changed = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    @property
+    def queue_seconds(self) -> Optional[float]:
+        return self._started - self._submitted if self._started is not None else None
+
+    def start(self) -> None:
+        with self._changed:
+            self.status = "running"
+            self._started = time.perf_counter()
+            self._changed.notify_all()
+
+    def add_update(self, node: str, values: Dict[str, Any]) -> None:
+        """Record a progress event for what `node` changed; payloads are replaced, never mutated, so `is` tells."""
+        changed = {
+            key: value for key, value in values.items()
+            if key in _PROGRESS and value is not None and self._seen.get(key) is not value
+        }
+        self._seen.update(changed)
+        event = {"node": node, "at": time.time()}
+        event.update((key, _PROGRESS[key](value)) for key, value in changed.items())
+        with self._changed:
+            event["seq"] = len(self.events) + 1
+            self.events.append(event)
+            self._changed.notify_all()
+
+    def finish(self, result: Dict[str, Any]) -> None:
+        with self._changed:
+            self.result = result
+            self.status = "failed" if result["error"] or not result["report"] else "done"
+            self._finished = time.perf_counter()
+            self._changed.notify_all()
+
+    def wait_events(self, after: int, timeout: float) -> Tuple[List[Dict[str, Any]], bool]:
+        """Events after sequence number `after`, waiting up to `timeout` seconds for one; and whether the job is done."""
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.events) > after or self.done, timeout)
+            return self.events[after:], self.done
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._changed:
+            run_seconds = None
+            if self._started is not None:
+                run_seconds = (self._finished or time.perf_counter()) - self._started
+            return {
+                "id": self.id,
+                "question": self.question,
+                "status": self.status,
+                "submitted_at": self.submitted_at,
+                "queue_ms": round(self.queue_seconds * 1000, 1) if self.queue_seconds is not None else None,
+                "run_ms": round(run_seconds * 1000, 1) if run_seconds is not None else None,
+                "events": len(self.events),
+                "error": self.result["error"] if self.result else None,
+                "usage": self.result["usage"] if self.result else None,
+            }
+
+
+class ResearchService:
+    """
+    A bounded queue of research jobs drained by a pool of worker threads.
+
+    Configured through SERVICE_WORKERS, SERVICE_QUEUE_SIZE, SERVICE_ADMISSION
+    ("queue" or "reject"), SERVICE_MAX_UPSTREAM_WAIT (seconds) and
+    SERVICE_MAX_JOBS (finished jobs kept for polling); arguments override them.
+    """
+
+    def __init__(
+        self,
+        workers: int = None,
+        queue_size: int = None,
+        admission: str = None,
+        max_upstream_wait: float = None,
+        max_jobs: int = None,
+        recursion_limit: int = 50,
+    ):
+        load_env()
+        self.workers = workers or int(os.getenv("SERVICE_WORKERS", "4"))
+        self.queue_size = queue_size or int(os.getenv("SERVICE_QUEUE_SIZE", "64"))
+        self.admission = admission or os.getenv("SERVICE_ADMISSION", "queue")
+        if self.admission not in ADMISSION_MODES:
+            raise ValueError(f"Unknown admission mode {self.admission!r}; expected one of {ADMISSION_MODES}")
+        self.max_upstream_wait = (
+            max_upstream_wait if max_upstream_wait is not None
+            else float(os.getenv("SERVICE_MAX_UPSTREAM_WAIT", "10"))
+        )
+        self.max_jobs = max_jobs or int(os.getenv("SERVICE_MAX_JOBS", "1000"))
+        self.recursion_limit = recursion_limit
+        # Every service an agent's backend is metered by, plus the searches.
+        self.services = sorted(
+            {"serpapi"} | {getattr(route(agent)[0], "service", None) for agent in AGENTS} - {None}
+        )
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize=self.queue_size)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._busy = 0
+        self._run_seconds = 0.0
+        self.totals = Counter()
+
+    def start(self) -> "ResearchService":
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"research-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def close(self, timeout: float = None) -> None:
+        """Stop taking jobs from the queue and wait for the running ones to finish."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def upstream_wait(self) -> Dict[str, float]:
+        """Seconds a new call to each upstream service would wait in its limiter right now."""
+        return {service: get_limiter(service).wait_time() for service in self.services}
+
+    def _saturation(self) -> float:
+        """How far the busiest upstream budget is past SERVICE_MAX_UPSTREAM_WAIT, in seconds (0 when it is not)."""
+        return max(0.0, max(self.upstream_wait().values(), default=0.0) - self.max_upstream_wait)
+
+    def _queue_retry_after(self) -> float:
+        # Until roughly one worker's worth of the queue has drained.
+        return max(1.0, self._run_seconds * self.queue_size / self.workers)
+
+    def submit(self, question: str, job_id: str = None) -> Job:
+        """Queue `question`; raises ValueError for a bad request and `Rejected` when admission control says no."""
+        if not isinstance(question, str) or not question.strip():
+            raise ValueError("'question' must be a non-empty string")
+        if job_id is not None and not re.fullmatch(r"[\w.-]{1,128}", str(job_id)):
+            raise ValueError("'id' must be 1-128 letters, digits, '.', '_' or '-'")
+        if self.admission == "reject":
+            saturation = self._saturation()
+            if saturation:
+                self.totals["rejected_upstream"] += 1
+                raise Rejected("upstream budget saturated", saturation)
+        job = Job(str(job_id) if job_id is not None else uuid.uuid4().hex, question.strip())
+        with self._lock:
+            if job.id in self._jobs:
+                raise ValueError(f"job {job.id!r} already exists")
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self.totals["rejected_queue_full"] += 1
+                raise Rejected("queue full", self._queue_retry_after()) from None
+            self._jobs[job.id] = job
+            self.totals["submitted"] += 1
+            self._evict()
+        return job
+
+    def _evict(self) -> None:
+        # Forget the oldest finished jobs beyond SERVICE_MAX_JOBS; queued and running ones are always kept.
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [job.id for job in self._jobs.values() if job.done][:max(0, excess)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def position(self, job: Job) -> int:
+        """Jobs queued ahead of `job`, counting it (0 once it has started)."""
+        if job.status != "queued":
+            return 0
+        with self._lock:
+            queued = [other for other in self._jobs.values() if other.status == "queued"]
+        return next((i for i, other in enumerate(queued, start=1) if other is job), 0)
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            saturation = self._saturation()
+            if saturation:
+                # Starting a run now would only park its calls in the limiters; leave the job queued.
+                self._stop.wait(min(saturation, 1.0))
+                continue
+            try:
+                job = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            self._run(job)
+
+    def _run(self, job: Job) -> None:
+        job.start()
+        with self._lock:
+            self._busy += 1
+        started = time.perf_counter()
+        try:
+            result = run_question(
+                {"id": job.id, "question": job.question}, self.recursion_limit, on_update=job.add_update
+            )
+        except Exception as e:
+            # run_question reports run failures in its result; anything escaping it must still
+            # finish the job, or it stays "running" and this worker thread dies with it.
+            logger.exception("job %s failed outside the run", job.id)
+            result = {
+                "id": job.id,
+                "question": job.question,
+                "report": None,
+                "error": f"{type(e).__name__}: {e}",
+                "latency": time.perf_counter() - started,
+                "usage": None,
+            }
+        finally:
+            with self._lock:
+                self._busy -= 1
+        job.finish(result)
+        with self._lock:
+            self.totals[job.status] += 1
+            # Moving average of run time, for the Retry-After of a full queue.
+            self._run_seconds = result["latency"] if not self._run_seconds else 0.8 * self._run_seconds + 0.2 * result["latency"]
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            busy, jobs, totals = self._busy, len(self._jobs), dict(self.totals)
+        return {
+            "workers": self.workers,
+            "busy": busy,
+            "queued": self._queue.qsize(),
+            "queue_size": self.queue_size,
+            "admission": self.admission,
+            "upstream_wait": self.upstream_wait(),
+            "mean_run_ms": round(self._run_seconds * 1000, 1),
+            "jobs": jobs,
+            "totals": totals,
+        }
+
+
+_JOB_PATH = re.compile(r"^/jobs/([\w.-]+)(?:/(events|stream|report))?$")
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Routes the JSON API onto `self.server.service`."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "ResearchService/1.0"
+    # Seconds between keep-alive comments on an idle event stream.
+    stream_keepalive = 15.0
+
+    @property
+    def service(self) -> ResearchService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, body: Any, headers: Dict[str, str] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str, headers: Dict[str, str] = None) -> None:
+        self._send_json(status, {"error": message}, headers)
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/jobs":
+            return self._error(404, "not found")
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            return self._error(413, f"request body over {MAX_BODY_BYTES} bytes")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("expected a JSON object")
+            job = self.service.submit(body.get("question"), body.get("id"))
+        except Rejected as e:
+            return self._error(429, e.reason, {"Retry-After": str(max(1, round(e.retry_after)))})
+        except ValueError as e:
+            return self._error(400, str(e))
+        self._send_json(
+            202,
+            {**job.as_dict(), "position": self.service.position(job)},
+            {"Location": f"/jobs/{job.id}"},
+        )
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/health":
+            return self._send_json(200, self.service.health())
+        match = _JOB_PATH.match(url.path)
+        job = self.service.get(match.group(1)) if match else None
+        if job is None:
+            return self._error(404, "not found")
+        view = match.group(2)
+        try:
+            after = int(self.headers.get("Last-Event-ID") or params.get("after", 0))
+            wait = min(float(params.get("wait", 0)), 30.0)
+        except ValueError:
+            return self._error(400, "'after' and 'wait' must be numbers")
+        if view is None:
+            return self._send_json(200, {**job.as_dict(), "position": self.service.position(job)})
+        if view == "events":
+            events, done = job.wait_events(after, wait)
+            return self._send_json(200, {"status": job.status, "done": done, "events": events})
+        if view == "report":
+            if not job.done:
+                return self._error(409, f"job is {job.status}")
+            result = job.result
+            return self._send_json(
+                200, {"id": job.id, "status": job.status, "report": result["report"], "error": result["error"]}
+            )
+        self._stream(job, after)
+
+    def _stream(self, job: Job, after: int) -> None:
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            while True:
+                events, done = job.wait_events(after, self.stream_keepalive)
+                for event in events:
+                    self.wfile.write(f"id: {event['seq']}\nevent: progress\ndata: {json.dumps(event)}\n\n".encode())
+                    after = event["seq"]
+                if done and not events:
+                    self.wfile.write(f"event: done\ndata: {json.dumps(job.as_dict())}\n\n".encode())
+                    self.wfile.flush()
+                    return
+                if not events:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client went away; the job carries on
+
+
+def make_server(service: ResearchService, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+    """An HTTP server for `service`; call `serve_forever()` on it (port 0 picks a free port)."""
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve research questions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, help="concurrent runs (SERVICE_WORKERS, default 4)")
+    parser.add_argument("--queue-size", type=int, help="jobs waiting for a worker (SERVICE_QUEUE_SIZE, default 64)")
+    parser.add_argument("--admission", choices=ADMISSION_MODES, help="when upstream budgets are saturated (SERVICE_ADMISSION)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    from graph import get_graph
+
+    # Compile before accepting work rather than on the first job.
+    get_graph()
+    service = ResearchService(args.workers, args.queue_size, args.admission).start()
+    server = make_server(service, args.host, args.port)
+    logger.info(
+        "serving on http://%s:%d with %d workers, queue of %d, admission=%s",
+        *server.server_address[:2], service.workers, service.queue_size, service.admission,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
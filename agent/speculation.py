@@ -0,0 +1,151 @@
+import asyncio
+import contextvars
+import json
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, Tuple
+
+from search_cache import search_cache_key
+
+
+def speculative_search_enabled() -> bool:
+    """Whether the planner streams and starts the search early (SPECULATIVE_SEARCH, off by default)."""
+    return os.getenv("SPECULATIVE_SEARCH", "0") == "1"
+
+
+def _key(owner: str, term: str) -> Tuple[str, str]:
+    return owner, search_cache_key(term, "", 0)[0]
+
+
+class JsonStringField:
+    """
+    Picks one top-level string field out of a JSON object as it streams in.
+
+    `feed` returns the decoded value as soon as its closing quote has arrived
+    and None until then; later chunks are ignored.
+    """
+
+    def __init__(self, name: str):
+        self._pattern = re.compile(r'"%s"\s*:\s*("(?:[^"\\]|\\.)*")' % re.escape(name))
+        self._buffer = []
+        self.value: Optional[str] = None
+
+    def feed(self, chunk: str) -> Optional[str]:
+        if self.value is not None:
+            return None
+        self._buffer.append(chunk)
+        match = self._pattern.search("".join(self._buffer))
+        if match is None:
+            return None
+        self.value = json.loads(match.group(1))
+        return self.value
+
+
+class SpeculativeSearches:
+    """
+    Searches started from a partial planner completion, waiting to be claimed by the search node.
+
+    Entries are keyed by the owning run (its checkpoint thread_id) and the
+    normalized search term, so concurrent runs that plan the same term never
+    claim or discard each other's searches. The planner discards an
+    entry when its final term differs, and the search node when the local
+    index answers instead. A discarded search that has not started is
+    cancelled; one already running is handed back so the discarding node can
+    wait for it (see `wait_discarded`), and no search outlives the node that
+    gave it up. Its result still lands in the search cache. Whoever drives a
+    run calls `release` when it ends, which settles anything it left behind.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative-search")
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self.started = 0
+        self.used = 0
+        self.discarded = 0
+
+    def start(self, owner: str, term: str, search: Callable[[str], str]) -> None:
+        """Run `search(term)` in the background for `owner` unless it already has the same term pending."""
+        key = _key(owner, term)
+        with self._lock:
+            if key in self._pending:
+                return
+            context = contextvars.copy_context()
+            self._pending[key] = self._executor.submit(context.run, search, term)
+            self.started += 1
+
+    def claim(self, owner: str, term: str) -> Optional[Future]:
+        """`owner`'s pending search for `term`, removed from the table, or None."""
+        with self._lock:
+            future = self._pending.pop(_key(owner, term), None)
+            if future is not None:
+                self.used += 1
+            return future
+
+    def discard(self, owner: str, term: str) -> Optional[Future]:
+        """
+        Drop `owner`'s pending search for `term`, cancelling it if it has not started.
+
+        Returns the future if it is already running, so the caller can wait
+        for it; None otherwise.
+        """
+        return self._drop(_key(owner, term))
+
+    def _drop(self, key: Tuple[str, str]) -> Optional[Future]:
+        with self._lock:
+            future = self._pending.pop(key, None)
+            if future is None:
+                return None
+            self.discarded += 1
+        return None if future.cancel() or future.done() else future
+
+    def settle(self, owner: str, speculated: str, final: str) -> Optional[Future]:
+        """Discard the search started for `speculated` if the finished plan chose a different term."""
+        if _key(owner, speculated) != _key(owner, final):
+            return self.discard(owner, speculated)
+        return None
+
+    def release(self, owner: str) -> None:
+        """Discard every search `owner` left unclaimed (a run that failed or stopped early) and wait for them."""
+        with self._lock:
+            keys = [key for key in self._pending if key[0] == owner]
+        # Drop them all first, so a queued one is cancelled instead of starting while another is waited for.
+        running = [future for future in map(self._drop, keys) if future is not None]
+        wait(running)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "started": self.started,
+                "used": self.used,
+                "discarded": self.discarded,
+                "pending": len(self._pending),
+            }
+
+
+def wait_discarded(future: Optional[Future]) -> None:
+    """Block until a discarded search that was already running has finished; its outcome is ignored."""
+    if future is not None:
+        wait([future])
+
+
+async def await_discarded(future: Optional[Future]) -> None:
+    """Async counterpart of `wait_discarded`."""
+    if future is not None:
+        await asyncio.wait([asyncio.wrap_future(future)])
+
+
+_searches: Optional[SpeculativeSearches] = None
+_searches_lock = threading.Lock()
+
+
+def get_speculative_searches() -> SpeculativeSearches:
+    """Return the process-wide table of speculative searches (SPECULATIVE_SEARCH_WORKERS threads)."""
+    global _searches
+    if _searches is None:
+        with _searches_lock:
+            if _searches is None:
+                _searches = SpeculativeSearches(int(os.getenv("SPECULATIVE_SEARCH_WORKERS", "4")))
+    return _searches
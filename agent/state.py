@@ -1,5 +1,7 @@
-from typing import TypedDict, Annotated
+from typing import TypedDict, Annotated, List, Optional
 from langgraph.graph.message import add_messages
+from payloads import LocalPage, Plan, Report, Review, Route, ScrapeResult, Selection
+from budget import Usage
 
 
 class AgentGraph(TypedDict):
@@ -13,6 +15,19 @@ class AgentGraph(TypedDict):
     scraper_response: Annotated[list, add_messages]
     final_reports: Annotated[list, add_messages]
     end_chain: Annotated[list, add_messages]
+    research_context: str # scraped research reduced to the reporter's token budget
+    research_tokens_saved: int
+    selection_history: list # last few selected URLs, bounded by HISTORY_MAX_SELECTIONS
+    report_history: list # last few reports as plain text, bounded by HISTORY_MAX_REPORTS
+    # Decoded node outputs (see payloads); the *_response lists keep the raw messages for LLM context
+    plan: Optional[Plan]
+    selection: Optional[Selection]
+    local_pages: Optional[List[LocalPage]] # set when the local index answered instead of a web search
+    scrape: Optional[ScrapeResult]
+    report: Optional[Report]
+    review: Optional[Review]
+    route: Optional[Route]
+    usage: Optional[Usage] # iterations, tokens and start time, checked against budget.Budget
 
 
 
@@ -26,5 +41,17 @@ state = {
     "serper_response": [],
     "scraper_response": [],
     "final_reports": [],
-    "end_chain": []
+    "end_chain": [],
+    "research_context": "",
+    "research_tokens_saved": 0,
+    "selection_history": [],
+    "report_history": [],
+    "plan": None,
+    "selection": None,
+    "local_pages": None,
+    "scrape": None,
+    "report": None,
+    "review": None,
+    "route": None,
+    "usage": None
 }
\ No newline at end of file
@@ -0,0 +1,15 @@
+import os
+import sys
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AGENT_DIR)
+# The local stubs in benchmarks/stubs.py double as test servers.
+sys.path.insert(0, os.path.join(AGENT_DIR, "benchmarks"))
+
+# Like the benchmarks: the stubs have no quota, and nothing is written outside the test's tmp_path.
+os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("SERPAPI_REQUESTS_PER_MINUTE", "0")
+os.environ.setdefault("SERPAPI_API_KEY", "test")
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("AGENT_OUTPUT", "null")
+os.environ["SCRAPE_CACHE_PATH"] = ""
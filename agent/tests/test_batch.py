@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from batch import read_questions
+
+
+def test_read_questions_accepts_objects_and_bare_strings():
+    items = list(read_questions(io.StringIO('{"question": "a", "id": "x"}\n\n"b"\nc\n')))
+    assert items == [
+        {"question": "a", "id": "x"},
+        {"question": "b", "id": 2},
+        {"question": "c", "id": 3},
+    ]
+
+
+@pytest.mark.parametrize("line", ['["a", "b"]', "42", '{"id": 1}'])
+def test_read_questions_rejects_other_json(line):
+    with pytest.raises(ValueError, match="line 2"):
+        list(read_questions(io.StringIO("first\n" + line + "\n")))
+
+
+class _RecordingGraph:
+    checkpointer = None
+
+    def __init__(self):
+        self.thread_ids = []
+
+    def stream(self, inputs, config, stream_mode=None):
+        self.thread_ids.append(config["configurable"]["thread_id"])
+        return iter(())
+
+
+def test_each_run_gets_its_own_thread_unless_resuming(monkeypatch):
+    import graph
+    from batch import run_question
+
+    recording = _RecordingGraph()
+    monkeypatch.setattr(graph, "get_graph", lambda use_async=False: recording)
+
+    first = run_question({"id": 0, "question": "a"})
+    second = run_question({"id": 0, "question": "b"})
+    resumed = run_question({"id": 0, "question": "a", "thread_id": first["thread_id"]})
+
+    assert first["thread_id"] != second["thread_id"]
+    assert resumed["thread_id"] == first["thread_id"]
+    assert recording.thread_ids == [first["thread_id"], second["thread_id"], first["thread_id"]]
@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import pytest
+
+from stubs import FakeGoogleSearch, GroqPipelineSSEStubHandler, HtmlFixtureHandler, serve
+
+
+@pytest.fixture
+def compiled(monkeypatch, tmp_path):
+    monkeypatch.setenv("LLM_BACKEND", "fake")
+    monkeypatch.setenv("SERPAPI_CACHE_TTL", "0")
+
+    import tools
+    from checkpointer import SqliteCheckpointSaver
+    from graph import build_workflow
+
+    monkeypatch.setattr(tools, "GoogleSearch", FakeGoogleSearch)
+    monkeypatch.setattr(FakeGoogleSearch, "latency", 0.0)
+    with serve(HtmlFixtureHandler) as pages:
+        monkeypatch.setattr(FakeGoogleSearch, "base_url", f"{pages.url}/page")
+        saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite3"))
+        yield build_workflow().compile(checkpointer=saver)
+
+
+def test_second_question_on_a_thread_starts_fresh(compiled):
+    from graph import research_input
+
+    config = {"recursion_limit": 50, "configurable": {"thread_id": "reused"}}
+    first = compiled.invoke(research_input(compiled, "what is a large language model", config), config)
+    second = compiled.invoke(research_input(compiled, "how does speculative decoding work", config), config)
+
+    assert first["report"] and not first["report"].error
+    assert second["usage"].iterations == first["usage"].iterations
+    assert second["usage"].llm_calls == first["usage"].llm_calls
+    assert second["usage"].started_at > first["usage"].started_at
+    assert len(second["report_history"]) == len(first["report_history"])
+    assert second["research_question"] == "how does speculative decoding work"
+
+
+@pytest.fixture
+def sse_workflow(monkeypatch):
+    """The research workflow with every agent on the SSE Groq stub, generating without delays."""
+    monkeypatch.setenv("LLM_BACKEND", "groq")
+    monkeypatch.setenv("REPORTER_STREAMING", "1")
+    monkeypatch.setenv("SERPAPI_CACHE_TTL", "0")
+    for name, value in (("first_token_latency", 0.0), ("token_interval", 0.0), ("strategy_words", 20)):
+        monkeypatch.setattr(GroqPipelineSSEStubHandler, name, value)
+
+    import llm_backend
+    import tools
+    from graph import build_workflow
+
+    monkeypatch.setattr(tools, "GoogleSearch", FakeGoogleSearch)
+    monkeypatch.setattr(FakeGoogleSearch, "latency", 0.0)
+    with serve(HtmlFixtureHandler) as pages, serve(GroqPipelineSSEStubHandler) as groq:
+        monkeypatch.setattr(FakeGoogleSearch, "base_url", f"{pages.url}/page")
+        monkeypatch.setattr(GroqPipelineSSEStubHandler, "page_url", f"{pages.url}/page/1")
+        endpoint = f"{groq.url}/openai/v1/chat/completions"
+        monkeypatch.setitem(llm_backend._backends, "groq", llm_backend.OpenAICompatibleBackend(endpoint))
+        yield build_workflow
+
+
+def _check_reporter_stream(events):
+    chunks, final = [], None
+    for mode, payload in events:
+        if mode == "messages":
+            chunk, metadata = payload
+            if metadata["langgraph_node"] == "reporter_agent":
+                chunks.append(chunk)
+        else:
+            final = payload
+
+    assert len(chunks) > 1
+    message = final["reporter_response"][-1]
+    assert message.content == "".join(chunk.content for chunk in chunks)
+    assert json.loads(message.content)["search_term"] == "large language models"
+    usage = message.response_metadata["token_usage"]
+    assert usage["prompt_tokens"] > 0 and usage["completion_tokens"] == len(chunks)
+    assert final["usage"].completion_tokens >= usage["completion_tokens"]
+
+
+def test_reporter_tokens_stream_through_the_graph(sse_workflow):
+    compiled = sse_workflow().compile()
+    state = {"research_question": "what is a large language model"}
+    _check_reporter_stream(compiled.stream(state, {"recursion_limit": 50}, stream_mode=["messages", "values"]))
+
+
+def test_reporter_tokens_stream_through_the_async_graph(sse_workflow):
+    compiled = sse_workflow(use_async=True).compile()
+    state = {"research_question": "what is a large language model"}
+
+    async def collect():
+        return [event async for event in compiled.astream(
+            state, {"recursion_limit": 50}, stream_mode=["messages", "values"]
+        )]
+
+    _check_reporter_stream(asyncio.run(collect()))
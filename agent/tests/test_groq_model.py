@@ -0,0 +1,44 @@
+import asyncio
+
+from groq_model import GroqJsonModel
+from llm_backend import FakeBackend
+
+
+def test_streamed_json_completion_keeps_its_usage():
+    model = GroqJsonModel(name="PLANNER", backend=FakeBackend())
+    messages = [{"role": "system", "content": "Reply in JSON."}, {"role": "user", "content": "question what is an LLM"}]
+
+    for message in (
+        model.invoke_streaming(messages, lambda token: None),
+        asyncio.run(model.ainvoke_streaming(messages, lambda token: None)),
+    ):
+        usage = message.response_metadata["token_usage"]
+        assert usage["prompt_tokens"] > 0 and usage["completion_tokens"] > 0
+
+
+def test_async_calls_use_a_sqlite_completion_cache_off_the_event_loop(monkeypatch, tmp_path):
+    import threading
+
+    import completion_cache
+    from groq_model import GroqModel
+
+    store = completion_cache.SqliteCompletionStore(str(tmp_path / "completions.sqlite3"))
+    threads = []
+    for method in ("get", "put"):
+        original = getattr(store, method)
+
+        def record(*args, _original=original, **kwargs):
+            threads.append(threading.current_thread())
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(store, method, record)
+    monkeypatch.setattr(completion_cache, "_cache", completion_cache.CompletionCache(store))
+
+    model = GroqModel(name="REPORTER", backend=FakeBackend())
+    messages = [{"role": "user", "content": "question what is an LLM"}]
+    first = asyncio.run(model.ainvoke(messages))
+    second = asyncio.run(model.ainvoke(messages))
+
+    assert second.content == first.content
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads
@@ -0,0 +1,22 @@
+from history import append_bounded, max_reports, render_reports, report_token_cap
+from utils import estimate_tokens
+
+
+def test_rendered_reports_stay_under_the_cap_over_many_iterations():
+    history = []
+    for iteration in range(50):
+        report = f"report {iteration} " + "word " * (300 + iteration * 40)
+        history = append_bounded(history, [report], max_reports())
+        rendered = render_reports(history, report_token_cap())
+        assert estimate_tokens(rendered) <= report_token_cap()
+        assert rendered.startswith("Report 1:\n")
+        assert f"report {iteration} " in rendered
+
+
+def test_reports_that_fit_are_rendered_whole_oldest_first():
+    rendered = render_reports(["first", "second"], 100)
+    assert rendered == "Report 1:\nfirst\n\nReport 2:\nsecond"
+
+
+def test_tiny_cap_renders_nothing():
+    assert render_reports(["a" * 100], 1) == ""
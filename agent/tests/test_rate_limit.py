@@ -0,0 +1,116 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import rate_limit
+from groq_model import GroqJsonModel, GroqModel
+from llm_backend import OpenAICompatibleBackend
+from stubs import GroqRateLimitedStubHandler, serve
+
+MESSAGES = [
+    {"role": "system", "content": "You are a planner."},
+    {"role": "user", "content": "question what is LLM?"},
+]
+
+
+class _RecordingHandler(GroqRateLimitedStubHandler):
+    """
+    The 429 stub, minus the x-ratelimit-* headers, so Retry-After is the client's only signal.
+
+    Logs each request's arrival time, whether it came from the JSON model and,
+    for a 429, its Retry-After.
+    """
+    log = []
+
+    def do_POST(self):
+        self._arrived = time.monotonic()
+        super().do_POST()
+
+    def read_body(self):
+        body = super().read_body()
+        self._json_mode = b"response_format" in body
+        return body
+
+    def send_json(self, status, body, headers=None):
+        headers = {key: value for key, value in (headers or {}).items() if not key.startswith("x-ratelimit")}
+        retry_after = float(headers["retry-after"]) if status == 429 else None
+        with _RecordingHandler._state_lock:
+            _RecordingHandler.log.append((self._arrived, status, retry_after, self._json_mode))
+        super().send_json(status, body, headers)
+
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    # A fresh, unthrottled limiter, so it can only learn the quota from the stub's 429s.
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    monkeypatch.setenv("GROQ_MAX_RETRIES", "50")
+    monkeypatch.setattr(_RecordingHandler, "log", [])
+    monkeypatch.setattr(_RecordingHandler, "quota", 4)
+    monkeypatch.setattr(_RecordingHandler, "window", 0.4)
+    _RecordingHandler.reset()
+    with serve(_RecordingHandler) as server:
+        yield f"{server.url}/openai/v1/chat/completions"
+
+
+def _ok(message) -> bool:
+    return "error" not in json.loads(message.content)
+
+
+def test_no_call_is_lost_and_throughput_tracks_the_quota(endpoint):
+    backend = OpenAICompatibleBackend(endpoint)
+    calls = 24
+
+    def sync_call(_):
+        return GroqJsonModel(backend=backend).invoke(MESSAGES)
+
+    async def async_calls():
+        model = GroqModel(backend=backend)
+        return await asyncio.gather(*(model.ainvoke(MESSAGES) for _ in range(calls // 2)))
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=calls // 2) as pool:
+        sync_results = pool.map(sync_call, range(calls // 2))
+        async_results = asyncio.run(async_calls())
+        results = list(sync_results) + list(async_results)
+    elapsed = time.monotonic() - start
+
+    assert all(_ok(message) for message in results)
+    accepted = [entry for entry in _RecordingHandler.log if entry[1] == 200]
+    assert len(accepted) == calls
+    # 24 calls at 4 per 0.4s need 2.4s at best; retries must not stretch that much further.
+    ideal = calls / _RecordingHandler.quota * _RecordingHandler.window
+    assert elapsed < ideal * 2 + 1
+
+
+def test_retry_after_is_honoured_and_the_limiter_is_shared(endpoint):
+    _RecordingHandler.quota = 1
+    _RecordingHandler.window = 0.6
+    _RecordingHandler.reset()
+
+    # Separate backends on the same service: the limiter they share is the "groq" one.
+    json_model = GroqJsonModel(backend=OpenAICompatibleBackend(endpoint))
+    text_model = GroqModel(backend=OpenAICompatibleBackend(endpoint))
+    worker = threading.Thread(target=lambda: [json_model.invoke(MESSAGES) for _ in range(3)])
+    worker.start()
+    # Wait until the JSON model has received a 429 and paused the limiter.
+    deadline = time.monotonic() + 5
+    while not rate_limit.get_limiter("groq").wait_time() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    rejected_at, _, retry_after, _ = next(entry for entry in _RecordingHandler.log if entry[1] == 429)
+
+    # The other model class starts after the JSON model was told to back off; it must wait too.
+    assert _ok(asyncio.run(text_model.ainvoke(MESSAGES)))
+    worker.join(10)
+
+    first_text_call = next(entry for entry in _RecordingHandler.log if not entry[3])
+    assert first_text_call[0] >= rejected_at + retry_after
+    # Neither model retries before the Retry-After its own 429 advertised.
+    for arrived, status, retry_after, json_mode in _RecordingHandler.log:
+        if status == 429:
+            later = [entry[0] for entry in _RecordingHandler.log if entry[0] > arrived and entry[3] == json_mode]
+            assert later and min(later) >= arrived + retry_after
+    assert [entry[1] for entry in _RecordingHandler.log].count(200) == 4
@@ -0,0 +1,13 @@
+import scrape_cache
+
+
+def test_the_scrape_cache_is_opt_in(monkeypatch, tmp_path):
+    monkeypatch.setattr(scrape_cache, "_cache", None)
+    monkeypatch.delenv("SCRAPE_CACHE_PATH", raising=False)
+    assert scrape_cache.get_scrape_cache() is None
+
+    path = tmp_path / "scrape_cache.sqlite3"
+    monkeypatch.setenv("SCRAPE_CACHE_PATH", str(path))
+    cache = scrape_cache.get_scrape_cache()
+    assert cache is not None and cache is scrape_cache.get_scrape_cache()
+    assert path.exists()
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import search_cache
+import tools
+from stubs import FakeGoogleSearch
+
+
+@pytest.fixture
+def search(monkeypatch):
+    """`serpapi_organic_results` on a fresh cache, with `FakeGoogleSearch` as the upstream."""
+    monkeypatch.setattr(search_cache, "_cache", search_cache.SearchCache(ttl=3600))
+    monkeypatch.setattr(tools, "GoogleSearch", FakeGoogleSearch)
+    monkeypatch.setattr(FakeGoogleSearch, "latency", 0.2)
+    monkeypatch.setattr(FakeGoogleSearch, "calls", 0)
+    return tools.serpapi_organic_results
+
+
+def test_concurrent_identical_searches_share_one_upstream_call(search):
+    queries = ["What is an LLM", "what is an llm", "  WHAT is   an LLM "] * 6
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        results = list(pool.map(search, queries))
+
+    assert FakeGoogleSearch.calls == 1
+    assert all(result == results[0] for result in results)
+    assert search("what is an LLM") == results[0]
+    assert FakeGoogleSearch.calls == 1
+    assert search_cache.get_search_cache().stats()["entries"] == 1
+
+
+def test_engine_and_result_count_are_separate_entries(search):
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        list(pool.map(lambda args: search("what is an llm", *args), [(10, "google"), (5, "google"), (10, "bing")]))
+
+    assert FakeGoogleSearch.calls == 3
+    assert search_cache.get_search_cache().stats()["entries"] == 3
+
+
+class _FailingSearch(FakeGoogleSearch):
+    def get_dict(self):
+        super().get_dict()
+        raise RuntimeError("upstream down")
+
+
+def test_a_failed_flight_fails_every_waiter_and_is_not_cached(search, monkeypatch):
+    monkeypatch.setattr(tools, "GoogleSearch", _FailingSearch)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(search, "what is an llm") for _ in range(4)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="upstream down"):
+            future.result()
+    assert FakeGoogleSearch.calls == 1
+    assert search_cache.get_search_cache().stats()["entries"] == 0
+
+    monkeypatch.setattr(tools, "GoogleSearch", FakeGoogleSearch)
+    assert search("what is an llm")
+    assert FakeGoogleSearch.calls == 2
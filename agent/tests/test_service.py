@@ -0,0 +1,48 @@
+import time
+
+import service
+
+
+def _wait(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        job.wait_events(len(job.events), 0.1)
+    return job
+
+
+def test_a_job_that_raises_fails_and_keeps_its_worker(monkeypatch):
+    monkeypatch.setenv("LLM_BACKEND", "fake")
+    calls = []
+
+    def run_question(item, recursion_limit=50, sink="null", on_update=None):
+        calls.append(item["id"])
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return {"id": item["id"], "question": item["question"], "report": "ok", "error": None,
+                "latency": 0.01, "usage": None}
+
+    monkeypatch.setattr(service, "run_question", run_question)
+    research = service.ResearchService(workers=1, max_upstream_wait=1e9).start()
+    try:
+        failed = _wait(research.submit("first"))
+        done = _wait(research.submit("second"))
+    finally:
+        research.close(5)
+
+    assert failed.status == "failed"
+    assert failed.as_dict()["error"] == "RuntimeError: boom"
+    assert done.status == "done"
+    assert research.totals["failed"] == 1 and research.totals["done"] == 1
+
+
+def test_graph_setup_errors_are_reported_in_the_result(monkeypatch):
+    import graph
+    from batch import run_question
+
+    def broken(use_async=False):
+        raise RuntimeError("no graph")
+
+    monkeypatch.setattr(graph, "get_graph", broken)
+    result = run_question({"id": 0, "question": "a"})
+    assert result["error"] == "RuntimeError: no graph"
+    assert result["report"] is None
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+from speculation import SpeculativeSearches, await_discarded, wait_discarded
+
+
+def _blocking_search(release: threading.Event, started: threading.Event, finished: list):
+    def search(term):
+        started.set()
+        release.wait(5)
+        finished.append(term)
+        return term
+
+    return search
+
+
+def test_discard_cancels_a_search_that_has_not_started():
+    searches = SpeculativeSearches(max_workers=1)
+    release, started, finished = threading.Event(), threading.Event(), []
+    searches.start("run", "first", _blocking_search(release, started, finished))
+    started.wait(5)
+    searches.start("run", "second", _blocking_search(release, threading.Event(), finished))
+
+    assert searches.discard("run", "second") is None
+    release.set()
+    assert searches.claim("run", "first").result(5) == "first"
+    assert finished == ["first"]
+    assert searches.stats() == {"started": 2, "used": 1, "discarded": 1, "pending": 0}
+
+
+def test_a_running_discarded_search_is_waited_for():
+    searches = SpeculativeSearches(max_workers=1)
+    release, started, finished = threading.Event(), threading.Event(), []
+    searches.start("run", "stale", _blocking_search(release, started, finished))
+    started.wait(5)
+
+    future = searches.settle("run", "stale", "final")
+    assert future is not None
+    threading.Timer(0.05, release.set).start()
+    wait_discarded(future)
+    assert finished == ["stale"]
+
+
+def test_await_discarded():
+    searches = SpeculativeSearches(max_workers=1)
+    release, started, finished = threading.Event(), threading.Event(), []
+    searches.start("run", "stale", _blocking_search(release, started, finished))
+    started.wait(5)
+
+    future = searches.discard("run", "stale")
+    threading.Timer(0.05, release.set).start()
+    asyncio.run(await_discarded(future))
+    assert finished == ["stale"]
+    assert searches.settle("run", "same", "same") is None
+
+
+def test_runs_only_see_their_own_searches():
+    searches = SpeculativeSearches(max_workers=2)
+    searches.start("run-a", "same term", lambda term: "a")
+    searches.start("run-b", "Same  Term", lambda term: "b")
+
+    assert searches.discard("run-b", "unrelated") is None
+    assert searches.claim("run-a", "same term").result(5) == "a"
+    assert searches.claim("run-a", "same term") is None
+    assert searches.stats()["pending"] == 1
+
+
+def test_release_settles_what_a_run_left_behind():
+    searches = SpeculativeSearches(max_workers=1)
+    release, started, finished = threading.Event(), threading.Event(), []
+    searches.start("run-a", "running", _blocking_search(release, started, finished))
+    started.wait(5)
+    searches.start("run-a", "queued", _blocking_search(release, threading.Event(), finished))
+    searches.start("run-b", "other", lambda term: term)
+
+    threading.Timer(0.05, release.set).start()
+    searches.release("run-a")
+
+    assert finished == ["running"]
+    assert searches.stats()["pending"] == 1
+    assert searches.claim("run-b", "other").result(5) == "other"
@@ -0,0 +1,57 @@
+import pytest
+
+from tools import _PageReader
+
+
+def _read(body: bytes, max_bytes: int, chunk_size: int = 7) -> _PageReader:
+    reader = _PageReader("text/html; charset=utf-8", max_bytes)
+    for start in range(0, len(body), chunk_size):
+        if not reader.feed(body[start:start + chunk_size]):
+            break
+    reader.close()
+    return reader
+
+
+def test_body_of_exactly_max_bytes_is_not_truncated():
+    body = b"<p>" + b"x" * 60 + b"</p>"
+    reader = _read(body, len(body))
+    assert not reader.truncated
+    assert bytes(reader.body) == body
+
+
+def test_body_past_max_bytes_is_truncated():
+    body = b"<p>" + b"x" * 60 + b"</p>"
+    reader = _read(body, len(body) - 1)
+    assert reader.truncated
+    assert bytes(reader.body) == body[:-1]
+
+
+def test_partial_search_failure_is_logged(caplog):
+    from tools import _fused
+
+    results = [{"title": "a", "link": "https://example.com/a", "snippet": "..."}]
+    with caplog.at_level("WARNING", logger="tools"):
+        fused = _fused(["first", "second"], [results, RuntimeError("quota")])
+
+    assert [result["link"] for result in fused] == ["https://example.com/a"]
+    assert "1 of 2 SerpAPI searches failed" in caplog.text
+
+
+def test_a_failed_search_is_logged_not_printed(monkeypatch, caplog, capsys):
+    import search_cache
+    import tools
+
+    class DownSearch:
+        def __init__(self, params):
+            pass
+
+        def get_dict(self):
+            raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(search_cache, "_cache", search_cache.SearchCache())
+    monkeypatch.setattr(tools, "GoogleSearch", DownSearch)
+    with caplog.at_level("WARNING", logger="tools"), pytest.raises(RuntimeError):
+        tools.serpapi_organic_results("what is an llm")
+
+    assert "SerpAPI search for 'what is an llm' failed: upstream down" in caplog.text
+    assert capsys.readouterr().out == ""
@@ -1,10 +1,43 @@
+import asyncio
+import codecs
+import contextvars
+import json
+import logging
 import os
+import re
+import threading
+import time
+import httpx
 import requests
-from bs4 import BeautifulSoup
-from serpapi import GoogleSearch
-from typing import List, Dict, Any
-from dotenv import load_dotenv
-load_dotenv()
+import urllib3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+from typing import List, Dict, Any, Optional, Tuple
+import instrumentation
+from extractors import get_extractor, plain_text_parser
+from http_client import get_async_client
+from rate_limit import get_limiter
+from scrape_cache import get_scrape_cache
+from config import load_env
+from search_cache import get_search_cache, search_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+def __getattr__(name):
+    # serpapi is imported on the first search rather than with this module.
+    if name == "GoogleSearch":
+        from serpapi import GoogleSearch
+
+        globals()["GoogleSearch"] = GoogleSearch
+        return GoogleSearch
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _search_class():
+    """`GoogleSearch`, unless a bench or test has assigned `tools.GoogleSearch`."""
+    return globals().get("GoogleSearch") or __getattr__("GoogleSearch")
 
 
 def format_results(organic_results):
@@ -49,13 +82,17 @@ def format_scraped_content(scraped_results: List[Dict[str, Any]]) -> str:
     return '\n---\n'.join(formatted_results)
 
 
-def serpapi_search(query: str, num_results: int = 10) -> List[Dict[str, Any]]:
+def serpapi_organic_results(query: str, num_results: int = 10, engine: str = "google") -> List[Dict[str, Any]]:
     """
     Perform a web search using SerpAPI based on the provided query.
 
+    Results are cached per (normalized query, engine, num_results) and concurrent
+    identical searches share a single upstream call (see `search_cache`).
+
     Args:
         query (str): The search query string.
         num_results (int, optional): The number of search results to return. Defaults to 10.
+        engine (str, optional): The SerpAPI engine. Defaults to "google".
 
     Returns:
         List[Dict[str, Any]]: A list of dictionaries containing search results.
@@ -67,39 +104,310 @@ def serpapi_search(query: str, num_results: int = 10) -> List[Dict[str, Any]]:
         Exception: For any other errors that occur during the API call.
     """
     # Retrieve the SerpAPI key from environment variables
+    load_env()
     api_key = os.getenv("SERPAPI_API_KEY")
     if not api_key:
         raise ValueError("SerpAPI key not found. Please set the SERPAPI_API_KEY environment variable.")
 
-    try:
+    def fetch():
+        sp.set(cache="miss")
         # Set up the search parameters
         params = {
-            "engine": "google",
+            "engine": engine,
             "q": query,
             "api_key": api_key,
             "num": num_results
         }
 
         # Perform the search
-        search = GoogleSearch(params)
+        get_limiter("serpapi").acquire()
+        search = _search_class()(params)
         results = search.get_dict()
+        if sp.recording:
+            sp.set(bytes=len(json.dumps(results)))
 
-        # Extract and return the organic search results
-        organic_results = results.get("organic_results", [])
-        return format_results(organic_results)
+        # Extract the organic search results
+        return results.get("organic_results", [])
+
+    try:
+        key = search_cache_key(query, engine, num_results)
+        with instrumentation.span("serpapi.search", "search", engine=engine, cache="hit") as sp:
+            return list(get_search_cache().get_or_fetch(key, fetch))
 
     except Exception as e:
-        # Log the error (you might want to use a proper logging system)
-        print(f"An error occurred during the SerpAPI search: {str(e)}")
-        # Re-raise the exception or return an empty list, depending on your error handling strategy
+        logger.warning("SerpAPI search for %r failed: %s", query, e)
         raise
 
 
+def serpapi_search(query: str, num_results: int = 10) -> str:
+    """
+    Search with SerpAPI and format the organic results for the selector prompt.
+
+    Args:
+        query (str): The search query string.
+        num_results (int, optional): The number of search results to return. Defaults to 10.
+
+    Returns:
+        str: The results rendered by `format_results`.
+    """
+    return format_results(serpapi_organic_results(query, num_results))
+
+
+
+def _format_page(url: str, title: str, content: str) -> str:
+    return format_scraped_content([{
+        'url': url,
+        'title': title,
+        'content': content,
+        'status': 'success'
+    }])
+
+
+def _extract_page(url: str, html: str) -> str:
+    """
+    Parse a fetched HTML document into the formatted scraper output.
+
+    Args:
+        url (str): The URL the document was fetched from.
+        html (str): The decoded HTML body.
+
+    Returns:
+        str: The page formatted by `format_scraped_content`.
+    """
+    # Extract the title and content with the configured extractor
+    title, content = get_extractor().extract(html)
+    return _format_page(url, title, content)
+
+
+class ScrapeAborted(Exception):
+    """The scraper gave up on a response: its content type is not parseable or the page deadline passed."""
+
+
+_HTML_TYPES = frozenset({"text/html", "application/xhtml+xml"})
+_TEXT_TYPES = frozenset({"text/plain", "text/markdown"})
+# Served for anything the origin could not label; decided by sniffing the body instead.
+_UNLABELLED_TYPES = frozenset({"", "application/octet-stream", "binary/octet-stream"})
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset=["']?([A-Za-z0-9_.:-]+)""", re.IGNORECASE)
+# Bytes to buffer before sniffing the content kind and <meta> charset.
+_SNIFF_BYTES = 1024
+_READ_SIZE = 64 * 1024
+
+
+# Set by `scrape_urls` for its fetches: the batch deadline (time.monotonic()), which a page deadline may not outlast.
+_batch_deadline_at: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("batch_deadline_at", default=None)
+
+
+def _fetch_limits() -> Tuple[int, float]:
+    """SCRAPE_MAX_BYTES (body bytes read per page) and SCRAPE_PAGE_DEADLINE (total seconds per page)."""
+    return (
+        int(os.getenv("SCRAPE_MAX_BYTES", str(5 * 1024 * 1024))),
+        float(os.getenv("SCRAPE_PAGE_DEADLINE", "20")),
+    )
+
+
+def _content_kind(content_type: str) -> Optional[str]:
+    """"html" or "text" from the Content-Type header, None to sniff the body instead."""
+    mime = content_type.split(";", 1)[0].strip().lower()
+    if mime in _UNLABELLED_TYPES:
+        return None
+    if mime in _HTML_TYPES:
+        return "html"
+    if mime in _TEXT_TYPES:
+        return "text"
+    raise ScrapeAborted(f"Unsupported content type {mime}")
+
+
+def _sniff_kind(head: bytes) -> str:
+    start = head.lstrip()[:16].lower()
+    if start.startswith(b"%pdf") or b"\x00" in head:
+        raise ScrapeAborted("Unsupported binary content")
+    return "html" if start.startswith(b"<") else "text"
+
+
+def _charset(content_type: str, head: bytes) -> str:
+    """The body's encoding: the header charset, a <meta> charset, a BOM, or UTF-8."""
+    candidates = []
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset":
+            candidates.append(value.strip().strip('"\''))
+    match = _META_CHARSET_RE.search(head)
+    if match:
+        candidates.append(match.group(1).decode("ascii"))
+    if head.startswith(codecs.BOM_UTF16_LE) or head.startswith(codecs.BOM_UTF16_BE):
+        candidates.append("utf-16")
+    for candidate in candidates:
+        try:
+            return codecs.lookup(candidate).name
+        except LookupError:
+            continue
+    return "utf-8-sig"
+
+
+class _PageReader:
+    """
+    Decodes and parses a response body chunk by chunk, stopping at `max_bytes`.
+
+    The first `_SNIFF_BYTES` are buffered to pick the parser (the configured
+    HTML extractor or the plain-text one) and the charset; after that every
+    chunk is decoded incrementally and fed straight to the parser, so the body
+    is never decoded or parsed as a whole. The raw bytes read are kept in
+    `body` for the scrape cache.
+    """
+
+    def __init__(self, content_type: str, max_bytes: int):
+        self.content_type = content_type
+        self.kind = _content_kind(content_type)
+        self.max_bytes = max_bytes
+        self.body = bytearray()
+        self.truncated = False
+        self._parser = None
+        self._decoder = None
+
+    def _start(self) -> None:
+        head = bytes(self.body[:_SNIFF_BYTES])
+        kind = self.kind or _sniff_kind(head)
+        self._parser = get_extractor().parser() if kind == "html" else plain_text_parser()
+        self._decoder = codecs.getincrementaldecoder(_charset(self.content_type, head))(errors="replace")
+        self._parser.feed(self._decoder.decode(bytes(self.body)))
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Add one chunk; returns False once bytes past `max_bytes` arrive and the rest should be skipped.
+
+        A body of exactly `max_bytes` is not truncated: the page only counts as
+        cut short when there was more to read.
+        """
+        room = self.max_bytes - len(self.body)
+        if len(chunk) > room:
+            chunk = chunk[:room]
+            self.truncated = True
+        self.body += chunk
+        if self._parser is not None:
+            self._parser.feed(self._decoder.decode(chunk))
+        elif len(self.body) >= _SNIFF_BYTES or self.truncated:
+            self._start()
+        return not self.truncated
+
+    def close(self) -> Tuple[str, str]:
+        if self._parser is None:
+            self._start()
+        self._parser.feed(self._decoder.decode(b"", final=True))
+        return self._parser.close()
+
+
+def _iter_body(response: requests.Response, deadline_at: float):
+    """
+    Yield decoded-transfer body bytes as they arrive, until `deadline_at` (time.monotonic()).
+
+    `read1` returns whatever the socket has instead of waiting for a full
+    buffer, so a server trickling bytes cannot hold the loop past the deadline
+    by more than one read timeout.
+    """
+    raw = response.raw
+    read = getattr(raw, "read1", None) or raw.read
+    while True:
+        if time.monotonic() > deadline_at:
+            raise ScrapeAborted("Page deadline exceeded")
+        chunk = read(_READ_SIZE, decode_content=True)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _fetch_page(url: str, headers: Dict[str, str], sp) -> Optional[Tuple[_PageReader, Any]]:
+    """Stream `url` into a `_PageReader`; returns None on 304 Not Modified, else (reader, response headers)."""
+    max_bytes, deadline = _fetch_limits()
+    deadline_at = time.monotonic() + deadline
+    batch_deadline_at = _batch_deadline_at.get()
+    if batch_deadline_at is not None and batch_deadline_at < deadline_at:
+        deadline_at = batch_deadline_at
+        deadline = max(0.1, deadline_at - time.monotonic())
+    with requests.get(url, timeout=min(10, deadline), headers=headers, stream=True) as response:
+        sp.set(status=response.status_code)
+        if headers and response.status_code == 304:
+            return None
+        response.raise_for_status()  # Raise an exception for bad status codes
+        reader = _PageReader(response.headers.get("Content-Type", ""), max_bytes)
+        for chunk in _iter_body(response, deadline_at):
+            if not reader.feed(chunk):
+                break
+        return reader, response.headers
+
+
+async def _afetch_page(url: str, headers: Dict[str, str], sp) -> Optional[Tuple[_PageReader, Any]]:
+    """Async counterpart of `_fetch_page`; the caller enforces the page deadline."""
+    max_bytes, deadline = _fetch_limits()
+    async with get_async_client().stream("GET", url, timeout=min(10, deadline), headers=headers) as response:
+        sp.set(status=response.status_code)
+        if headers and response.status_code == 304:
+            return None
+        response.raise_for_status()
+        reader = _PageReader(response.headers.get("Content-Type", ""), max_bytes)
+        async for chunk in response.aiter_bytes(_READ_SIZE):
+            if not reader.feed(chunk):
+                break
+        return reader, response.headers
+
+
+def _read_page(url: str, cache, entry, fetched) -> str:
+    """Turn a `_fetch_page` result into the formatted page, caching it; None means the stale entry is still valid."""
+    if fetched is None:
+        cache.record_revalidated(entry)
+        return entry.text
+    reader, headers = fetched
+    title, content = reader.close()
+    page = _format_page(url, title, content)
+    _cache_page(cache, entry, url, bytes(reader.body), page, headers)
+    return page
+
+
+def _scrape_error(url: str, e: Exception) -> Dict[str, Any]:
+    return {
+        'url': url,
+        'title': "Error",
+        'content': f"Failed to scrape the URL: {str(e)}",
+        'status': 'error'
+    }
+
+
+def _cache_page(cache, entry, url: str, body: bytes, page: str, headers) -> None:
+    if cache is None:
+        return
+    cache.store(
+        url,
+        body,
+        page,
+        etag=headers.get('ETag'),
+        last_modified=headers.get('Last-Modified'),
+        revalidated=entry is not None,
+    )
+
+
+def _check_cache(cache, url: str, sp) -> Tuple[Any, Optional[str]]:
+    """(entry, page): the cached page when it is fresh, else the stale entry (or None) to revalidate and no page."""
+    entry = cache.lookup(url) if cache else None
+    if entry and entry.fresh:
+        cache.record_hit(entry)
+        sp.set(cache="hit")
+        return entry, entry.text
+    if cache and entry is None:
+        cache.record_miss()
+    sp.set(cache="miss" if entry is None else "revalidated")
+    return entry, None
+
 
 def scrape_url(url: str) -> str:
     """
     Scrape the content from a given URL.
 
+    The body is streamed: at most SCRAPE_MAX_BYTES are read (a longer page is
+    cut off there and parsed as far as it got), the whole fetch must finish
+    within SCRAPE_PAGE_DEADLINE seconds, and content types other than HTML and
+    plain text are rejected before the body is read. Successful pages are
+    cached on disk (see `scrape_cache`); stale entries are revalidated with a
+    conditional GET.
+
     Args:
         url (str): The URL to scrape.
 
@@ -112,32 +420,280 @@ def scrape_url(url: str) -> str:
                 'status': str
             }
     """
-    try:
-        # Send a GET request to the URL
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # Raise an exception for bad status codes
+    with instrumentation.span("scrape", "scrape", url=url) as sp:
+        cache = get_scrape_cache()
+        entry, page = _check_cache(cache, url, sp)
+        if page is not None:
+            return page
+
+        try:
+            # Send a GET request to the URL, revalidating a stale cache entry if we have one
+            headers = entry.conditional_headers() if entry else {}
+            fetched = _fetch_page(url, headers, sp)
+            if fetched:
+                sp.set(bytes=len(fetched[0].body), truncated=fetched[0].truncated)
+            return _read_page(url, cache, entry, fetched)
+
+        except (requests.RequestException, urllib3.exceptions.HTTPError, ScrapeAborted) as e:
+            sp.set(error=type(e).__name__)
+            return _scrape_error(url, e)
+
+
+async def ascrape_url(url: str) -> str:
+    """
+    Async counterpart of `scrape_url` using the shared httpx client.
+
+    Args:
+        url (str): The URL to scrape.
+
+    Returns:
+        Same shape as `scrape_url`.
+    """
+    with instrumentation.span("scrape", "scrape", url=url) as sp:
+        cache = get_scrape_cache()
+        # The cache is SQLite (busy timeout, write locks); keep it off the event loop.
+        entry, page = await asyncio.to_thread(_check_cache, cache, url, sp) if cache else _check_cache(None, url, sp)
+        if page is not None:
+            return page
+
+        try:
+            headers = entry.conditional_headers() if entry else {}
+            try:
+                fetched = await asyncio.wait_for(_afetch_page(url, headers, sp), _fetch_limits()[1])
+            except asyncio.TimeoutError:
+                raise ScrapeAborted("Page deadline exceeded")
+            if fetched:
+                sp.set(bytes=len(fetched[0].body), truncated=fetched[0].truncated)
+            if cache is not None:
+                return await asyncio.to_thread(_read_page, url, cache, entry, fetched)
+            return _read_page(url, cache, entry, fetched)
+
+        except (httpx.HTTPError, ScrapeAborted) as e:
+            sp.set(error=type(e).__name__)
+            return _scrape_error(url, e)
+
+
+# Rank offset in reciprocal-rank fusion; 60 is the value from Cormack et al. and rarely worth tuning.
+RRF_K = 60
+
+
+def _result_key(link: str) -> str:
+    """Normalize a result URL for de-duplication: lowercase scheme and host, no fragment or trailing slash."""
+    parts = urlsplit(link.strip())
+    path = parts.path.rstrip("/")
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{path}{query}"
+
+
+def fuse_results(result_lists: List[List[Dict[str, Any]]], limit: int = None, k: int = RRF_K) -> List[Dict[str, Any]]:
+    """
+    Merge ranked organic result lists with reciprocal-rank fusion.
+
+    A result scores `sum(1 / (k + rank))` over every list it appears in (rank
+    counted from 1), so a page several queries agree on outranks one a single
+    query put first. Results are de-duplicated by normalized URL, keeping the
+    best-ranked copy; ties keep the order of the lists.
+
+    Args:
+        result_lists (List[List[Dict[str, Any]]]): Organic results per query, most important query first.
+        limit (int, optional): Number of fused results to return. Defaults to all of them.
+        k (int, optional): Rank offset. Defaults to RRF_K.
+
+    Returns:
+        List[Dict[str, Any]]: The fused results, best first.
+    """
+    scores: Dict[str, float] = {}
+    best: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+    for list_index, results in enumerate(result_lists):
+        for rank, result in enumerate(results, start=1):
+            link = result.get("link")
+            if not link:
+                continue
+            key = _result_key(link)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            if key not in best or (rank, list_index) < best[key][:2]:
+                best[key] = (rank, list_index, result)
+    ordered = sorted(scores, key=lambda key: (-scores[key], best[key][:2]))
+    fused = [best[key][2] for key in ordered]
+    return fused[:limit] if limit else fused
+
+
+def _fused(queries: List[str], outcomes: List[Any]) -> List[Dict[str, Any]]:
+    """Fuse the lists that came back; a failed query is dropped unless every query failed."""
+    lists = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+    if not lists:
+        raise outcomes[0]
+    failed = len(outcomes) - len(lists)
+    if failed:
+        logger.warning("%d of %d SerpAPI searches failed; fusing the rest", failed, len(queries))
+    return fuse_results(lists, limit=int(os.getenv("SEARCH_MAX_RESULTS", "20")))
+
+
+def serpapi_fused_search(queries: List[str], num_results: int = 10, prefetched: Dict[str, Any] = None) -> str:
+    """
+    Search every query concurrently and format the fused results for the selector prompt.
+
+    With a single query this is `serpapi_search`. Otherwise the queries run on
+    their own threads, so the node waits for the slowest search rather than
+    the sum of them, and the result lists are merged by `fuse_results` and cut
+    to SEARCH_MAX_RESULTS (default 20) to bound the selector prompt.
+
+    Args:
+        queries (List[str]): Search queries, most important first.
+        num_results (int, optional): Results per query. Defaults to 10.
+        prefetched (Dict[str, Future], optional): Searches already running for some of the
+            queries (e.g. started speculatively), resolving to their organic results.
+
+    Returns:
+        str: The fused results rendered by `format_results`.
+    """
+    prefetched = prefetched or {}
+    if len(queries) == 1:
+        future = prefetched.get(queries[0])
+        return format_results(future.result() if future else serpapi_organic_results(queries[0], num_results))
+
+    with instrumentation.span("serpapi.fused", "search", queries=len(queries)) as sp:
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            # Copy the caller's context so instrumentation spans keep their run and node.
+            futures = [
+                prefetched.get(query)
+                or executor.submit(contextvars.copy_context().run, serpapi_organic_results, query, num_results)
+                for query in queries
+            ]
+            outcomes = [future.exception() or future.result() for future in futures]
+        fused = _fused(queries, outcomes)
+        sp.set(results=len(fused))
+        return format_results(fused)
+
+
+async def aserpapi_fused_search(queries: List[str], num_results: int = 10, prefetched: Dict[str, Any] = None) -> str:
+    """Async counterpart of `serpapi_fused_search`."""
+    prefetched = prefetched or {}
+
+    async def search(query):
+        future = prefetched.get(query)
+        if future is not None:
+            return await asyncio.wrap_future(future)
+        return await asyncio.to_thread(serpapi_organic_results, query, num_results)
+
+    if len(queries) == 1:
+        return format_results(await search(queries[0]))
+
+    with instrumentation.span("serpapi.fused", "search", queries=len(queries)) as sp:
+        outcomes = await asyncio.gather(*(search(query) for query in queries), return_exceptions=True)
+        fused = _fused(queries, list(outcomes))
+        sp.set(results=len(fused))
+        return format_results(fused)
+
+
+async def aserpapi_search(query: str, num_results: int = 10) -> str:
+    """
+    Async counterpart of `serpapi_search`.
+
+    The serpapi client is blocking, so the search runs on the default executor
+    to keep the event loop free.
+    """
+    return await asyncio.to_thread(serpapi_search, query, num_results)
+
+
+def _fanout_settings(max_workers, per_host, deadline):
+    if max_workers is None:
+        max_workers = int(os.getenv("SCRAPER_MAX_WORKERS", "8"))
+    if per_host is None:
+        per_host = int(os.getenv("SCRAPER_PER_HOST", "2"))
+    if deadline is None:
+        deadline = float(os.getenv("SCRAPER_DEADLINE", "15"))
+    return max_workers, per_host, deadline
+
+
+def _collect_pages(urls: List[str], results: Dict[str, Any]) -> str:
+    """Keep the successful pages in rank order, falling back to the errors if none finished."""
+    pages = [results[url] for url in urls if isinstance(results.get(url), str)]
+    if pages:
+        return '\n---\n'.join(pages)
+    errors = [
+        results[url] if isinstance(results.get(url), dict)
+        else _scrape_error(url, TimeoutError("Scrape deadline exceeded"))
+        for url in urls
+    ]
+    return format_scraped_content(errors)
+
+
+def scrape_urls(
+    urls: List[str],
+    max_workers: int = None,
+    per_host: int = None,
+    deadline: float = None,
+) -> str:
+    """
+    Scrape several ranked URLs concurrently and keep whatever is ready by the deadline.
+
+    Args:
+        urls (List[str]): URLs ordered from most to least relevant.
+        max_workers (int, optional): Size of the worker pool. Defaults to SCRAPER_MAX_WORKERS or 8.
+        per_host (int, optional): Maximum concurrent fetches against one host.
+            Defaults to SCRAPER_PER_HOST or 2.
+        deadline (float, optional): Seconds to wait for the whole batch.
+            Defaults to SCRAPER_DEADLINE or 15.
+
+    Returns:
+        str: The pages that finished in time, formatted like `scrape_url` output and
+            joined in rank order. If none succeeded the error entries are returned instead.
+    """
+    max_workers, per_host, deadline = _fanout_settings(max_workers, per_host, deadline)
+    host_slots = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+    host_slots_lock = threading.Lock()
+    expired = threading.Event()
+    deadline_at = time.monotonic() + deadline
+
+    def fetch(url):
+        with host_slots_lock:
+            slot = host_slots[urlsplit(url).netloc]
+        with slot:
+            # Fetches still queued on a host slot when the deadline passes are dropped.
+            if expired.is_set():
+                return None
+            # A fetch still running at the deadline is abandoned, so it must not outlive it either.
+            _batch_deadline_at.set(deadline_at)
+            return scrape_url(url)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    # Copy the caller's context so instrumentation spans keep their run and node.
+    futures = {executor.submit(contextvars.copy_context().run, fetch, url): url for url in urls}
+    done, _ = wait(futures, timeout=deadline)
+    expired.set()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = {futures[future]: future.result() for future in done if future.exception() is None}
+    return _collect_pages(urls, results)
+
+
+async def ascrape_urls(
+    urls: List[str],
+    max_workers: int = None,
+    per_host: int = None,
+    deadline: float = None,
+) -> str:
+    """
+    Async counterpart of `scrape_urls`. Fetches still running at the deadline are cancelled.
+    """
+    max_workers, per_host, deadline = _fanout_settings(max_workers, per_host, deadline)
+    workers = asyncio.Semaphore(max_workers)
+    host_slots = defaultdict(lambda: asyncio.Semaphore(per_host))
+
+    async def fetch(url):
+        async with host_slots[urlsplit(url).netloc], workers:
+            return await ascrape_url(url)
+
+    tasks = {asyncio.ensure_future(fetch(url)): url for url in urls}
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    results = {tasks[task]: task.result() for task in done if task.exception() is None}
+    return _collect_pages(urls, results)
 
-        # Parse the HTML content
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Extract the title and content
-        title = soup.title.string if soup.title else "No title found"
-        content = ' '.join([p.get_text() for p in soup.find_all('p')])
-
-        return format_scraped_content([{
-            'url': url,
-            'title': title,
-            'content': content,
-            'status': 'success'
-        }])
-
-    except requests.RequestException as e:
-        return {
-            'url': url,
-            'title': "Error",
-            'content': f"Failed to scrape the URL: {str(e)}",
-            'status': 'error'
-        }
     
 if __name__ == "__main__":
     # url = "https://www.techtarget.com/whatis/definition/large-language-model-LLM"
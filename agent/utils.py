@@ -1,3 +1,4 @@
+import math
 from datetime import datetime
 
 def get_current_time_and_date():
@@ -7,4 +8,8 @@ def get_current_time_and_date():
     # Format date and time as a string
     current_time_and_date = now.strftime("%Y-%m-%d %H:%M:%S")
     
-    return current_time_and_date
\ No newline at end of file
+    return current_time_and_date
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (about four characters per token)."""
+    return math.ceil(len(text) / 4)